@@ -0,0 +1,76 @@
+"""
+@file activity.py
+@brief Distance-based activity levels deciding how often each enemy is simulated
+@author Your Name
+@date 2024
+
+Enemies near the player update every step, enemies further away update every
+few steps with a proportionally longer dt, and distant enemies stay frozen until
+the player comes closer. The schedule only depends on the step counter, the
+distance and a per-enemy slot number, so replays stay deterministic.
+"""
+
+import numpy as np
+
+# Activity levels
+FULL = 0
+REDUCED = 1
+DORMANT = 2
+
+class ActivityPolicy:
+    """
+    @brief Maps distance to the player to an update schedule
+    """
+    def __init__(self, full_distance=1200, dormant_distance=2400, reduced_every=4):
+        """
+        @brief Initialize policy
+        @param full_distance int Horizontal distance up to which enemies update every step
+        @param dormant_distance int Distance from which enemies are frozen
+        @param reduced_every int Enemies in between update every this many steps
+        """
+        self.full_distance = full_distance
+        self.dormant_distance = dormant_distance
+        self.reduced_every = reduced_every
+
+    def level(self, distance):
+        """
+        @brief Activity level for a distance
+        @param distance int Horizontal distance to the player
+        @return int FULL, REDUCED or DORMANT
+        """
+        if distance <= self.full_distance:
+            return FULL
+        if distance < self.dormant_distance:
+            return REDUCED
+        return DORMANT
+
+    def step_dt(self, distance, slot, step, dt):
+        """
+        @brief Time one enemy advances in this step
+        @param distance int Horizontal distance to the player
+        @param slot int Stable per-enemy number, spreads reduced updates over the steps
+        @param step int Level step counter
+        @param dt int Step length in 1/60 s frames
+        @return int Frames to simulate, 0 to skip the enemy
+        """
+        level = self.level(distance)
+        if level == FULL:
+            return dt
+        if level == REDUCED and (step + slot) % self.reduced_every == 0:
+            return dt * self.reduced_every
+        return 0
+
+    def step_dts(self, distances, slots, step, dt):
+        """
+        @brief Vectorized step_dt for arrays of enemies
+        @param distances numpy.ndarray Horizontal distances to the player
+        @param slots numpy.ndarray Per-enemy slot numbers
+        @param step int Level step counter
+        @param dt int Step length in 1/60 s frames
+        @return numpy.ndarray Frames to simulate per enemy (0 = skip)
+        """
+        full = distances <= self.full_distance
+        reduced = ~full & (distances < self.dormant_distance)
+        due = reduced & ((step + slots) % self.reduced_every == 0)
+        return np.where(full, dt, np.where(due, dt * self.reduced_every, 0))
+
@@ -0,0 +1,346 @@
+"""
+@file benchmark.py
+@brief Reproducible benchmark suite for the game simulation and renderer
+@author Your Name
+@date 2024
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --compare baseline.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+
+# Benchmarks always run headless
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+from game import Game
+from enemy import Gunner, Boss
+from sprite_cache import sprites
+
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+
+class ScriptedInput:
+    """
+    @brief Deterministic key presses: walk right and back, jump and shoot periodically
+    """
+    def __init__(self, walk_frames=240, jump_every=45, shoot_every=20):
+        """
+        @brief Initialize script
+        @param walk_frames int Frames spent walking in one direction before turning (None stands still)
+        @param jump_every int Frames between jumps
+        @param shoot_every int Frames between shots
+        """
+        self.walk_frames = walk_frames
+        self.jump_every = jump_every
+        self.shoot_every = shoot_every
+
+    def events(self, frame):
+        """
+        @brief Events to feed to Game.handle_event before a frame
+        @param frame int Frame index
+        @return list pygame.event.Event list
+        """
+        events = []
+        if self.walk_frames and frame % self.walk_frames == 0:
+            right = (frame // self.walk_frames) % 2 == 0
+            old_key, new_key = (pygame.K_LEFT, pygame.K_RIGHT) if right else (pygame.K_RIGHT, pygame.K_LEFT)
+            events.append(pygame.event.Event(pygame.KEYUP, key=old_key))
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=new_key))
+        if frame % self.jump_every == 0:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+        if frame % self.shoot_every == 0:
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_j))
+            events.append(pygame.event.Event(pygame.KEYUP, key=pygame.K_j))
+        return events
+
+def make_immortal(game):
+    """
+    @brief Keep the player alive and stocked so a scenario never leaves PLAYING
+    @param game Game Game instance
+    """
+    game.player.lives = 10 ** 9
+    game.player.ammo = 10 ** 9
+
+def setup_level(level_number):
+    """
+    @brief Scenario factory for a shipped level
+    @param level_number int Level number
+    @return callable Setup function taking a Game, returning the input script or None for the default
+    """
+    def setup(game):
+        game.start_level(level_number)
+        make_immortal(game)
+    return setup
+
+def setup_gunner_swarm(count):
+    """
+    @brief Scenario factory for a synthetic level full of gunners
+    @param count int Number of Gunner enemies
+    @return callable Setup function taking a Game, returning the input script or None for the default
+    """
+    def setup(game):
+        game.start_level(1)
+        level = game.level
+        ground = level.platforms[0]
+        platforms = level.platforms[1:]
+        enemies = []
+        for i in range(count):
+            # Alternate between the ground and the floating platforms
+            if i % 2 == 0:
+                x = 200 + (i * 37) % (level.width - 400)
+                enemies.append(Gunner(x, ground.top - 60, platform_rect=ground))
+            else:
+                platform = platforms[i % len(platforms)]
+                x = platform.x + (i * 13) % max(platform.width - 40, 1)
+                enemies.append(Gunner(x, platform.top - 60, platform_rect=platform))
+        level.set_enemies(enemies)
+        make_immortal(game)
+    return setup
+
+def setup_boss_barrage(count):
+    """
+    @brief Scenario factory for a projectile-heavy boss fight
+    @param count int Number of rapid-fire bosses on the final platform
+    @return callable Setup function taking a Game, returning the input script or None for the default
+    """
+    def setup(game):
+        game.start_level(3)
+        level = game.level
+        arena = level.platforms[-1]
+        bosses = []
+        for i in range(count):
+            boss = Boss(arena.x + (i * 17) % max(arena.width - 160, 1), arena.top - 60, platform_rect=arena)
+            boss.shoot_delay = 1
+            bosses.append(boss)
+        level.set_enemies([e for e in level.enemies if not isinstance(e, Boss)] + bosses)
+        # Put the player on the arena so every boss keeps firing, without a flag to end the fight
+        game.player.rect.midbottom = (arena.centerx, arena.top)
+        level.set_flag(None)
+        make_immortal(game)
+        # Stand still next to the bosses
+        return ScriptedInput(walk_frames=None)
+    return setup
+
+def setup_platform_field(count):
+    """
+    @brief Scenario factory for a wide level densely packed with platforms
+    @param count int Number of floating platforms
+    @return callable Setup function taking a Game, returning the input script or None for the default
+    """
+    def setup(game):
+        game.start_level(1)
+        level = game.level
+        level.width = 100 + count * 60
+        ground = pygame.Rect(0, 500, level.width, 100)
+        platforms = [ground]
+        for i in range(count):
+            # Staggered rows of short platforms within jumping height
+            platforms.append(pygame.Rect(150 + i * 60, 420 - (i % 4) * 70, 50, 20))
+        level.set_platforms(platforms)
+        level.set_enemies([])
+        level.set_flag(None)
+        make_immortal(game)
+    return setup
+
+def setup_generated_world(width):
+    """
+    @brief Scenario factory for a procedurally generated level
+    @param width int Level width in pixels
+    @return callable Setup function taking a Game, returning the input script or None for the default
+    """
+    def setup(game):
+        game.start_level(1)
+        game.level = game.create_level(1, generate={"width": width, "enemy_density": 0.6})
+        game.level.check_collision(game.player)
+        make_immortal(game)
+    return setup
+
+SCENARIOS = {
+    "level_1": setup_level(1),
+    "level_2": setup_level(2),
+    "level_3": setup_level(3),
+    "gunner_swarm_300": setup_gunner_swarm(300),
+    "gunner_swarm_2000": setup_gunner_swarm(2000),
+    "boss_barrage_16": setup_boss_barrage(16),
+    "platform_field_2000": setup_platform_field(2000),
+    "generated_1m": setup_generated_world(1000000),
+}
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def _summary(samples):
+    return {
+        "mean": sum(samples) / len(samples),
+        "p50": _percentile(samples, 0.50),
+        "p95": _percentile(samples, 0.95),
+        "max": max(samples),
+    }
+
+def run_scenario(setup, frames, warmup, seed, render=True, measure_memory=False, options=None):
+    """
+    @brief Run one scenario and time update and render separately
+    @param setup callable Scenario setup function
+    @param frames int Measured frames
+    @param warmup int Unmeasured frames run first
+    @param seed int Random seed
+    @param render bool Whether to render every frame
+    @param measure_memory bool Trace allocations instead of timing
+    @param options dict Keyword arguments for Game (e.g. enemy_engine=True)
+    @return dict Results (milliseconds, or peak KiB when measuring memory)
+    """
+    random.seed(seed)
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    if measure_memory:
+        tracemalloc.start()
+    game = Game(screen, seed=seed, **(options or {}))
+    script = setup(game) or ScriptedInput()
+    sprites.reset_counters()
+    update_ms = []
+    render_ms = []
+    peak_projectiles = 0
+    perf_counter = time.perf_counter
+    for frame in range(warmup + frames):
+        for event in script.events(frame):
+            game.handle_event(event)
+        start = perf_counter()
+        game.update()
+        middle = perf_counter()
+        if render:
+            game.render()
+        end = perf_counter()
+        if frame >= warmup:
+            update_ms.append((middle - start) * 1000.0)
+            render_ms.append((end - middle) * 1000.0)
+            peak_projectiles = max(peak_projectiles, game.projectile_count())
+    if measure_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"peak_kib": peak / 1024.0}
+    return {
+        "update_ms": _summary(update_ms),
+        "render_ms": _summary(render_ms) if render else None,
+        "enemies": len(game.level.enemies),
+        "peak_projectiles": peak_projectiles,
+        "projectile_pools": game.projectile_pool_stats(),
+        "sprite_cache": sprites.stats(),
+        "streaming": game.level.streamer.stats() if game.level.streamer else None,
+    }
+
+def run_suite(names, frames, warmup, seed, render=True, options=None):
+    """
+    @brief Run the selected scenarios
+    @param names list Scenario names
+    @param frames int Measured frames per scenario
+    @param warmup int Warmup frames per scenario
+    @param seed int Random seed
+    @param render bool Whether to render every frame
+    @param options dict Keyword arguments for Game
+    @return dict JSON-serialisable results
+    """
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "frames": frames,
+            "warmup": warmup,
+            "seed": seed,
+            "render": render,
+            "options": options or {},
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(SCENARIOS[name], frames, warmup, seed, render, options=options)
+        # Memory is measured in a separate, shorter pass so tracing does not skew timings
+        memory = run_scenario(SCENARIOS[name], min(frames, 300), 0, seed, render,
+                              measure_memory=True, options=options)
+        result.update(memory)
+        results["scenarios"][name] = result
+        render_text = f"{result['render_ms']['mean']:.3f}" if render else "-"
+        print(f"{name:<20} update {result['update_ms']['mean']:.3f} ms  "
+              f"render {render_text} ms  peak {result['peak_kib']:.0f} KiB")
+    return results
+
+def compare(results, baseline, threshold):
+    """
+    @brief Find scenarios whose mean frame times regressed past the threshold
+    @param results dict Current results
+    @param baseline dict Baseline results
+    @param threshold float Allowed relative slowdown (0.15 = 15%)
+    @return list Human readable regression descriptions
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("update_ms", "render_ms"):
+            if not current.get(metric) or not previous.get(metric):
+                continue
+            old = previous[metric]["mean"]
+            new = current[metric]["mean"]
+            if old > 0 and (new - old) / old > threshold:
+                regressions.append(f"{name} {metric}: {old:.3f} -> {new:.3f} ms (+{(new - old) / old:.0%})")
+    return regressions
+
+def main(argv=None):
+    """
+    @brief Benchmark entry point
+    @param argv list Argument list (defaults to sys.argv)
+    @return int Process exit code, 1 if a regression was found
+    """
+    parser = argparse.ArgumentParser(description="Pixel Rabbit Adventure benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--frames", type=int, default=600, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=60, help="unmeasured frames per scenario")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed")
+    parser.add_argument("--no-render", action="store_true", help="only time Game.update")
+    parser.add_argument("--enemy-engine", action="store_true", help="simulate enemies with EnemyEngine")
+    parser.add_argument("--projectile-store", action="store_true", help="use the array-backed ProjectileStore")
+    parser.add_argument("--enemy-activity", action="store_true", help="update distant enemies less often")
+    parser.add_argument("--streaming", action="store_true", help="stream level entities by segment")
+    parser.add_argument("--step-rate", type=int, default=60, choices=[60, 30],
+                        help="game steps per second (frames count steps)")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--compare", default=None, metavar="BASELINE", help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    names = args.scenario or list(SCENARIOS)
+    options = {"enemy_engine": args.enemy_engine, "projectile_store": args.projectile_store,
+               "step_rate": args.step_rate, "enemy_activity": args.enemy_activity,
+               "streaming": args.streaming}
+    results = run_suite(names, args.frames, args.warmup, args.seed, render=not args.no_render, options=options)
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,33 +5,79 @@
 @date 2024
 """
 
+import math
 import pygame
 
 class Camera:
     """
     @brief Camera class for view following
     """
-    def __init__(self, target):
+    def __init__(self, target, view_size=(800, 600)):
         """
         @brief Initialize camera
         @param target Target to follow (usually player)
+        @param view_size tuple (width, height) of the screen area the camera shows
         """
         self.target = target
+        self.view_width, self.view_height = view_size
         self.offset_x = 0
         self.offset_y = 0
         self.smooth_factor = 0.1  # Smoothing factor, smaller value means smoother movement
+        # Render interpolation between the previous and the current step
+        self.prev_offset_x = 0
+        self.prev_offset_y = 0
+        self.alpha = 1.0
+        self.draw_offset_x = 0
+        self.draw_offset_y = 0
+        # World-space area currently shown, follows draw_offset
+        self.viewport = pygame.Rect(0, 0, self.view_width, self.view_height)
         
-    def update(self):
+    def update(self, dt=1):
         """
         @brief Update camera position
+        @param dt int Simulated time in 1/60 s frames
         """
+        self.prev_offset_x = self.offset_x
+        self.prev_offset_y = self.offset_y
         # Calculate target position (center target on screen)
-        target_x = self.target.rect.centerx - 400  # 400 is half of screen width
-        target_y = self.target.rect.centery - 300  # 300 is half of screen height
+        target_x = self.target.rect.centerx - self.view_width // 2
+        target_y = self.target.rect.centery - self.view_height // 2
         
-        # Smoothly move camera
-        self.offset_x += (target_x - self.offset_x) * self.smooth_factor
-        self.offset_y += (target_y - self.offset_y) * self.smooth_factor
+        # Smoothly move camera (over dt frames the remaining distance shrinks dt times)
+        factor = self.smooth_factor if dt == 1 else 1.0 - (1.0 - self.smooth_factor) ** dt
+        self.offset_x += (target_x - self.offset_x) * factor
+        self.offset_y += (target_y - self.offset_y) * factor
+        self.set_interpolation(1.0)
+        
+    def set_interpolation(self, alpha):
+        """
+        @brief Set how far between the previous and current step rendering happens
+        @param alpha float 0.0 = previous step, 1.0 = current step
+        """
+        self.alpha = alpha
+        self.draw_offset_x = self.prev_offset_x + (self.offset_x - self.prev_offset_x) * alpha
+        self.draw_offset_y = self.prev_offset_y + (self.offset_y - self.prev_offset_y) * alpha
+        # Floor, so the viewport covers every pixel a drawn rect can land on
+        self.viewport.topleft = (math.floor(self.draw_offset_x), math.floor(self.draw_offset_y))
+
+    def view_rect(self, margin=0):
+        """
+        @brief World-space area on screen
+        @param margin int Extra pixels on every side (for drawings larger than their rect)
+        @return pygame.Rect Viewport rect, a new Rect
+        """
+        return self.viewport.inflate(2 * margin, 2 * margin)
+
+    def visible(self, rect, margin=0):
+        """
+        @brief Whether a world-space rect is (partly) on screen
+        @param rect pygame.Rect World-space rect
+        @param margin int Extra pixels on every side of the viewport
+        @return bool True if visible
+        """
+        if margin:
+            return self.viewport.inflate(2 * margin, 2 * margin).colliderect(rect)
+        return self.viewport.colliderect(rect)
         
     def apply(self, entity):
         """
@@ -41,12 +87,19 @@ class Camera:
         """
         if hasattr(entity, 'rect'):
             # If it's a Player object, use its rect attribute
-            rect = entity.rect.copy()
+            rect = entity.rect
+            prev_pos = getattr(entity, 'prev_pos', None)
+            if prev_pos is not None and self.alpha < 1.0:
+                # Interpolate moving entities between their last two positions
+                rect = rect.copy()
+                rect.x = prev_pos[0] + (rect.x - prev_pos[0]) * self.alpha
+                rect.y = prev_pos[1] + (rect.y - prev_pos[1]) * self.alpha
         else:
             # If it's a pygame.Rect, use directly
-            rect = entity.copy()
-            
-        return rect.move(-self.offset_x, -self.offset_y)
+            rect = entity
+
+        # move() returns a new Rect, the entity's own rect is never modified
+        return rect.move(-self.draw_offset_x, -self.draw_offset_y)
         
     def apply_point(self, point):
         """
@@ -54,4 +107,4 @@ class Camera:
         @param point tuple Point coordinates to apply offset
         @return tuple Point coordinates with applied offset
         """
-        return (point[0] - self.offset_x, point[1] - self.offset_y) 
\ No newline at end of file
+        return (point[0] - self.draw_offset_x, point[1] - self.draw_offset_y) 
\ No newline at end of file
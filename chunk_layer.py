@@ -0,0 +1,176 @@
+"""
+@file chunk_layer.py
+@brief Static scenery baked into fixed-width chunk surfaces, with parallax scrolling
+@author Your Name
+@date 2024
+
+A ChunkedLayer paints its content once per chunk of chunk_width pixels, the first
+time the chunk becomes visible, and afterwards only blits the chunks on screen.
+Baked chunks live in a least-recently-used cache, so chunks far behind the camera
+are dropped and memory stays bounded however wide the level is.
+"""
+
+import math
+import random
+from collections import OrderedDict
+import pygame
+
+# Fill color marking the transparent parts of a chunk
+COLORKEY = (255, 0, 255)
+
+class ChunkedLayer:
+    """
+    @brief Horizontally chunked, lazily baked layer
+    """
+    def __init__(self, draw, height, factor=1.0, chunk_width=512, max_chunks=8, width=None, factor_y=None):
+        """
+        @brief Initialize layer
+        @param draw callable draw(surface, left) paints layer x-range [left, left + chunk_width) at x - left
+        @param height int Layer height in pixels
+        @param factor float Scroll speed relative to the camera (1.0 moves with the level, less is farther away)
+        @param chunk_width int Chunk width in pixels
+        @param max_chunks int Baked chunks kept, must cover the screen width plus one chunk
+        @param width int Layer width, chunks past it are never drawn (None for endless)
+        @param factor_y float Vertical scroll speed (None for the same as factor, 0 pins the layer to the screen)
+        """
+        self.draw = draw
+        self.height = height
+        self.factor = factor
+        self.factor_y = factor if factor_y is None else factor_y
+        self.chunk_width = chunk_width
+        self.max_chunks = max_chunks
+        self.width = width
+        self._chunks = OrderedDict()  # chunk index -> surface, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def chunk(self, index):
+        """
+        @brief Surface of one chunk, baked on first use
+        @param index int Chunk index, chunk i covers [i * chunk_width, (i + 1) * chunk_width)
+        @return pygame.Surface Chunk surface with COLORKEY as transparent color
+        """
+        chunks = self._chunks
+        surface = chunks.get(index)
+        if surface is not None:
+            self.hits += 1
+            chunks.move_to_end(index)
+            return surface
+        self.misses += 1
+        surface = pygame.Surface((self.chunk_width, self.height))
+        surface.fill(COLORKEY)
+        self.draw(surface, index * self.chunk_width)
+        surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        chunks[index] = surface
+        while len(chunks) > self.max_chunks:
+            chunks.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def chunk_count(self):
+        """
+        @brief Number of chunks of a bounded layer
+        @return int Chunk count (None for endless layers)
+        """
+        if self.width is None:
+            return None
+        return -(-self.width // self.chunk_width)
+
+    def chunk_range(self, left, right):
+        """
+        @brief Chunks covering a layer x-range
+        @param left int Left edge in layer pixels
+        @param right int Right edge in layer pixels (exclusive)
+        @return range Chunk indices, clipped to the layer of a bounded layer
+        """
+        width = self.chunk_width
+        first = left // width
+        last = (right - 1) // width
+        if self.width is not None:
+            first = max(first, 0)
+            last = min(last, self.chunk_count() - 1)
+        return range(first, last + 1)
+
+    def prebake(self, left, right):
+        """
+        @brief Bake the chunks shown while the camera's left edge is within a world x-range,
+               e.g. around the spawn point while a level loads
+        @param left float Leftmost camera offset
+        @param right float Rightmost camera offset plus the screen width
+        """
+        for index in self.chunk_range(math.floor(left * self.factor), math.ceil(right * self.factor) + 1):
+            self.chunk(index)
+
+    def clear(self):
+        """
+        @brief Drop every baked chunk (after the content changed)
+        """
+        self._chunks.clear()
+
+    def render(self, screen, camera):
+        """
+        @brief Blit the chunks on screen
+        @param screen pygame.Surface Game window surface
+        @param camera Camera Camera object
+        """
+        # Truncate like Rect.move does in Camera.apply, so baked geometry lands on the same pixels
+        dx = int(-camera.draw_offset_x * self.factor)
+        dy = int(-camera.draw_offset_y * self.factor_y)
+        if dy >= screen.get_height() or dy + self.height <= 0:
+            return
+        width = self.chunk_width
+        for index in self.chunk_range(-dx, screen.get_width() - dx):
+            screen.blit(self.chunk(index), (index * width + dx, dy))
+
+    def stats(self):
+        """
+        @brief Cache statistics
+        @return dict {"chunks": baked chunks, "hits", "misses", "evictions"}
+        """
+        return {"chunks": len(self._chunks), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+def hills_drawer(seed, height, color, spacing, peak_range):
+    """
+    @brief Drawing function for a parallax layer of hills along the bottom edge
+    @param seed int Seed, every hill's shape is derived from the seed and its index
+    @param height int Layer height in pixels
+    @param color tuple RGB hill color
+    @param spacing int Distance between hill centers
+    @param peak_range tuple (lowest, highest) hill height in pixels
+    @return callable draw(surface, left) for ChunkedLayer
+    """
+    def hill(index):
+        rng = random.Random(seed * 1000003 + index)
+        center = index * spacing + rng.randrange(spacing // 2)
+        return center, rng.randint(*peak_range), rng.randint(spacing // 2, spacing * 3 // 2)
+
+    def draw(surface, left):
+        right = left + surface.get_width()
+        # Hills reach up to 1.5 spacings from their index position, draw every one that overlaps
+        for index in range((left - 2 * spacing) // spacing, right // spacing + 2):
+            center, peak, half_width = hill(index)
+            pygame.draw.polygon(surface, color, [
+                (center - half_width - left, height), (center - left, height - peak),
+                (center + half_width - left, height)
+            ])
+    return draw
+
+def parallax_layers(seed, height):
+    """
+    @brief Default background layers drawn behind a level, farthest first
+    @param seed int Level seed (None uses 0, the scenery only needs to be stable)
+    @param height int Screen height in pixels
+    @return list ChunkedLayer objects
+    """
+    seed = seed or 0
+    return [
+        ChunkedLayer(hills_drawer(seed, height, (25, 25, 45), 360, (120, 260)), height,
+                     factor=0.25, factor_y=0),
+        ChunkedLayer(hills_drawer(seed + 1, height, (35, 45, 60), 240, (60, 160)), height,
+                     factor=0.5, factor_y=0),
+    ]
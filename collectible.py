@@ -6,11 +6,15 @@
 """
 
 import pygame
+from sprite_cache import sprites
 
 class Collectible:
     """
     @brief Collectible item (e.g. carrot)
     """
+    # Row in the level data of a streamed level, -1 if placed by a script (see streaming.py)
+    stream_row = -1
+
     def __init__(self, x, y, width=20, height=20):
         """
         @brief Initialize collectible
@@ -31,7 +35,16 @@ class Collectible:
         @param screen pygame.Surface Game window surface
         @param camera Camera Camera object
         """
-        c_rect = camera.apply(self.rect)
+        # The leaves reach 8 px above the rect, lines are up to 3 px wide
+        bounds = (-6, -10, self.width + 12, self.height + 12)
+        sprites.blit(screen, camera.apply(self.rect).topleft, (Collectible, self.width, self.height),
+                     bounds, self.draw_sprite)
+
+    def draw_sprite(self, screen, x, y):
+        """
+        @brief Draw a carrot of this collectible's size with its top left at (x, y)
+        """
+        c_rect = pygame.Rect(x, y, self.width, self.height)
         # Draw carrot body
         pygame.draw.ellipse(screen, (255, 140, 0), c_rect)
         # Draw carrot leaves
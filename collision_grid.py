@@ -0,0 +1,234 @@
+"""
+@file collision_grid.py
+@brief Occupancy grid compiled from a level's static platforms for terrain queries
+@author Your Name
+@date 2024
+
+Every tile touched by a platform is marked in a NumPy uint8 tilemap, and every tile
+column keeps the indices of the platforms crossing it. Queries first look at the
+tiles and then test only the platforms of the columns involved, so their cost
+depends on the size of the query, not on the number or spread of platforms.
+"""
+
+import numpy as np
+
+# Rays spanning fewer tile columns than this skip the tilemap scan
+SHORT_RAY_COLUMNS = 4
+# raycast_h_many tests at least this many rays at once, against at most this many
+# platform candidates in total, and casts them one by one otherwise
+BATCH_MIN_RAYS = 24
+BATCH_MAX_PAIRS = 65536
+
+class CollisionGrid:
+    """
+    @brief Tilemap and per-column platform buckets for one level
+    """
+    def __init__(self, platforms, width, height, tile_size=32):
+        """
+        @brief Compile platforms into the grid
+        @param platforms list pygame.Rect platforms, indices refer to this list
+        @param width int Level width
+        @param height int Level height
+        @param tile_size int Tile edge length in pixels
+        """
+        self.platforms = list(platforms)
+        self.tile_size = tile_size
+        self.columns = max(1, -(-width // tile_size))
+        self.rows = max(1, -(-height // tile_size))
+        self.tiles = np.zeros((self.rows, self.columns), dtype=np.uint8)
+        # Platform indices crossing each tile column, ascending
+        self.column_platforms = [[] for _ in range(self.columns)]
+        boxes = np.array([(p.left, p.top, p.right, p.bottom, p.width, p.height) for p in self.platforms],
+                         dtype=np.int64).reshape(-1, 6)
+        self.boxes = boxes[:, :4]  # left, top, right, bottom of every platform
+        # Side a ray reaches first and last, for right casts and for mirrored left casts
+        self.near_sides = np.stack((boxes[:, 0], 1 - boxes[:, 2]))
+        self.far_sides = np.stack((boxes[:, 2] - 1, -boxes[:, 0]))
+        # The same buckets as one flat array for batched queries: column c owns
+        # bucket_platforms[bucket_start[c]:bucket_start[c + 1]]
+        self.bucket_start = np.zeros(self.columns + 1, dtype=np.int64)
+        self.bucket_platforms = np.zeros(0, dtype=np.int64)
+        solid = np.flatnonzero((boxes[:, 4] > 0) & (boxes[:, 5] > 0))  # Empty platforms never collide
+        if not len(solid):
+            return
+        left, top, right, bottom = (boxes[solid, i] for i in range(4))
+        # Geometry past the edges lands in the edge columns and rows
+        first_column = np.clip(left // tile_size, 0, self.columns - 1)
+        last_column = np.clip(np.maximum(right - 1, left) // tile_size, 0, self.columns - 1)
+        first_row = np.clip(top // tile_size, 0, self.rows - 1)
+        last_row = np.clip(np.maximum(bottom - 1, top) // tile_size, 0, self.rows - 1)
+        # Mark every covered tile at once: +1/-1 at the corners, then a 2D prefix sum
+        marks = np.zeros((self.rows + 1, self.columns + 1), dtype=np.int32)
+        np.add.at(marks, (first_row, first_column), 1)
+        np.add.at(marks, (first_row, last_column + 1), -1)
+        np.add.at(marks, (last_row + 1, first_column), -1)
+        np.add.at(marks, (last_row + 1, last_column + 1), 1)
+        self.tiles[:] = marks.cumsum(axis=0).cumsum(axis=1)[:-1, :-1] > 0
+        # (column, platform) pairs for every column a platform spans, grouped by column
+        spans = last_column - first_column + 1
+        owners = np.repeat(solid, spans)
+        columns = np.repeat(first_column, spans) + np.arange(spans.sum()) - np.repeat(spans.cumsum() - spans, spans)
+        order = np.lexsort((owners, columns))
+        columns, owners = columns[order], owners[order]
+        self.bucket_start[1:] = np.bincount(columns, minlength=self.columns).cumsum()
+        self.bucket_platforms = owners
+        starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]]).tolist()
+        owners = owners.tolist()
+        for column, start, end in zip(columns[starts].tolist(), starts, starts[1:] + [len(owners)]):
+            self.column_platforms[column] = owners[start:end]
+
+    def _column(self, x):
+        return min(max(x // self.tile_size, 0), self.columns - 1)
+
+    def _row(self, y):
+        return min(max(y // self.tile_size, 0), self.rows - 1)
+
+    def _column_span(self, left, right):
+        """
+        @brief Tile columns covered by [left, right), geometry past the edges lands in the edge columns
+        """
+        return self._column(left), self._column(max(right - 1, left))
+
+    def _row_span(self, top, bottom):
+        return self._row(top), self._row(max(bottom - 1, top))
+
+    def candidates(self, left, right):
+        """
+        @brief Platforms that may overlap the horizontal span [left, right)
+        @param left int Left coordinate
+        @param right int Right coordinate
+        @return list Platform indices, ascending
+        """
+        first, last = self._column_span(left, right)
+        if first == last:
+            return self.column_platforms[first]
+        found = set()
+        for column in range(first, last + 1):
+            found.update(self.column_platforms[column])
+        return sorted(found)
+
+    def solid_at(self, x, y):
+        """
+        @brief Whether a point is inside a platform
+        @param x int X coordinate
+        @param y int Y coordinate
+        @return bool True if solid
+        """
+        column = self._column(x)
+        if not self.tiles[self._row(y), column]:
+            return False
+        platforms = self.platforms
+        return any(platforms[i].collidepoint(x, y) for i in self.column_platforms[column])
+
+    def collide_rect(self, rect):
+        """
+        @brief Platforms colliding with a rect
+        @param rect pygame.Rect Query rect
+        @return list Platform indices, ascending
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return []
+        left, right = self._column_span(rect.left, rect.right)
+        top, bottom = self._row_span(rect.top, rect.bottom)
+        if not self.tiles[top:bottom + 1, left:right + 1].any():
+            return []
+        platforms = self.platforms
+        return [i for i in self.candidates(rect.left, rect.right) if rect.colliderect(platforms[i])]
+
+    def ground_below(self, x, y, max_distance=None):
+        """
+        @brief Ground probe: top of the nearest platform at or below a point
+        @param x int X coordinate
+        @param y int Y coordinate where the probe starts
+        @param max_distance int Maximum distance searched (None for the whole level)
+        @return int Platform top y, or None if there is no ground within range
+        """
+        column = self._column(x)
+        start = self._row(y)
+        stop = self.rows if max_distance is None else self._row(y + max_distance) + 1
+        if not self.tiles[start:stop, column].any():
+            return None
+        best = None
+        for i in self.column_platforms[column]:
+            platform = self.platforms[i]
+            if platform.left <= x < platform.right and platform.top >= y:
+                if best is None or platform.top < best:
+                    best = platform.top
+        if best is not None and max_distance is not None and best - y > max_distance:
+            return None
+        return best
+
+    def raycast_h(self, x, y, direction, max_distance):
+        """
+        @brief Horizontal ray: distance to the first platform side hit
+        @param x int Ray start x coordinate
+        @param y int Ray y coordinate
+        @param direction int 1 to cast right, -1 to cast left
+        @param max_distance int Maximum distance searched
+        @return int Distance to the hit, or None if nothing is hit within range
+        """
+        start = self._column(x)
+        end = self._column(x + direction * max_distance)
+        if abs(end - start) < SHORT_RAY_COLUMNS:
+            # Short rays (projectile moves) just walk their columns, empty ones have no platforms
+            columns = range(start, end + direction, direction)
+        else:
+            row = self._row(y)
+            if direction > 0:
+                columns = (np.flatnonzero(self.tiles[row, start:end + 1]) + start).tolist()
+            else:
+                columns = (start - np.flatnonzero(self.tiles[row, end:start + 1][::-1])).tolist()
+        platforms = self.platforms
+        for column in columns:
+            best = None
+            for i in self.column_platforms[column]:
+                platform = platforms[i]
+                if not platform.top <= y < platform.bottom:
+                    continue
+                if platform.left <= x < platform.right:
+                    return 0  # Starts inside a platform
+                if direction > 0 and platform.left > x:
+                    distance = platform.left - x
+                elif direction < 0 and platform.right <= x:
+                    distance = x - platform.right + 1
+                else:
+                    continue
+                if best is None or distance < best:
+                    best = distance
+            if best is not None:
+                return best if best <= max_distance else None
+        return None
+
+    def raycast_h_many(self, xs, ys, directions, max_distances):
+        """
+        @brief Batched raycast_h
+        @param xs numpy.ndarray Ray start x coordinates
+        @param ys numpy.ndarray Ray y coordinates
+        @param directions numpy.ndarray 1 to cast right, -1 to cast left, per ray
+        @param max_distances numpy.ndarray Maximum distance searched, per ray
+        @return numpy.ndarray Distance to the hit per ray, 0 if it starts inside a platform, -1 for no hit
+        """
+        count = len(xs)
+        if count >= BATCH_MIN_RAYS:
+            ends = xs + directions * max_distances
+            first = self._column(int(min(xs.min(), ends.min())))
+            last = self._column(int(max(xs.max(), ends.max())))
+            # Every platform of the columns the rays span (some more than once), in one slice
+            candidates = self.bucket_platforms[self.bucket_start[first]:self.bucket_start[last + 1]]
+            if count * len(candidates) <= BATCH_MAX_PAIRS:
+                # Left casts are mirrored (x -> -x) so every ray tests the near side ahead of it
+                mirrored = (directions < 0).astype(np.intp)[:, None]
+                x = (xs * directions)[:, None]
+                y = ys[:, None]
+                gap = self.near_sides[mirrored, candidates] - x
+                gap[(self.far_sides[mirrored, candidates] < x)
+                    | (self.boxes[candidates, 1] > y) | (y >= self.boxes[candidates, 3])] = np.iinfo(np.int64).max
+                # A platform around the start has gap <= 0, which wins the minimum
+                best = gap.min(axis=1)
+                return np.where(best <= max_distances, np.maximum(best, 0), -1)
+        result = np.full(count, -1, dtype=np.int64)
+        for i, ray in enumerate(zip(xs.tolist(), ys.tolist(), directions.tolist(), max_distances.tolist())):
+            distance = self.raycast_h(*ray)
+            if distance is not None:
+                result[i] = distance
+        return result
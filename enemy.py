@@ -7,12 +7,22 @@
 
 import pygame
 import math
-from projectile import EnemyProjectile
+import tracing
+from projectile import shared_surface, spawn_enemy_projectile
+from sprite_cache import sprites
 
 class Enemy(pygame.sprite.Sprite):
     """
     @brief Enemy base class, inherits from pygame.sprite.Sprite
     """
+    # Set when the enemy is simulated by an EnemyEngine (see enemy_engine.py)
+    engine = None
+    engine_slot = -1
+    # Stable number spreading reduced-rate updates over the steps (see activity.py)
+    activity_slot = 0
+    # Row in the level data of a streamed level, -1 if placed by a script (see streaming.py)
+    stream_row = -1
+
     def __init__(self, x, y, health, speed, damage):
         """
         @brief Initialize enemy
@@ -23,9 +33,8 @@ class Enemy(pygame.sprite.Sprite):
         @param damage int Damage value
         """
         super().__init__()
-        # Create enemy image (temporarily using rectangle)
-        self.image = pygame.Surface((40, 60))
-        self.image.fill((0, 0, 255))  # Blue color for enemy
+        # Create enemy image (temporarily using rectangle, shared by every enemy)
+        self.image = shared_surface((40, 60), (0, 0, 255))  # Blue color for enemy
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
@@ -42,14 +51,27 @@ class Enemy(pygame.sprite.Sprite):
         @return bool Whether dead
         """
         self.health -= damage
+        if self.engine is not None:
+            self.engine.health[self.engine_slot] = self.health
         return self.health <= 0
         
-    def update(self, player):
+    def update(self, player, spawn=spawn_enemy_projectile, dt=1):
         """
         @brief Update enemy state
         @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames
         """
         pass
+
+    def create_projectile(self, player, spawn=spawn_enemy_projectile):
+        """
+        @brief Create a bullet (basic enemies do not shoot)
+        @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @return EnemyProjectile or None
+        """
+        return None
         
     def render(self, screen, camera):
         """
@@ -83,14 +105,16 @@ class Grunt(Enemy):
         self.shoot_cooldown = 0
         self.shoot_delay = 60
         
-    def update(self, player):
+    def update(self, player, spawn=spawn_enemy_projectile, dt=1):
         """
         @brief Update basic enemy state
         @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames
         @return EnemyProjectile Return bullet object
         """
         # Patrol logic
-        self.rect.x += self.speed * self.direction
+        self.rect.x += self.speed * self.direction * dt
         if self.rect.x < self.patrol_left:
             self.rect.x = self.patrol_left
             self.direction = 1
@@ -100,23 +124,43 @@ class Grunt(Enemy):
         self.facing_right = self.direction > 0
         # Shooting logic
         if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown = max(self.shoot_cooldown - dt, 0)
         # 只要玩家和敌人水平有重叠（比如距离小于100像素），就发射子弹
         on_same_platform = abs(player.rect.centerx - self.rect.centerx) < 100 and abs(player.rect.bottom - self.rect.bottom) < 80
-        print(f"[DEBUG] Enemy update: player.rect={player.rect}, enemy.rect={self.rect}, on_same_platform={on_same_platform}")
+        tracing.debug("enemy", "Enemy update: player.rect=%s, enemy.rect=%s, on_same_platform=%s", player.rect, self.rect, on_same_platform)
         if on_same_platform and self.shoot_cooldown == 0:
             self.shoot_cooldown = self.shoot_delay
-            proj = EnemyProjectile(self.rect.centerx, self.rect.centery, player.rect.centerx > self.rect.centerx)
-            proj.image = pygame.Surface((32, 16))
-            proj.image.fill((255,255,255))
-            proj.rect = proj.image.get_rect(center=(self.rect.centerx, self.rect.centery))
-            proj.damage = 15
-            return proj
+            return self.create_projectile(player, spawn)
         return None
 
+    def create_projectile(self, player, spawn=spawn_enemy_projectile):
+        """
+        @brief Create a bullet aimed at the player
+        @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @return EnemyProjectile Bullet object (None if the spawner keeps it elsewhere)
+        """
+        return spawn(self.rect.centerx, self.rect.centery, player.rect.centerx > self.rect.centerx,
+                     (32, 16), (255, 255, 255), 15)
+
+    # Area covered by draw_sprite relative to the rect's top left (lines are 3 px wide)
+    SPRITE_BOUNDS = (-4, -4, 44, 64)
+
     def render(self, screen, camera):
-        screen_pos = camera.apply(self)
-        x, y = screen_pos.x, screen_pos.y
+        """
+        @brief Render basic enemy from the sprite cache
+        @param screen pygame.Surface Game window surface
+        @param camera Camera Camera object
+        """
+        # The drawing does not depend on facing, so one cached sprite serves both directions
+        sprites.blit(screen, camera.apply(self).topleft, (Grunt, None, None),
+                     self.SPRITE_BOUNDS, self.draw_sprite)
+
+    @staticmethod
+    def draw_sprite(screen, x, y):
+        """
+        @brief Draw a basic enemy with its top left at (x, y)
+        """
         # Draw body
         pygame.draw.rect(screen, (0, 0, 200), (x+8, y+16, 16, 24))
         # Draw head
@@ -156,14 +200,16 @@ class Gunner(Enemy):
         self.direction = 1
         self.platform_rect = platform_rect
         
-    def update(self, player):
+    def update(self, player, spawn=spawn_enemy_projectile, dt=1):
         """
         @brief Update gunner state
         @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames
         @return EnemyProjectile Return bullet object
         """
         # Patrol logic
-        self.rect.x += self.speed * self.direction
+        self.rect.x += self.speed * self.direction * dt
         if self.rect.x < self.patrol_left:
             self.rect.x = self.patrol_left
             self.direction = 1
@@ -173,23 +219,43 @@ class Gunner(Enemy):
         self.facing_right = self.direction > 0
         # Shooting cooling
         if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown = max(self.shoot_cooldown - dt, 0)
         # 只要玩家和敌人水平有重叠（比如距离小于100像素），就发射子弹
         on_same_platform = abs(player.rect.centerx - self.rect.centerx) < 100 and abs(player.rect.bottom - self.rect.bottom) < 80
-        print(f"[DEBUG] Enemy update: player.rect={player.rect}, enemy.rect={self.rect}, on_same_platform={on_same_platform}")
+        tracing.debug("enemy", "Enemy update: player.rect=%s, enemy.rect=%s, on_same_platform=%s", player.rect, self.rect, on_same_platform)
         if on_same_platform and self.shoot_cooldown == 0:
             self.shoot_cooldown = self.shoot_delay
-            proj = EnemyProjectile(self.rect.centerx, self.rect.centery, player.rect.centerx > self.rect.centerx)
-            proj.image = pygame.Surface((32, 16))
-            proj.image.fill((255,255,255))
-            proj.rect = proj.image.get_rect(center=(self.rect.centerx, self.rect.centery))
-            proj.damage = 15
-            return proj
+            return self.create_projectile(player, spawn)
         return None
 
+    def create_projectile(self, player, spawn=spawn_enemy_projectile):
+        """
+        @brief Create a bullet aimed at the player
+        @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @return EnemyProjectile Bullet object (None if the spawner keeps it elsewhere)
+        """
+        return spawn(self.rect.centerx, self.rect.centery, player.rect.centerx > self.rect.centerx,
+                     (32, 16), (255, 255, 255), 15)
+
+    # Area covered by draw_sprite relative to the rect's top left (the gun reaches x+36)
+    SPRITE_BOUNDS = (-4, -4, 44, 64)
+
     def render(self, screen, camera):
-        screen_pos = camera.apply(self)
-        x, y = screen_pos.x, screen_pos.y
+        """
+        @brief Render gunner from the sprite cache
+        @param screen pygame.Surface Game window surface
+        @param camera Camera Camera object
+        """
+        # The drawing does not depend on facing, so one cached sprite serves both directions
+        sprites.blit(screen, camera.apply(self).topleft, (Gunner, None, None),
+                     self.SPRITE_BOUNDS, self.draw_sprite)
+
+    @staticmethod
+    def draw_sprite(screen, x, y):
+        """
+        @brief Draw a gunner with its top left at (x, y)
+        """
         # Draw body (light blue)
         pygame.draw.rect(screen, (0, 100, 200), (x+8, y+16, 16, 24))
         # Draw head
@@ -222,22 +288,23 @@ class Boss(Enemy):
         """
         super().__init__(x, y, health=health, speed=2, damage=damage)
         self.platform_rect = platform_rect
+        self.direction = 1
         self.shoot_cooldown = 0
         self.shoot_delay = 40
         
-    def update(self, player):
+    def update(self, player, spawn=spawn_enemy_projectile, dt=1):
         """
         @brief Update Boss state
         @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames
         @return EnemyProjectile or None
         """
         # Boss moves within platform range
         if self.platform_rect:
             left = self.platform_rect.left
             right = self.platform_rect.right - 160
-            if not hasattr(self, 'direction'):
-                self.direction = 1
-            self.rect.x += self.speed * self.direction
+            self.rect.x += self.speed * self.direction * dt
             if self.rect.x < left:
                 self.rect.x = left
                 self.direction = 1
@@ -246,28 +313,48 @@ class Boss(Enemy):
                 self.direction = -1
         # Shoot green big bead
         if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown = max(self.shoot_cooldown - dt, 0)
         # 只要玩家和敌人水平有重叠（比如距离小于100像素），就发射子弹
         on_same_platform = abs(player.rect.centerx - self.rect.centerx) < 100 and abs(player.rect.bottom - self.rect.bottom) < 80
-        print(f"[DEBUG] Enemy update: player.rect={player.rect}, enemy.rect={self.rect}, on_same_platform={on_same_platform}")
+        tracing.debug("enemy", "Enemy update: player.rect=%s, enemy.rect=%s, on_same_platform=%s", player.rect, self.rect, on_same_platform)
         if on_same_platform and self.shoot_cooldown == 0:
             self.shoot_cooldown = self.shoot_delay
-            if self.facing_right:
-                bx = self.rect.right + 36
-            else:
-                bx = self.rect.left - 80
-            by = self.rect.centery + 40
-            proj = EnemyProjectile(bx, by, self.facing_right)
-            proj.image = pygame.Surface((32,32))
-            proj.image.fill((0,255,0))  # Green big bullet
-            proj.rect = proj.image.get_rect(center=(bx, by))
-            proj.damage = 50
-            return proj
+            return self.create_projectile(player, spawn)
         return None
 
+    def create_projectile(self, player, spawn=spawn_enemy_projectile):
+        """
+        @brief Create a green big bead in the facing direction
+        @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @return EnemyProjectile Bullet object (None if the spawner keeps it elsewhere)
+        """
+        if self.facing_right:
+            bx = self.rect.right + 36
+        else:
+            bx = self.rect.left - 80
+        by = self.rect.centery + 40
+        # Green big bullet
+        return spawn(bx, by, self.facing_right, (32, 32), (0, 255, 0), 50)
+
+    # Area covered by draw_sprite relative to the rect's top left (arms and legs reach 80 px)
+    SPRITE_BOUNDS = (-6, 0, 92, 90)
+
     def render(self, screen, camera):
-        screen_pos = camera.apply(self)
-        x, y = screen_pos.x, screen_pos.y
+        """
+        @brief Render Boss from the sprite cache
+        @param screen pygame.Surface Game window surface
+        @param camera Camera Camera object
+        """
+        # The drawing does not depend on facing, so one cached sprite serves both directions
+        sprites.blit(screen, camera.apply(self).topleft, (Boss, None, None),
+                     self.SPRITE_BOUNDS, self.draw_sprite)
+
+    @staticmethod
+    def draw_sprite(screen, x, y):
+        """
+        @brief Draw a Boss with its top left at (x, y)
+        """
         # Draw body (green, bigger)
         pygame.draw.rect(screen, (0, 200, 0), (x+20, y+32, 40, 32))
         # Draw head
@@ -0,0 +1,188 @@
+"""
+@file enemy_engine.py
+@brief Optional struct-of-arrays NumPy engine simulating all enemies of a level at once
+@author Your Name
+@date 2024
+
+The engine owns position, direction, patrol bounds, cooldown, health and damage of
+every enemy in NumPy arrays and runs patrol, cooldown and firing decisions as a
+handful of vectorized operations per frame. The Enemy objects stay as thin views:
+their rect.x is written back every frame for rendering and collision tests, the
+remaining fields are copied back on sync_views().
+"""
+
+import math
+import numpy as np
+from enemy import Boss
+from projectile import spawn_enemy_projectile
+
+def _round_half_away(value):
+    """
+    @brief Round like pygame.Rect does when a float is assigned to a coordinate
+    @param value float Value
+    @return int Rounded value
+    """
+    return int(math.floor(value + 0.5)) if value >= 0 else -int(math.floor(0.5 - value))
+
+class EnemyEngine:
+    """
+    @brief Vectorized patrol, cooldown and firing for a list of enemies
+    """
+    def __init__(self, enemies=()):
+        """
+        @brief Initialize engine
+        @param enemies list Enemy objects to simulate
+        """
+        self.rebuild(enemies)
+
+    def rebuild(self, enemies):
+        """
+        @brief (Re)load every array from the given enemies
+        @param enemies list Enemy objects to simulate
+        """
+        for enemy in getattr(self, "enemies", ()):
+            enemy.engine = None
+            enemy.engine_slot = -1
+        self.enemies = list(enemies)
+        n = len(self.enemies)
+        self.x = np.empty(n, dtype=np.int64)
+        self.y = np.empty(n, dtype=np.int64)
+        self.width = np.empty(n, dtype=np.int64)
+        self.height = np.empty(n, dtype=np.int64)
+        self.speed = np.empty(n, dtype=np.float64)
+        self.direction = np.empty(n, dtype=np.int64)
+        self.patrol_left = np.empty(n, dtype=np.float64)
+        self.patrol_right = np.empty(n, dtype=np.float64)
+        self.clamp_left = np.zeros(n, dtype=np.int64)  # rect.x after hitting a patrol bound
+        self.clamp_right = np.zeros(n, dtype=np.int64)
+        self.cooldown = np.empty(n, dtype=np.int64)
+        self.shoot_delay = np.empty(n, dtype=np.int64)
+        self.health = np.empty(n, dtype=np.int64)
+        self.damage = np.empty(n, dtype=np.int64)
+        self.turns = np.empty(n, dtype=np.bool_)  # Whether facing follows the patrol direction
+        self.alive = np.ones(n, dtype=np.bool_)
+        self.activity_slot = np.empty(n, dtype=np.int64)
+        self._rects = [enemy.rect for enemy in self.enemies]
+        for i, enemy in enumerate(self.enemies):
+            enemy.engine = self
+            enemy.engine_slot = i
+            self.load(enemy)
+        self.dead = 0
+
+    def load(self, enemy):
+        """
+        @brief Copy one enemy's fields into the arrays (call after scripts change an enemy)
+        @param enemy Enemy Enemy bound to this engine
+        """
+        i = enemy.engine_slot
+        rect = enemy.rect
+        self.x[i] = rect.x
+        self.y[i] = rect.y
+        self.width[i] = rect.width
+        self.height[i] = rect.height
+        self.cooldown[i] = enemy.shoot_cooldown
+        self.shoot_delay[i] = enemy.shoot_delay
+        self.health[i] = enemy.health
+        self.damage[i] = enemy.damage
+        self.activity_slot[i] = enemy.activity_slot
+        if isinstance(enemy, Boss):
+            # Bosses walk their platform minus their reach and never turn around visually
+            self.turns[i] = False
+            if enemy.platform_rect:
+                self.speed[i] = enemy.speed
+                self.patrol_left[i] = enemy.platform_rect.left
+                self.patrol_right[i] = enemy.platform_rect.right - 160
+            else:
+                self.speed[i] = 0.0
+                self.patrol_left[i] = -np.inf
+                self.patrol_right[i] = np.inf
+            self.direction[i] = getattr(enemy, "direction", 1)
+        else:
+            self.turns[i] = True
+            self.speed[i] = enemy.speed
+            self.patrol_left[i] = enemy.patrol_left
+            self.patrol_right[i] = enemy.patrol_right
+            self.direction[i] = enemy.direction
+        if math.isfinite(self.patrol_left[i]):
+            self.clamp_left[i] = _round_half_away(self.patrol_left[i])
+        if math.isfinite(self.patrol_right[i]):
+            self.clamp_right[i] = _round_half_away(self.patrol_right[i])
+        self._rects[i] = rect
+
+    def remove(self, enemy):
+        """
+        @brief Stop simulating an enemy (e.g. when it dies)
+        @param enemy Enemy Enemy bound to this engine
+        """
+        if enemy.engine is not self:
+            return
+        self.alive[enemy.engine_slot] = False
+        enemy.engine = None
+        enemy.engine_slot = -1
+        self.dead += 1
+        # Compact once half of the slots are dead
+        if self.dead * 2 > len(self.enemies):
+            self.rebuild([e for i, e in enumerate(self.enemies) if self.alive[i]])
+
+    def update(self, player, mask=None, spawn=spawn_enemy_projectile, dt=1):
+        """
+        @brief Advance all enemies by one step
+        @param player Player Player object
+        @param mask numpy.ndarray Optional bool array selecting which slots update this frame
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames, or an int array with one value per slot
+        @return list New EnemyProjectile objects, in enemy order
+        """
+        if not self.enemies:
+            return []
+        active = self.alive if mask is None else (self.alive & mask)
+
+        # Patrol: pygame.Rect rounds assigned floats half away from zero
+        moved = self.x + self.speed * self.direction * dt
+        moved = np.where(moved >= 0, np.floor(moved + 0.5), -np.floor(0.5 - moved)).astype(np.int64)
+        x = np.where(active, moved, self.x)
+        too_left = active & (x < self.patrol_left)
+        too_right = active & ~too_left & (x > self.patrol_right)
+        x = np.where(too_left, self.clamp_left, x)
+        x = np.where(too_right, self.clamp_right, x)
+        self.x = x
+        self.direction[too_left] = 1
+        self.direction[too_right] = -1
+
+        # Cooldown and firing decision
+        self.cooldown = np.where(active & (self.cooldown > 0), np.maximum(self.cooldown - dt, 0), self.cooldown)
+        center_x = x + self.width // 2
+        bottom = self.y + self.height
+        on_same_platform = ((np.abs(player.rect.centerx - center_x) < 100) &
+                            (np.abs(player.rect.bottom - bottom) < 80))
+        fire = active & on_same_platform & (self.cooldown == 0)
+        self.cooldown[fire] = self.shoot_delay[fire]
+
+        # Write positions back to the views, they are read by collision and rendering
+        for rect, value in zip(self._rects, x.tolist()):
+            rect.x = value
+
+        projectiles = []
+        for i in np.flatnonzero(fire).tolist():
+            enemy = self.enemies[i]
+            if self.turns[i]:
+                enemy.facing_right = self.direction[i] > 0
+            proj = enemy.create_projectile(player, spawn)
+            if proj is not None:
+                projectiles.append(proj)
+        return projectiles
+
+    def sync_views(self):
+        """
+        @brief Copy direction, facing and cooldown back to the Enemy objects
+        """
+        directions = self.direction.tolist()
+        cooldowns = self.cooldown.tolist()
+        turns = self.turns.tolist()
+        for i, enemy in enumerate(self.enemies):
+            if not self.alive[i]:
+                continue
+            enemy.direction = directions[i]
+            enemy.shoot_cooldown = cooldowns[i]
+            if turns[i]:
+                enemy.facing_right = directions[i] > 0
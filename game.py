@@ -5,31 +5,100 @@
 @date 2024
 """
 
+import zlib
+import snapshot
+import struct
 import pygame
+import tracing
 from player import Player
-from level import Level
+from level import Level, RENDER_MARGIN
+from level_generator import endless_settings
 from camera import Camera
 from game_state import GameState
+from preload import LevelPreloader
+from profiler import FrameProfiler
+from projectile import Projectile, ProjectilePool, spawn_enemy_projectile
+from spatial_hash import SpatialHash
+from projectile_store import ProjectileStore, PLAYER, ENEMY
+from scheduler import Scheduler, PHASES
+from text_cache import Label, text_cache
+
+# update() 运行的阶段，渲染阶段由 render() 运行
+SIMULATION_PHASES = tuple(phase for phase in PHASES if phase != "render")
+
+# 玩家子弹和敌人数量都超过这两个值时，命中检测改用空间哈希
+BROADPHASE_MIN_PROJECTILES = 192
+BROADPHASE_MIN_ENEMIES = 256
 
 class Game:
     """
     @brief 游戏核心类，管理游戏状态和主要逻辑
     """
-    def __init__(self, screen):
+    def __init__(self, screen, seed=None, enemy_engine=False, projectile_store=False, step_rate=60,
+                 enemy_activity=False, endless=False, streaming=False):
         """
         @brief 初始化游戏
         @param screen pygame.Surface 游戏窗口表面
+        @param seed int 随机种子，相同种子和输入得到相同的模拟结果
+        @param enemy_engine bool 使用向量化的 EnemyEngine 更新敌人
+        @param projectile_store bool 用数组化的 ProjectileStore 代替每颗子弹一个 Sprite
+        @param step_rate int 每秒模拟步数，必须整除 60（例如 30 时每步模拟两帧）
+        @param enemy_activity bool 按与玩家的距离降低远处敌人的更新频率（见 activity.py）
+        @param endless bool 无尽模式：关卡由种子程序化生成，一关比一关更长更难，没有最终关
+        @param streaming bool 按分段加载关卡的敌人和收集品，只保留摄像机附近的分段（见 streaming.py）
         """
+        if step_rate <= 0 or 60 % step_rate:
+            raise ValueError(f"step_rate must divide 60, got {step_rate}")
         self.screen = screen
+        self.seed = seed
+        self.step_rate = step_rate
+        # 每次 update 模拟的时长（以 1/60 秒帧为单位）
+        self.dt = 60 // step_rate
+        self.enemy_engine = enemy_engine
+        self.enemy_activity = enemy_activity
+        self.endless = endless
+        self.streaming = streaming
+        # 子弹存储：None 时使用 sprite 组
+        self.projectile_store = ProjectileStore() if projectile_store else None
+        # 子弹对象池：被回收或击中的子弹重复使用
+        self.player_projectile_pool = ProjectilePool(Projectile)
+        self.enemy_projectile_pool = ProjectilePool(spawn_enemy_projectile)
+        if self.projectile_store is not None:
+            self.spawn_player_projectile = self.projectile_store.spawn_player
+            self.spawn_enemy_projectile = self.projectile_store.spawn_enemy
+        else:
+            self.spawn_player_projectile = self.player_projectile_pool.acquire
+            self.spawn_enemy_projectile = self.enemy_projectile_pool.acquire
+        # 子弹和敌人都很多时用于命中检测的空间哈希
+        self.enemy_hash = SpatialHash()
+        # 模拟帧计数，每次 update 加一（所有计时都基于帧）
+        self.frame = 0
         self.clock = pygame.time.Clock()
         self.running = True
         self.score = 0
         self.current_level = 1
-        self.max_levels = 3
+        # 无尽模式没有最后一关
+        self.max_levels = float("inf") if endless else 3
         
         # 游戏状态
         self.state = GameState.START_MENU
         self.game_over = False
+        # 渲染插值：开启后每一步记录实体的上一帧位置
+        self.interpolate = False
+        # 过关后在后台预加载下一关（只跑单关的场合可以关闭）
+        self.preload_levels = True
+        # 分阶段帧耗时统计（F3 显示叠加层）
+        self.profiler = FrameProfiler()
+        # 每帧的系统流水线，按阶段顺序运行，每个系统单独计时
+        self.scheduler = Scheduler(self.profiler)
+        self.register_systems()
+        # HUD 文本，数值不变时复用上次渲染的表面
+        self.hud_labels = {
+            "health": Label("Health: {}", 36, (255, 255, 255)),
+            "lives": Label("Lives: {}", 36, (255, 255, 255)),
+            "level": Label("Level: {}", 36, (255, 255, 255)),
+            "ammo": Label("Ammo: {}", 36, (255, 255, 255)),
+        }
         
         # 按钮
         self.start_button = pygame.Rect(300, 300, 200, 50)
@@ -47,21 +116,140 @@ class Game:
         self.score = 0
         self.current_level = 1
         self.game_over = False
+        # 过关画面显示期间在后台构建下一关（见 preload.py），重置时丢弃
+        self.preloader = None
         self.player = Player(100, 440)  # 440为地面顶部
-        print(f"[DEBUG] Player rect after init: {self.player.rect}")
-        self.camera = Camera(self.player)
-        self.level = Level(self.current_level)
+        tracing.debug("game", "Player rect after init: %s", self.player.rect)
+        self.camera = Camera(self.player, self.screen.get_size())
+        self.level = self.create_level(self.current_level)
         # self.level.check_collision(self.player)  # 注释掉，避免出生点被推回地面
+        self.clear_projectiles()
+        
+    def clear_projectiles(self):
+        """
+        @brief 清空所有子弹
+        """
+        for proj in getattr(self, 'projectiles', ()):
+            self.player_projectile_pool.release(proj)
+        for eproj in getattr(self, 'enemy_projectiles', ()):
+            self.enemy_projectile_pool.release(eproj)
         self.projectiles = pygame.sprite.Group()
         self.enemy_projectiles = pygame.sprite.Group()
-        
+        if self.projectile_store is not None:
+            self.projectile_store.clear()
+
+    def projectile_count(self):
+        """
+        @brief 当前存活的子弹数量
+        @return int 玩家和敌人子弹总数
+        """
+        count = len(self.projectiles) + len(self.enemy_projectiles)
+        if self.projectile_store is not None:
+            count += len(self.projectile_store)
+        return count
+
+    def projectile_pool_stats(self):
+        """
+        @brief 子弹对象池统计，用于确定池的大小
+        @return dict {"player": {...}, "enemy": {...}}，使用 ProjectileStore 时为空
+        """
+        if self.projectile_store is not None:
+            return {}
+        return {
+            "player": self.player_projectile_pool.stats(),
+            "enemy": self.enemy_projectile_pool.stats(),
+        }
+
+    def level_seed(self, level_number):
+        """
+        @brief 由游戏种子派生关卡种子
+        @param level_number int 关卡编号
+        @return int 关卡种子，未设置游戏种子时为 None
+        """
+        if self.seed is None:
+            return None
+        return self.seed * 1000 + level_number
+
+    def create_level(self, level_number, generate=None):
+        """
+        @brief 创建关卡：普通模式读取关卡文件，无尽模式按种子生成
+        @param level_number int 关卡编号
+        @param generate dict 指定时按这些参数生成关卡（见 level_generator.generate_layout）
+        @return Level 关卡对象
+        """
+        if generate is None and self.endless:
+            generate = endless_settings(level_number)
+        return Level(level_number, seed=self.level_seed(level_number), enemy_engine=self.enemy_engine,
+                     enemy_activity=self.enemy_activity, generate=generate, streaming=self.streaming)
+
+    def prepare_level(self, level_number, report=None):
+        """
+        @brief 创建关卡并预先烘焙出生点附近的渲染分块，供后台线程调用
+        @param level_number int 关卡编号
+        @param report callable report(fraction) 报告进度（0 到 1）
+        @return Level 关卡对象
+        """
+        report = report or (lambda fraction: None)
+        level = self.create_level(level_number)
+        layers = [*level.background_layers, level.static_layer]
+        report(1 / (len(layers) + 1))
+        # 摄像机从偏移 0 平滑移向出生点，两者之间的画面都要烘焙
+        view_width = self.screen.get_width()
+        target = level.spawn_point[0] + self.player.rect.width // 2 - view_width // 2
+        for index, layer in enumerate(layers):
+            layer.prebake(min(target, 0), max(target, 0) + view_width)
+            report((index + 2) / (len(layers) + 1))
+        return level
+
+    def preload_level(self, level_number):
+        """
+        @brief 在后台线程开始构建关卡，start_level 进入该关卡时直接使用
+        @param level_number int 关卡编号
+        """
+        self.preloader = LevelPreloader(level_number, lambda report: self.prepare_level(level_number, report))
+
+    def preload_progress(self):
+        """
+        @brief 后台加载进度
+        @return float 0 到 1 的进度，没有正在加载的关卡时为 None
+        """
+        if self.preloader is None or self.preloader.done:
+            return None
+        return self.preloader.progress
+
+    def start_level(self, level_number, keep_player=False):
+        """
+        @brief 直接进入指定关卡并开始游戏
+        @param level_number int 关卡编号
+        @param keep_player bool 是否保留玩家的生命、血量和弹药
+        """
+        old_player = self.player
+        self.current_level = level_number
+        preloader, self.preloader = self.preloader, None
+        if preloader is not None and preloader.level_number == level_number:
+            # 还没加载完时等待后台线程，保证回放中关卡开始的帧不变
+            self.level = preloader.result()
+        else:
+            self.level = self.create_level(self.current_level)
+        self.player = Player(self.level.spawn_point[0], self.level.spawn_point[1])
+        if keep_player:
+            # 保留玩家状态
+            self.player.lives = old_player.lives
+            self.player.health = old_player.health
+            self.player.ammo = old_player.ammo
+        self.camera = Camera(self.player, self.screen.get_size())
+        self.level.check_collision(self.player)
+        self.clear_projectiles()
+        self.state = GameState.PLAYING
+
     def handle_event(self, event):
         """
         @brief 处理游戏事件
         @param event pygame.event.Event 游戏事件
         """
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            # 使用事件自带的坐标，回放时不依赖真实鼠标
+            mouse_pos = event.pos
             
             if self.state == GameState.START_MENU:
                 if self.start_button.collidepoint(mouse_pos):
@@ -82,18 +270,7 @@ class Game:
                         self.state = GameState.START_MENU
                         self.reset_game()
                     else:
-                        # 保留玩家状态
-                        old_player = self.player
-                        self.level = Level(self.current_level)
-                        self.player = Player(self.level.spawn_point[0], self.level.spawn_point[1])
-                        self.player.lives = old_player.lives
-                        self.player.health = old_player.health
-                        self.player.ammo = old_player.ammo
-                        self.camera = Camera(self.player)
-                        self.level.check_collision(self.player)
-                        self.projectiles = pygame.sprite.Group()
-                        self.enemy_projectiles = pygame.sprite.Group()
-                        self.state = GameState.PLAYING
+                        self.start_level(self.current_level, keep_player=True)
                         
             elif self.state == GameState.VICTORY:
                 if self.victory_button.collidepoint(mouse_pos):
@@ -101,69 +278,233 @@ class Game:
                     self.reset_game()
             
         if self.state == GameState.PLAYING:
-            proj = self.player.handle_event(event)
+            proj = self.player.handle_event(event, self.spawn_player_projectile)
             if proj:
                 self.projectiles.add(proj)
             
+    def register_systems(self):
+        """
+        @brief 按阶段注册每帧运行的系统，每个系统只注册一次
+        """
+        register = self.scheduler.register
+        register("interpolation", "input", self.snapshot_positions)
+        register("player", "physics", self.update_player)
+        register("terrain", "physics", self.update_terrain)
+        register("camera", "physics", self.update_camera)
+        register("streaming", "physics", self.update_streaming)
+        register("enemies", "ai", self.update_enemies)
+        register("level", "ai", self.update_level)
+        register("projectiles", "projectiles", self.update_projectiles)
+        register("hits", "collision", self.resolve_hits)
+        register("state", "cleanup", self.update_state)
+        register("level_render", "render", self.render_level)
+        register("proj_render", "render", self.render_projectiles)
+        register("player_render", "render", self.render_player)
+        register("hud", "render", self.render_hud)
+
     def update(self):
         """
-        @brief 更新游戏状态
+        @brief 更新游戏状态，推进一步（self.dt 帧）
         """
+        self.frame += 1
         if self.state == GameState.PLAYING:
-            print(f"[DEBUG] Game update frame, player rect: {self.player.rect}")
-            self.player.update()
-            self.level.check_collision(self.player)
-            self.level.update(self.player)
-            self.camera.update()
-            # 每一帧都遍历所有敌人并调用update
-            new_enemy_projectiles = []
-            for enemy in self.level.enemies:
-                print(f"[DEBUG] Calling update for enemy: {enemy}, rect: {enemy.rect}")
-                result = enemy.update(self.player)
-                if result is not None:
-                    new_enemy_projectiles.append(result)
-            for proj in new_enemy_projectiles:
-                self.enemy_projectiles.add(proj)
-            self.projectiles.update()
-            self.enemy_projectiles.update()
-            for proj in list(self.projectiles):
-                if proj.rect.right < 0 or proj.rect.left > self.level.width:
-                    self.projectiles.remove(proj)
-            for eproj in list(self.enemy_projectiles):
-                if eproj.rect.right < 0 or eproj.rect.left > self.level.width:
-                    self.enemy_projectiles.remove(eproj)
-            for enemy in self.level.enemies:
-                if self.player.rect.colliderect(enemy.rect):
-                    self.player.take_damage(enemy.damage)
-            for eproj in list(self.enemy_projectiles):
-                if getattr(eproj, 'just_spawned', False):
-                    continue
-                if self.player.rect.colliderect(eproj.rect):
-                    self.player.take_damage(getattr(eproj, 'damage', 10))
-                    self.enemy_projectiles.remove(eproj)
-            for proj in list(self.projectiles):
-                for enemy in self.level.enemies[:]:
-                    if enemy.rect.colliderect(proj.rect):
-                        dead = enemy.take_damage(proj.damage)
-                        self.projectiles.remove(proj)
-                        if dead:
-                            self.level.enemies.remove(enemy)
-                        break
-            if self.player.lives <= 0:
-                self.state = GameState.GAME_OVER
-            if self.current_level < self.max_levels:
-                if self.player.rect.x >= self.level.width - 100:
-                    self.state = GameState.LEVEL_COMPLETE
-            else:
-                if self.level.flag_rect and self.player.rect.colliderect(self.level.flag_rect):
-                    self.state = GameState.VICTORY
-            
-    def render(self):
+            tracing.debug("game", "Game update frame, player rect: %s", self.player.rect)
+            self.scheduler.run(SIMULATION_PHASES)
+
+    def snapshot_positions(self):
+        """
+        @brief 输入阶段：开启渲染插值时记录本步之前的位置
+        """
+        if self.interpolate:
+            self.store_previous_positions()
+
+    def update_player(self):
+        """
+        @brief 物理阶段：移动玩家
+        """
+        self.player.update(self.dt)
+
+    def update_terrain(self):
+        """
+        @brief 物理阶段：玩家与平台、收集品的碰撞
+        """
+        self.level.check_collision(self.player)
+
+    def update_camera(self):
+        """
+        @brief 物理阶段：摄像机跟随玩家
+        """
+        self.camera.update(self.dt)
+
+    def update_streaming(self):
+        """
+        @brief 物理阶段：加载摄像机附近的关卡分段，卸载远处的分段
+        """
+        self.level.stream(self.camera)
+
+    def update_enemies(self):
+        """
+        @brief AI 阶段：每个敌人每步只更新一次，收集新发射的子弹
+        """
+        for proj in self.level.update_enemies(self.player, self.spawn_enemy_projectile, self.dt):
+            self.enemy_projectiles.add(proj)
+
+    def update_level(self):
+        """
+        @brief AI 阶段：关卡逻辑（Boss 是否被击败）
+        """
+        self.level.update(self.player, self.dt)
+
+    def update_projectiles(self):
+        """
+        @brief 子弹阶段：移动子弹，回收离开关卡或撞上平台侧面的子弹
+        """
+        dt = self.dt
+        level = self.level
+        if self.projectile_store is not None:
+            self.projectile_store.update(dt)
+            self.projectile_store.cull(level.width)
+            self.projectile_store.block(level)
+        self.projectiles.update(dt)
+        self.enemy_projectiles.update(dt)
+        for proj in list(self.projectiles):
+            if proj.rect.right < 0 or proj.rect.left > level.width or level.wall_hit(proj.rect, proj.last_dx):
+                self.projectiles.remove(proj)
+                self.player_projectile_pool.release(proj)
+        for eproj in list(self.enemy_projectiles):
+            if eproj.rect.right < 0 or eproj.rect.left > level.width or level.wall_hit(eproj.rect, eproj.last_dx):
+                self.enemy_projectiles.remove(eproj)
+                self.enemy_projectile_pool.release(eproj)
+
+    def resolve_hits(self):
+        """
+        @brief 碰撞阶段：敌人、子弹与玩家之间的命中
+        """
+        # 单个矩形对列表的测试用 collidelistall（C 实现）最快
+        enemies = self.level.enemies
+        for index in self.player.rect.collidelistall([enemy.rect for enemy in enemies]):
+            self.player.take_damage(enemies[index].damage)
+        if self.projectile_store is not None:
+            self.projectile_store.hit_player(self.player)
+            self.projectile_store.hit_enemies(self.level)
+        enemy_projectiles = [eproj for eproj in self.enemy_projectiles
+                             if not getattr(eproj, 'just_spawned', False)]
+        for index in self.player.rect.collidelistall([eproj.hit_rect() for eproj in enemy_projectiles]):
+            eproj = enemy_projectiles[index]
+            self.player.take_damage(getattr(eproj, 'damage', 10))
+            self.enemy_projectiles.remove(eproj)
+            self.enemy_projectile_pool.release(eproj)
+        # 每颗子弹只打中它碰到的第一个还活着的敌人
+        spent = set()
+        dead_enemies = set()
+        for proj, enemy in self.projectile_enemy_pairs():
+            if proj in spent or enemy in dead_enemies:
+                continue
+            spent.add(proj)
+            dead = enemy.take_damage(proj.damage)
+            self.projectiles.remove(proj)
+            self.player_projectile_pool.release(proj)
+            if dead:
+                dead_enemies.add(enemy)
+                self.level.remove_enemy(enemy)
+
+    def update_state(self):
+        """
+        @brief 清理阶段：判断游戏结束、过关和胜利
+        """
+        if self.player.lives <= 0:
+            self.state = GameState.GAME_OVER
+        if self.current_level < self.max_levels:
+            if self.player.rect.x >= self.level.width - 100:
+                self.state = GameState.LEVEL_COMPLETE
+                # 玩家看过关画面时构建下一关
+                if self.preload_levels:
+                    self.preload_level(self.current_level + 1)
+        else:
+            if self.level.flag_rect and self.player.rect.colliderect(self.level.flag_rect):
+                self.state = GameState.VICTORY
+
+    def projectile_enemy_pairs(self):
+        """
+        @brief 找出玩家子弹与敌人所有重叠的组合
+        @return list (子弹, 敌人) 对，按子弹顺序、再按敌人在列表中的顺序排列
+        """
+        projectiles = list(self.projectiles)
+        enemies = self.level.enemies
+        if not projectiles or not enemies:
+            return []
+        # 数量少时逐颗子弹用 collidelistall 更快；子弹和敌人都多时重建空间哈希
+        if len(projectiles) >= BROADPHASE_MIN_PROJECTILES and len(enemies) >= BROADPHASE_MIN_ENEMIES:
+            self.enemy_hash.build(enemies)
+            return self.enemy_hash.query_pairs(projectiles, lambda proj: proj.hit_rect())
+        rects = [enemy.rect for enemy in enemies]
+        return [(proj, enemies[index]) for proj in projectiles
+                for index in proj.hit_rect().collidelistall(rects)]
+
+    def state_checksum(self):
+        """
+        @brief 计算玩家、敌人、子弹和收集品状态的校验和，用于比较回放结果
+        @return int CRC32 校验和
+        """
+        if self.level.enemy_engine:
+            self.level.enemy_engine.sync_views()
+        player = self.player
+        values = [self.frame, self.state.value, self.current_level,
+                  player.rect.x, player.rect.y, player.vel_y, player.health, player.lives,
+                  player.ammo, player.shoot_cooldown, player.invincible_timer]
+        for enemy in self.level.enemies:
+            values += (enemy.rect.x, enemy.rect.y, enemy.health,
+                       getattr(enemy, 'shoot_cooldown', 0), getattr(enemy, 'direction', 0))
+        for proj in self.projectiles:
+            values += (proj.rect.x, proj.rect.y)
+        if self.projectile_store is not None:
+            for position in self.projectile_store.positions(PLAYER):
+                values += position
+        for eproj in self.enemy_projectiles:
+            values += (eproj.rect.x, eproj.rect.y)
+        if self.projectile_store is not None:
+            for position in self.projectile_store.positions(ENEMY):
+                values += position
+        for collectible in self.level.collectibles:
+            values += (collectible.rect.x, collectible.rect.y)
+        return zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+
+    def snapshot(self):
+        """
+        @brief 把完整游戏状态保存为紧凑的二进制快照（见 snapshot.py），可用于存档、检查点和测试
+        @return bytes 快照
+        """
+        return snapshot.capture(self)
+
+    def restore_snapshot(self, data):
+        """
+        @brief 从 snapshot() 得到的快照恢复游戏状态
+        @param data bytes 快照
+        """
+        snapshot.restore(self, data)
+
+    def store_previous_positions(self):
+        """
+        @brief 记录所有运动实体在本步之前的位置，用于渲染插值
+        """
+        self.player.prev_pos = self.player.rect.topleft
+        for enemy in self.level.enemies:
+            enemy.prev_pos = enemy.rect.topleft
+        for proj in self.projectiles:
+            proj.prev_pos = proj.rect.topleft
+        for eproj in self.enemy_projectiles:
+            eproj.prev_pos = eproj.rect.topleft
+        if self.projectile_store is not None:
+            self.projectile_store.store_previous_positions()
+
+    def render(self, alpha=1.0):
         """
         @brief 渲染游戏画面
+        @param alpha float 在上一步与当前步之间的插值系数
         """
         # 清空屏幕
         self.screen.fill((0, 0, 0))
+        self.camera.set_interpolation(alpha)
         
         if self.state == GameState.START_MENU:
             self.render_start_menu()
@@ -175,26 +516,25 @@ class Game:
             self.render_level_complete()
         elif self.state == GameState.VICTORY:
             self.render_victory()
+        if self.profiler.overlay_visible:
+            self.profiler.render_overlay(self.screen)
             
     def render_start_menu(self):
         """
         @brief 渲染开始菜单
         """
         # 渲染游戏标题
-        title_font = pygame.font.Font(None, 72)
-        title_text = title_font.render("Pixel Rabbit Adventure", True, (255, 255, 255))
+        title_text = text_cache.render("Pixel Rabbit Adventure", 72, (255, 255, 255))
         title_rect = title_text.get_rect(center=(400, 150))
         self.screen.blit(title_text, title_rect)
         
         # 渲染开始按钮
         pygame.draw.rect(self.screen, (100, 200, 100), self.start_button)
-        button_font = pygame.font.Font(None, 36)
-        start_text = button_font.render("Start Game", True, (255, 255, 255))
+        start_text = text_cache.render("Start Game", 36, (255, 255, 255))
         start_rect = start_text.get_rect(center=self.start_button.center)
         self.screen.blit(start_text, start_rect)
         
         # 渲染操作说明
-        controls_font = pygame.font.Font(None, 24)
         controls = [
             "Controls:",
             "Left/Right or A/D: Move",
@@ -204,49 +544,62 @@ class Game:
         ]
         
         for i, text in enumerate(controls):
-            control_text = controls_font.render(text, True, (200, 200, 200))
+            control_text = text_cache.render(text, 24, (200, 200, 200))
             self.screen.blit(control_text, (50, 400 + i * 30))
             
     def render_game(self):
         """
-        @brief 渲染游戏画面
+        @brief 渲染游戏画面（运行渲染阶段的系统）
+        """
+        self.scheduler.run_phase("render")
+
+    def render_level(self):
+        """
+        @brief 渲染关卡（平台、敌人、收集品）
         """
         self.level.render(self.screen, self.camera)
-        for proj in self.projectiles:
-            proj.render(self.screen, self.camera)
-        for eproj in self.enemy_projectiles:
-            eproj.render(self.screen, self.camera)
-        self.player.render(self.screen, self.camera)
-        self.render_hud()
+
+    def render_projectiles(self):
+        """
+        @brief 渲染屏幕内的子弹
+        """
+        view = self.camera.view_rect(RENDER_MARGIN)
+        # 子弹每步都在移动，维护空间哈希的开销远大于一次 collidelistall 扫描
+        for group in (self.projectiles, self.enemy_projectiles):
+            projectiles = group.sprites()
+            for index in view.collidelistall([proj.rect for proj in projectiles]):
+                projectiles[index].render(self.screen, self.camera)
+        if self.projectile_store is not None:
+            self.projectile_store.render(self.screen, self.camera)
+
+    def render_player(self):
+        """
+        @brief 渲染玩家（在屏幕外时跳过）
+        """
+        if self.camera.visible(self.player.rect, RENDER_MARGIN):
+            self.player.render(self.screen, self.camera)
         
     def render_hud(self):
         """
         @brief 渲染HUD（抬头显示）
         """
-        font = pygame.font.Font(None, 36)
         # 移除分数显示
-        # score_text = font.render(f"Score: {self.player.score}", True, (255, 255, 255))
-        # self.screen.blit(score_text, (10, 10))
-        health_text = font.render(f"Health: {self.player.health}", True, (255, 255, 255))
-        self.screen.blit(health_text, (10, 50))
-        lives_text = font.render(f"Lives: {self.player.lives}", True, (255, 255, 255))
-        self.screen.blit(lives_text, (10, 90))
-        level_text = font.render(f"Level: {self.current_level}", True, (255, 255, 255))
-        self.screen.blit(level_text, (10, 130))
-        ammo_text = font.render(f"Ammo: {self.player.ammo}", True, (255, 255, 255))
-        self.screen.blit(ammo_text, (10, 170))
+        # 每个数值只在变化时重新渲染
+        labels = self.hud_labels
+        self.screen.blit(labels["health"].surface(self.player.health), (10, 50))
+        self.screen.blit(labels["lives"].surface(self.player.lives), (10, 90))
+        self.screen.blit(labels["level"].surface(self.current_level), (10, 130))
+        self.screen.blit(labels["ammo"].surface(self.player.ammo), (10, 170))
         
     def render_game_over(self):
         """
         @brief 渲染游戏结束画面
         """
-        font = pygame.font.Font(None, 72)
-        game_over_text = font.render("GAME OVER", True, (255, 0, 0))
+        game_over_text = text_cache.render("GAME OVER", 72, (255, 0, 0))
         game_over_rect = game_over_text.get_rect(center=(400, 200))
         self.screen.blit(game_over_text, game_over_rect)
         pygame.draw.rect(self.screen, (200, 100, 100), self.victory_button)
-        button_font = pygame.font.Font(None, 36)
-        restart_text = button_font.render("Back to Menu", True, (255, 255, 255))
+        restart_text = text_cache.render("Back to Menu", 36, (255, 255, 255))
         restart_rect = restart_text.get_rect(center=self.victory_button.center)
         self.screen.blit(restart_text, restart_rect)
         
@@ -254,26 +607,30 @@ class Game:
         """
         @brief 渲染关卡完成画面
         """
-        font = pygame.font.Font(None, 72)
-        complete_text = font.render("LEVEL COMPLETE!", True, (0, 255, 0))
+        complete_text = text_cache.render("LEVEL COMPLETE!", 72, (0, 255, 0))
         complete_rect = complete_text.get_rect(center=(400, 200))
         self.screen.blit(complete_text, complete_rect)
         pygame.draw.rect(self.screen, (100, 200, 100), self.next_level_button)
-        button_font = pygame.font.Font(None, 36)
-        if self.current_level < self.max_levels:
-            next_text = button_font.render("Next Level", True, (255, 255, 255))
+        progress = self.preload_progress()
+        if progress is not None:
+            # 下一关还在后台加载：按钮显示为进度条
+            pygame.draw.rect(self.screen, (60, 120, 60), self.next_level_button)
+            bar = self.next_level_button.copy()
+            bar.width = int(bar.width * progress)
+            pygame.draw.rect(self.screen, (100, 200, 100), bar)
+            next_text = text_cache.render(f"Loading {int(progress * 100)}%", 36, (255, 255, 255))
+        elif self.current_level < self.max_levels:
+            next_text = text_cache.render("Next Level", 36, (255, 255, 255))
         else:
-            next_text = button_font.render("Back to Menu", True, (255, 255, 255))
+            next_text = text_cache.render("Back to Menu", 36, (255, 255, 255))
         next_rect = next_text.get_rect(center=self.next_level_button.center)
         self.screen.blit(next_text, next_rect)
 
     def render_victory(self):
-        font = pygame.font.Font(None, 72)
-        victory_text = font.render("You Are Win", True, (0, 255, 0))
+        victory_text = text_cache.render("You Are Win", 72, (0, 255, 0))
         victory_rect = victory_text.get_rect(center=(400, 200))
         self.screen.blit(victory_text, victory_rect)
         pygame.draw.rect(self.screen, (100, 200, 100), self.victory_button)
-        button_font = pygame.font.Font(None, 36)
-        menu_text = button_font.render("Back to Menu", True, (255, 255, 255))
+        menu_text = text_cache.render("Back to Menu", 36, (255, 255, 255))
         menu_rect = menu_text.get_rect(center=self.victory_button.center)
         self.screen.blit(menu_text, menu_rect) 
\ No newline at end of file
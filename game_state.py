@@ -14,4 +14,5 @@ class GameState(Enum):
     START_MENU = 1    # Start menu
     PLAYING = 2       # In game
     GAME_OVER = 3     # Game over
-    LEVEL_COMPLETE = 4  # Level complete 
\ No newline at end of file
+    LEVEL_COMPLETE = 4  # Level complete
+    VICTORY = 5       # All levels cleared 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+@file idle.py
+@brief Presenting menu screens without a fixed frame rate
+@author Your Name
+@date 2024
+
+Outside gameplay nothing moves, so the windowed loop blocks on input instead of
+redrawing 60 times per second. After a redraw only the part of the screen that
+actually changed is sent to the display.
+"""
+
+import numpy as np
+import pygame
+
+# Longest time the idle loop blocks, keeps Ctrl+C and quitting responsive
+IDLE_TIMEOUT_MS = 500
+# Redraw interval of progress shown while something loads in the background
+LOADING_REFRESH_MS = 50
+
+# Window events after which the whole window must be presented again
+_EXPOSE_EVENTS = {pygame.VIDEOEXPOSE, getattr(pygame, "WINDOWEXPOSED", pygame.VIDEOEXPOSE)}
+
+def changed_rect(previous, current):
+    """
+    @brief Bounding rect of the pixels that differ between two frames
+    @param previous numpy.ndarray Mapped pixels of the earlier frame (surfarray.array2d layout)
+    @param current numpy.ndarray Mapped pixels of the later frame
+    @return pygame.Rect Changed area, or None if the frames are equal
+    """
+    diff = previous != current
+    columns = np.flatnonzero(diff.any(axis=1))
+    if not len(columns):
+        return None
+    rows = np.flatnonzero(diff.any(axis=0))
+    left, right = int(columns[0]), int(columns[-1]) + 1
+    top, bottom = int(rows[0]), int(rows[-1]) + 1
+    return pygame.Rect(left, top, right - left, bottom - top)
+
+class IdleScreen:
+    """
+    @brief Tracks what is on the display while a menu is shown
+    """
+    def __init__(self, screen):
+        """
+        @brief Initialize idle screen
+        @param screen pygame.Surface Display surface
+        """
+        self.screen = screen
+        self._shown = None  # Pixels on the display, None when unknown
+        self.needs_redraw = True
+        self.presented = 0  # Redraws that reached the display
+        self.skipped = 0  # Redraws that changed nothing
+
+    def invalidate(self):
+        """
+        @brief Redraw and present the whole screen next time (entering a menu, window exposed)
+        """
+        self._shown = None
+        self.needs_redraw = True
+
+    def handle_event(self, event):
+        """
+        @brief Note an event seen while idle
+        @param event pygame.event.Event Event
+        """
+        if event.type in _EXPOSE_EVENTS:
+            self.invalidate()
+        elif event.type != pygame.MOUSEMOTION:
+            # Menus have no hover effects, anything else may change what they show
+            self.needs_redraw = True
+
+    def present(self):
+        """
+        @brief Send the redrawn screen to the display, only the changed region if possible
+        """
+        self.needs_redraw = False
+        pixels = pygame.surfarray.array2d(self.screen)
+        if self._shown is None:
+            pygame.display.flip()
+            self.presented += 1
+        else:
+            rect = changed_rect(self._shown, pixels)
+            if rect is None:
+                self.skipped += 1
+            else:
+                pygame.display.update(rect)
+                self.presented += 1
+        self._shown = pixels
+
+    def wait(self, timeout=IDLE_TIMEOUT_MS):
+        """
+        @brief Block until input arrives or the timeout passes
+        @param timeout int Longest wait in milliseconds
+        @return list Pending events, empty after a timeout
+        """
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
@@ -5,21 +5,49 @@
 @date 2024
 """
 
+import os
 import pygame
 import random
+import numpy as np
+import tracing
 from enemy import Grunt, Gunner, Boss
 from collectible import Collectible
+from activity import ActivityPolicy
+from chunk_layer import ChunkedLayer, parallax_layers
+from collision_grid import CollisionGrid
+from level_format import ENEMY_TYPES, level_path, load_level_data
+from level_generator import generate_layout
+from enemy_engine import EnemyEngine
+from spatial_hash import SpatialHash
+from streaming import SegmentStreamer
+from projectile import spawn_enemy_projectile
+
+# Extra pixels around the viewport when culling, covers drawings larger than their rect
+# (the boss reaches 40 px past its rect) and render interpolation
+RENDER_MARGIN = 100
 
 class Level:
     """
     @brief Level class for managing game levels
     """
-    def __init__(self, level_number):
+    def __init__(self, level_number, seed=None, enemy_engine=False, enemy_activity=False, path=None,
+                 generate=None, streaming=False):
         """
         @brief Initialize level
         @param level_number int Level number
+        @param seed int Seed for the level's random generator (None for a random seed)
+        @param enemy_engine bool Simulate enemies with the vectorized EnemyEngine
+        @param enemy_activity bool Update distant enemies less often (see activity.py)
+        @param path str Level source file (None for levels/level_<number>.json)
+        @param generate dict Build a procedural layout from the level's seed instead, with these
+                             level_generator.generate_layout arguments (e.g. {"width": 100000})
+        @param streaming bool or SegmentStreamer Keep only the enemies and collectibles near the camera
+                         loaded (True for the default window, see streaming.py)
         """
         self.level_number = level_number
+        self.seed = seed
+        # All randomness in a level must come from this generator so replays stay deterministic
+        self.rng = random.Random(seed)
         self.width = 3000  # Total level width
         self.height = 600  # Level height
         self.platforms = []
@@ -27,165 +55,140 @@ class Level:
         self.collectibles = []
         self.spawn_point = (100, 100)  # Player spawn point
         self.flag_rect = None  # End flag
+        # Streamed levels create their enemies and collectibles segment by segment in stream()
+        self.streamer = None
+        if streaming:
+            self.streamer = streaming if isinstance(streaming, SegmentStreamer) else SegmentStreamer()
         
-        # Generate different level layouts based on level number
-        self.generate_level()
+        # Load the layout of this level number (or of the given file), or generate one
+        if generate is not None:
+            self.load_data(generate_layout(self.rng, **generate))
+        else:
+            self.generate_level(path)
+        self.activity = ActivityPolicy() if enemy_activity else None
+        self.step_count = 0  # Enemy steps run, drives the reduced-rate schedule
+        self.assign_activity_slots()
+        self.enemy_engine = EnemyEngine(self.enemies) if enemy_engine else None
+        # Collectibles never move, so they are hashed once and removed when collected
+        self.collectible_hash = SpatialHash()
+        self._hashed_collectibles = None  # The list collectible_hash was built from
+        self.sync_collectible_hash()
+        # Platforms and the flag never move, they are baked into chunks the first time they show
+        self.static_layer = self.build_static_layer()
+        self.background_layers = parallax_layers(seed, self.height)
+        if self.streamer is not None:
+            self.streamer.update(self.spawn_point[0], self.spawn_point[0])
         
-    def generate_level(self):
+    def generate_level(self, path=None):
         """
-        @brief Generate level layout
+        @brief Load the level layout from its source file (see level_format.py)
+        @param path str Level source (None for levels/level_<number>.json)
         """
-        # Generate ground
+        path = path or level_path(self.level_number)
+        if os.path.exists(path):
+            self.load_data(load_level_data(path))
+            return
+        # No source for this level number: an empty field with just the ground, nothing to stream
+        self.streamer = None
         ground_height = 500
         ground = pygame.Rect(0, ground_height, self.width, 100)
         self.platforms.append(ground)
-        
-        # Player spawn point on ground
+        self.collision = CollisionGrid(self.platforms, self.width, self.height)
         self.spawn_point = (100, ground_height - 60)
-        
-        # Generate different platform layouts based on level number
-        if self.level_number == 1:
-            self.generate_level_1()
-        elif self.level_number == 2:
-            self.generate_level_2()
-        elif self.level_number == 3:
-            self.generate_level_3()
-            
-    def generate_level_1(self):
-        """
-        @brief Generate level 1 layout
-        """
-        # Add platforms
-        platforms = [
-            pygame.Rect(300, 400, 200, 20),
-            pygame.Rect(600, 350, 200, 20),
-            pygame.Rect(900, 300, 200, 20),
-            pygame.Rect(1200, 350, 200, 20),
-            pygame.Rect(1500, 400, 200, 20),
-            pygame.Rect(1800, 350, 200, 20),
-            pygame.Rect(2100, 300, 200, 20),
-            pygame.Rect(2400, 350, 200, 20),
-            pygame.Rect(2700, 400, 200, 20)
-        ]
-        self.platforms.extend(platforms)
-        
-        # 每个平台只生成一个敌人，且platform_rect=platform
-        enemies = []
-        for i, platform in enumerate(platforms):
-            enemy_x = platform.x + platform.width // 2
-            enemy_y = platform.y - 60
-            if i % 2 == 0:
-                enemies.append(Grunt(enemy_x, enemy_y, platform_rect=platform))
-            else:
-                enemies.append(Gunner(enemy_x, enemy_y, platform_rect=platform))
-            print(f"[DEBUG] Platform {i}: {platform}, Enemy: {enemies[-1].__class__.__name__}, Enemy rect: {enemies[-1].rect}")
-        self.enemies.extend(enemies)
-        
-        # 玩家出生点设置在第一个平台表面
-        self.spawn_point = (platforms[0].x + 10, platforms[0].y - 60)
-        print(f"[DEBUG] Player spawn point: {self.spawn_point}, Platform 0: {platforms[0]}")
-        
-        # Add collectibles above platforms
-        collectibles = []
-        for platform in platforms:
-            collectible_x = platform.x + platform.width // 2
-            collectible_y = platform.y - 80
-            collectibles.append(Collectible(collectible_x, collectible_y))
-        self.collectibles.extend(collectibles)
-        
-        # Add end flag at the right edge of the last platform
-        last_plat = platforms[-1]
-        flag_width = 20
-        flag_height = 60
-        self.flag_rect = pygame.Rect(last_plat.right - flag_width, last_plat.y - flag_height, flag_width, flag_height)
-        
-    def generate_level_2(self):
-        """
-        @brief Generate level 2 layout
-        """
-        # Add platforms
-        platforms = [
-            pygame.Rect(350, 400, 180, 20),
-            pygame.Rect(650, 350, 180, 20),
-            pygame.Rect(950, 300, 180, 20),
-            pygame.Rect(1250, 250, 180, 20),
-            pygame.Rect(1550, 300, 180, 20),
-            pygame.Rect(1850, 350, 180, 20),
-            pygame.Rect(2150, 400, 180, 20),
-            pygame.Rect(2450, 350, 180, 20),
-            pygame.Rect(2750, 300, 180, 20)
-        ]
-        self.platforms.extend(platforms)
-        
-        # Add enemies on platform surfaces
-        enemies = []
-        for platform in platforms:
-            enemy_x = platform.x + platform.width // 2
-            enemy_y = platform.y - 60
-            enemies.append(Gunner(enemy_x, enemy_y, platform_rect=platform))
-        self.enemies.extend(enemies)
-        
-        # Add collectibles above platforms
-        collectibles = []
-        for platform in platforms:
-            collectible_x = platform.x + platform.width // 2
-            collectible_y = platform.y - 80  # Place collectible above platform
-            collectibles.append(Collectible(collectible_x, collectible_y))
-        self.collectibles.extend(collectibles)
-        
-        # Add end flag at the right edge of the last platform
-        last_plat = platforms[-1]
-        flag_width = 20
-        flag_height = 60
-        self.flag_rect = pygame.Rect(last_plat.right - flag_width, last_plat.y - flag_height, flag_width, flag_height)
-        
-    def generate_level_3(self):
-        """
-        @brief Generate level 3 layout
-        """
-        # Add platforms
-        platforms = [
-            pygame.Rect(350, 400, 120, 20),
-            pygame.Rect(550, 350, 120, 20),
-            pygame.Rect(750, 300, 120, 20),
-            pygame.Rect(950, 250, 120, 20),
-            pygame.Rect(1150, 200, 120, 20),
-            pygame.Rect(1350, 250, 120, 20),
-            pygame.Rect(1550, 300, 120, 20),
-            pygame.Rect(1750, 350, 120, 20),
-            pygame.Rect(1950, 300, 120, 20),
-            pygame.Rect(2150, 250, 120, 20),
-            pygame.Rect(2350, 200, 120, 20),
-            pygame.Rect(2550, 250, 120, 20),
-            pygame.Rect(2750, 300, 200, 20)
-        ]
-        self.platforms.extend(platforms)
-        
-        # Add enemies on platform surfaces
-        enemies = []
-        for idx, platform in enumerate(platforms):
-            enemy_x = platform.x + platform.width // 2
-            enemy_y = platform.y - 60
-            if platform == platforms[-1]:
-                enemies.append(Boss(enemy_x, enemy_y, platform_rect=platform))
+
+    def load_data(self, data):
+        """
+        @brief Build platforms, enemies, collectibles, spawn point and flag from level data
+        @param data LevelData Compiled level
+        """
+        self.width = data.width
+        self.height = data.height
+        self.spawn_point = data.spawn
+        self.platforms = [pygame.Rect(x, y, w, h) for x, y, w, h in data.platforms.tolist()]
+        # Compiled before the enemies spawn, their patrols are fitted to the ground with it
+        self.collision = CollisionGrid(self.platforms, self.width, self.height)
+        if self.streamer is not None:
+            self.streamer.attach(self, data)
+        else:
+            self.enemies = [self.spawn_enemy(*row) for row in data.enemies.tolist()]
+            self.collectibles = [self.spawn_collectible(*row) for row in data.collectibles.tolist()]
+        self.flag_rect = pygame.Rect(data.flag) if data.flag else None
+        tracing.debug("level", "Loaded level %d: %d platforms, %d enemies, spawn %s", self.level_number,
+                      len(self.platforms), len(data.enemies), self.spawn_point)
+
+    def spawn_enemy(self, kind, x, y, platform, left, right):
+        """
+        @brief Create an enemy from a level data row
+        @param kind int Index into level_format.ENEMY_TYPES
+        @param x int X coordinate
+        @param y int Y coordinate
+        @param platform int Index of the platform it stands on (-1 for none)
+        @param left int Patrol left boundary
+        @param right int Patrol right boundary
+        @return Enemy Enemy object
+        """
+        platform_rect = self.platforms[platform] if platform >= 0 else None
+        if ENEMY_TYPES[kind] == "boss":
+            return Boss(x, y, platform_rect=platform_rect)
+        if ENEMY_TYPES[kind] == "gunner":
+            enemy = Gunner(x, y, left, right, platform_rect=platform_rect)
+        else:
+            enemy = Grunt(x, y, left, right, platform_rect=platform_rect)
+        self.fit_patrol(enemy)
+        return enemy
+
+    def fit_patrol(self, enemy):
+        """
+        @brief Ground probe: shrink a walking enemy's patrol so it never walks off the ground it stands on
+        @param enemy Enemy Enemy with patrol_left and patrol_right (others are left alone)
+
+        An enemy is supported while the ground reaches its center line, so at most half of it
+        overhangs an edge. A patrol whose end is supported is kept, otherwise the probe walks
+        from the enemy toward that end half a body width at a time (gaps narrower than that
+        are walked over) to find the edge. Enemies placed in the air keep their patrol.
+        """
+        if not hasattr(enemy, "patrol_left"):
+            return
+        rect = enemy.rect
+        half = rect.width // 2
+        foot = rect.bottom
+        ground_below = self.collision.ground_below
+
+        def supported(x, sign):
+            # The center pixel on the side the enemy walks away from
+            return ground_below(x + half - (sign > 0), foot, 0) is not None
+
+        if not supported(rect.x, -1) and not supported(rect.x, 1):
+            return
+        for sign in (-1, 1):
+            bound = int(enemy.patrol_left if sign < 0 else enemy.patrol_right)
+            if (bound - rect.x) * sign <= 0 or supported(bound, sign):
+                continue
+            x = rect.x
+            for step in (max(half, 1), 1):
+                while (x + sign * step - bound) * sign <= 0 and supported(x + sign * step, sign):
+                    x += sign * step
+            if sign < 0:
+                enemy.patrol_left = x
             else:
-                enemies.append(Gunner(enemy_x, enemy_y, platform_rect=platform))
-        self.enemies.extend(enemies)
-        
-        # Add collectibles above platforms
-        collectibles = []
-        for platform in platforms:
-            collectible_x = platform.x + platform.width // 2
-            collectible_y = platform.y - 80  # Place collectible above platform
-            collectibles.append(Collectible(collectible_x, collectible_y))
-        self.collectibles.extend(collectibles)
-        
-        # Add end flag at the right edge of the last platform
-        last_plat = platforms[-1]
-        flag_width = 20
-        flag_height = 60
-        self.flag_rect = pygame.Rect(last_plat.right - flag_width, last_plat.y - flag_height, flag_width, flag_height)
-        
+                enemy.patrol_right = x
+
+    def spawn_collectible(self, x, y, width, height):
+        """
+        @brief Create a collectible from a level data row
+        @return Collectible Collectible object
+        """
+        return Collectible(x, y, width, height)
+
+    def stream(self, camera):
+        """
+        @brief Load the entity segments around the camera and unload the far ones (streamed levels only)
+        @param camera Camera Camera object
+        """
+        if self.streamer is not None:
+            view = camera.viewport
+            self.streamer.update(view.left, view.right)
+
     def check_collision(self, player):
         """
         @brief Check collision between player and level elements
@@ -193,33 +196,206 @@ class Level:
         """
         # Reset on_ground every frame
         player.on_ground = False
-        # Check platform collisions
-        for platform in self.platforms:
-            if player.rect.colliderect(platform):
-                if player.vel_y > 0:  # Falling
-                    player.rect.bottom = platform.top
-                    player.vel_y = 0
-                    player.jumping = False
-                    player.on_ground = True  # Set on_ground when landing
-                elif player.vel_y < 0:  # Jumping
-                    player.rect.top = platform.bottom
-                    player.vel_y = 0
+        # Check platform collisions, only platforms sharing a grid column with the player can touch it
+        platforms = self.platforms
+        rect = player.rect
+        hits = [platform for platform in (platforms[index] for index in
+                                          self.collision.candidates(rect.left, rect.right))
+                if rect.colliderect(platform) or self._crossed(player, platform)]
+        # A fast step can pass several platforms, resolve against the first one met on the way
+        if hits and player.vel_y > 0:  # Falling
+            player.rect.bottom = min(platform.top for platform in hits)
+            player.vel_y = 0
+            player.jumping = False
+            player.on_ground = True  # Set on_ground when landing
+        elif hits and player.vel_y < 0:  # Jumping
+            player.rect.top = max(platform.bottom for platform in hits)
+            player.vel_y = 0
         # Check collectible collisions
-        for collectible in self.collectibles[:]:
-            if player.rect.colliderect(collectible.rect):
-                collectible.collect(player)
-                self.collectibles.remove(collectible)
+        self.sync_collectible_hash()
+        for collectible in self.collectible_hash.query_rect(player.rect):
+            collectible.collect(player)
+            self.collectibles.remove(collectible)
+            self.collectible_hash.remove(collectible)
                 
-    def update(self, player):
+    def sync_collectible_hash(self):
+        """
+        @brief Rebuild the collectible index if the collectible list was replaced or resized from outside
         """
-        @brief Update level state
+        collectibles = self.collectibles
+        if collectibles is not self._hashed_collectibles or len(self.collectible_hash) != len(collectibles):
+            self.collectible_hash.build(collectibles)
+            self._hashed_collectibles = collectibles
+
+    @staticmethod
+    def _crossed(player, platform):
+        """
+        @brief Swept test: whether the player passed through a platform during its last update
         @param player Player Player object
-        @return bool Whether boss is defeated
+        @param platform pygame.Rect Platform
+        @return bool True if the move crossed the platform's top while falling or its bottom while jumping
         """
-        # Update enemies
+        rect = player.rect
+        if rect.right <= platform.left or rect.left >= platform.right:
+            return False
+        if player.vel_y > 0:
+            return player.prev_bottom <= platform.top < rect.bottom
+        if player.vel_y < 0:
+            return player.prev_top >= platform.bottom > rect.top
+        return False
+
+    def set_platforms(self, platforms):
+        """
+        @brief Replace the level's platforms and recompile the collision grid
+        @param platforms list pygame.Rect platforms
+        """
+        self.platforms = list(platforms)
+        self.collision = CollisionGrid(self.platforms, self.width, self.height)
+        self.static_layer = self.build_static_layer()
+
+    def set_flag(self, flag_rect):
+        """
+        @brief Move or remove the end flag
+        @param flag_rect pygame.Rect Flagpole rect (None for no flag)
+        """
+        self.flag_rect = flag_rect
+        self.static_layer.clear()
+
+    def build_static_layer(self):
+        """
+        @brief Chunked layer holding the platforms and the flag
+        @return ChunkedLayer Layer drawn by draw_static
+        """
+        return ChunkedLayer(self.draw_static, self.height, width=self.width)
+
+    def draw_static(self, surface, left):
+        """
+        @brief Draw the platforms and the flag of one chunk
+        @param surface pygame.Surface Chunk surface
+        @param left int World x coordinate of the chunk's left edge
+        """
+        right = left + surface.get_width()
+        platforms = self.platforms
+        for index in self.collision.candidates(left, right):
+            pygame.draw.rect(surface, (100, 100, 100), platforms[index].move(-left, 0))
+        # The flag reaches 20 px right of its pole
+        if self.flag_rect and self.flag_rect.left < right and self.flag_rect.right + 20 > left:
+            flag = self.flag_rect.move(-left, 0)
+            # Draw flagpole (white)
+            pygame.draw.rect(surface, (255,255,255), flag)
+            # Draw flag (red triangle)
+            pygame.draw.polygon(surface, (255,0,0), [
+                (flag.right, flag.top), (flag.right+20, flag.top+20), (flag.right, flag.top+40)
+            ])
+
+    def set_enemies(self, enemies):
+        """
+        @brief Replace the level's enemies
+        @param enemies list Enemy objects
+        """
+        self.enemies = list(enemies)
         for enemy in self.enemies:
-            enemy.update(player)
-            
+            self.fit_patrol(enemy)
+        self.assign_activity_slots()
+        if self.streamer is not None:
+            # The script's list replaces the streamed enemies for good
+            self.streamer.drop_enemies()
+        if self.enemy_engine:
+            self.enemy_engine.rebuild(self.enemies)
+
+    def set_collectibles(self, collectibles):
+        """
+        @brief Replace the level's collectibles and re-index them
+        @param collectibles list Collectible objects
+        """
+        self.collectibles = list(collectibles)
+        self.sync_collectible_hash()
+
+    def assign_activity_slots(self):
+        """
+        @brief Number the enemies in list order, the numbers stay fixed while enemies die
+        """
+        for slot, enemy in enumerate(self.enemies):
+            enemy.activity_slot = slot
+
+    def wall_hit(self, rect, dx):
+        """
+        @brief Swept projectile test: whether a horizontal move drove a rect's front into a platform side
+        @param rect pygame.Rect Projectile rect after the move
+        @param dx int Horizontal distance moved
+        @return bool True if the front crossed a platform side along the rect's center line
+
+        A projectile whose center line already ran inside a platform (boss shots skim their
+        arena) is not stopped by it.
+        """
+        if dx == 0:
+            return False
+        front = rect.right - 1 if dx > 0 else rect.left
+        distance = self.collision.raycast_h(front - dx, rect.centery, 1 if dx > 0 else -1, abs(dx))
+        return bool(distance)  # None: nothing in the way, 0: started inside a platform
+
+    def wall_hits(self, x, y, width, height, dx):
+        """
+        @brief Batched wall_hit for projectiles stored as arrays
+        @param x numpy.ndarray Left coordinates after the move
+        @param y numpy.ndarray Top coordinates after the move
+        @param width numpy.ndarray Widths
+        @param height numpy.ndarray Heights
+        @param dx numpy.ndarray Horizontal distances moved
+        @return numpy.ndarray bool per projectile, same result as wall_hit
+        """
+        front = np.where(dx > 0, x + width - 1, x)
+        distance = self.collision.raycast_h_many(front - dx, y + height // 2, np.where(dx > 0, 1, -1), np.abs(dx))
+        return (distance > 0) & (dx != 0)
+
+    def remove_enemy(self, enemy):
+        """
+        @brief Remove an enemy (e.g. when it dies)
+        @param enemy Enemy Enemy object
+        """
+        self.enemies.remove(enemy)
+        if self.enemy_engine:
+            self.enemy_engine.remove(enemy)
+
+    def update_enemies(self, player, spawn=spawn_enemy_projectile, dt=1):
+        """
+        @brief Run one step of enemy logic
+        @param player Player Player object
+        @param spawn callable Creates bullets, see projectile.spawn_enemy_projectile
+        @param dt int Simulated time in 1/60 s frames
+        @return list Newly fired EnemyProjectile objects
+        """
+        self.step_count += 1
+        activity = self.activity
+        if self.enemy_engine:
+            engine = self.enemy_engine
+            if activity is None or not engine.enemies:
+                return engine.update(player, spawn=spawn, dt=dt)
+            distances = np.abs(engine.x + engine.width // 2 - player.rect.centerx)
+            dts = activity.step_dts(distances, engine.activity_slot, self.step_count, dt)
+            return engine.update(player, mask=dts > 0, spawn=spawn, dt=dts)
+        new_projectiles = []
+        for enemy in self.enemies:
+            if activity is not None:
+                enemy_dt = activity.step_dt(abs(enemy.rect.centerx - player.rect.centerx),
+                                            enemy.activity_slot, self.step_count, dt)
+                if not enemy_dt:
+                    continue
+            else:
+                enemy_dt = dt
+            tracing.debug("enemy", "Calling update for enemy: %s, rect: %s", enemy, enemy.rect)
+            result = enemy.update(player, spawn, enemy_dt)
+            if result is not None:
+                new_projectiles.append(result)
+        return new_projectiles
+
+    def update(self, player, dt=1):
+        """
+        @brief Update level state (enemies are updated separately by update_enemies)
+        @param player Player Player object
+        @param dt int Simulated time in 1/60 s frames
+        @return bool Whether boss is defeated
+        """
         # Check if boss is defeated
         if self.level_number == 3:
             for enemy in self.enemies:
@@ -233,21 +409,18 @@ class Level:
         @param screen pygame.Surface Game window surface
         @param camera Camera Camera object
         """
-        # Render platforms
-        for platform in self.platforms:
-            pygame.draw.rect(screen, (100, 100, 100), camera.apply(platform))
-        # Render enemies
-        for enemy in self.enemies:
-            enemy.render(screen, camera)
+        # Parallax backgrounds, farthest first, then the baked platforms and flag
+        for layer in self.background_layers:
+            layer.render(screen, camera)
+        self.static_layer.render(screen, camera)
+        # Only draw what overlaps the viewport, widened for drawings larger than their rect
+        view = camera.view_rect(RENDER_MARGIN)
+        # Render enemies. They move every step, and a SpatialHash kept current costs far more than
+        # this C-level pass; even querying an up-to-date one is slower with many enemies on screen
+        enemies = self.enemies
+        for index in view.collidelistall([enemy.rect for enemy in enemies]):
+            enemies[index].render(screen, camera)
         # Render collectibles
-        for collectible in self.collectibles:
+        self.sync_collectible_hash()
+        for collectible in self.collectible_hash.query_rect(view):
             collectible.render(screen, camera)
-        # Render end flag (flagpole + flag)
-        if self.flag_rect:
-            flag = camera.apply(self.flag_rect)
-            # Draw flagpole (white)
-            pygame.draw.rect(screen, (255,255,255), flag)
-            # Draw flag (red triangle)
-            pygame.draw.polygon(screen, (255,0,0), [
-                (flag.right, flag.top), (flag.right+20, flag.top+20), (flag.right, flag.top+40)
-            ]) 
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+@file level_format.py
+@brief Declarative JSON level files and their compiled binary cache
+@author Your Name
+@date 2024
+
+A level source is a JSON file with the level size, the player spawn point,
+platforms, enemy spawns, collectibles and the end flag. Sources are compiled into
+a binary file of int32 arrays named after the SHA-256 of the source, so loading a
+level is one file read plus a few bulk array reads, and editing a source file
+automatically invalidates its cache.
+
+Source format:
+    {
+        "width": 3000, "height": 600,
+        "spawn": [x, y],
+        "platforms": [[x, y, width, height], ...],
+        "enemies": [{"type": "grunt" | "gunner" | "boss", "x": x, "y": y,
+                     "platform": platform index or null, "patrol": [left, right]}, ...],
+        "collectibles": [[x, y] or [x, y, width, height], ...],
+        "flag": [x, y, width, height] or null
+    }
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+from collections import namedtuple
+import numpy as np
+
+# Directory holding the shipped level sources, level_<number>.json
+LEVEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")
+# Compiled files are written next to the sources
+CACHE_DIR = os.path.join(LEVEL_DIR, "cache")
+
+MAGIC = b"RLVL"
+FORMAT_VERSION = 1
+# magic, version, source SHA-256, width, height, spawn x/y, has flag, flag x/y/w/h,
+# platform, enemy and collectible counts
+_HEADER = struct.Struct("<4sH32s4i5i3i")
+
+ENEMY_TYPES = ("grunt", "gunner", "boss")
+# Enemy row: type index, x, y, platform index (-1 for none), patrol left, patrol right
+ENEMY_COLUMNS = 6
+# Patrol bounds are optional in the source, these are the enemy classes' defaults around x
+_DEFAULT_PATROL = {"grunt": 50, "gunner": 80}
+
+LevelData = namedtuple("LevelData", "width height spawn flag platforms enemies collectibles")
+LevelData.__doc__ = """
+@brief Compiled level: platforms (N, 4), enemies (M, 6) and collectibles (K, 4) int32 arrays,
+       spawn (x, y) and flag (x, y, w, h) or None
+"""
+
+def level_path(level_number):
+    """
+    @brief Source file of a shipped level
+    @param level_number int Level number
+    @return str Path (may not exist)
+    """
+    return os.path.join(LEVEL_DIR, f"level_{level_number}.json")
+
+def _rows(values, width, what):
+    if not values:
+        return np.zeros((0, width), dtype=np.int32)
+    try:
+        rows = np.asarray(values, dtype=np.int32)
+    except ValueError:
+        rows = None
+    if rows is None or rows.ndim != 2 or rows.shape[1] != width:
+        raise ValueError(f"every {what} needs {width} numbers")
+    return rows
+
+def parse_source(source):
+    """
+    @brief Validate a level source and convert it to arrays
+    @param source dict Decoded JSON source
+    @return LevelData Level data
+    @throws ValueError If the source is malformed
+    """
+    try:
+        platforms = _rows(source["platforms"], 4, "platform")
+        enemies = []
+        for spawn in source.get("enemies", []):
+            kind = spawn["type"]
+            if kind not in ENEMY_TYPES:
+                raise ValueError(f"unknown enemy type {kind!r}, expected one of {ENEMY_TYPES}")
+            platform = spawn.get("platform")
+            if platform is not None and not 0 <= platform < len(platforms):
+                raise ValueError(f"enemy platform index {platform} out of range")
+            x, y = spawn["x"], spawn["y"]
+            reach = _DEFAULT_PATROL.get(kind, 0)
+            left, right = spawn.get("patrol", (x - reach, x + reach))
+            enemies.append([ENEMY_TYPES.index(kind), x, y, -1 if platform is None else platform, left, right])
+        collectibles = []
+        for item in source.get("collectibles", []):
+            if len(item) == 2:
+                item = list(item) + [20, 20]  # Collectible's default size
+            collectibles.append(list(item))
+        flag = source.get("flag")
+        return LevelData(
+            width=int(source.get("width", 3000)),
+            height=int(source.get("height", 600)),
+            spawn=tuple(int(v) for v in source["spawn"]),
+            flag=tuple(int(v) for v in flag) if flag else None,
+            platforms=platforms,
+            enemies=_rows(enemies, ENEMY_COLUMNS, "enemy"),
+            collectibles=_rows(collectibles, 4, "collectible"),
+        )
+    except (KeyError, TypeError) as error:
+        raise ValueError(f"malformed level source: {error!r}") from error
+
+def compile_level(data, digest):
+    """
+    @brief Serialize level data
+    @param data LevelData Level data
+    @param digest bytes SHA-256 of the source the data came from
+    @return bytes Compiled level
+    """
+    flag = data.flag or (0, 0, 0, 0)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, digest, data.width, data.height, *data.spawn,
+                          1 if data.flag else 0, *flag,
+                          len(data.platforms), len(data.enemies), len(data.collectibles))
+    arrays = (data.platforms, data.enemies, data.collectibles)
+    return header + b"".join(np.ascontiguousarray(a, dtype="<i4").tobytes() for a in arrays)
+
+def read_compiled(blob, digest=None):
+    """
+    @brief Deserialize a compiled level
+    @param blob bytes Compiled level
+    @param digest bytes Expected source SHA-256 (None to accept any)
+    @return LevelData Level data, or None if the blob is stale or not a compiled level
+    """
+    if len(blob) < _HEADER.size:
+        return None
+    fields = _HEADER.unpack_from(blob)
+    magic, version, stored_digest = fields[:3]
+    if magic != MAGIC or version != FORMAT_VERSION or (digest is not None and stored_digest != digest):
+        return None
+    width, height, spawn_x, spawn_y, has_flag, fx, fy, fw, fh, n_platforms, n_enemies, n_collectibles = fields[3:]
+    counts = (n_platforms * 4, n_enemies * ENEMY_COLUMNS, n_collectibles * 4)
+    if len(blob) != _HEADER.size + 4 * sum(counts):
+        return None
+    values = np.frombuffer(blob, dtype="<i4", offset=_HEADER.size)
+    platforms = values[:counts[0]].reshape(-1, 4)
+    enemies = values[counts[0]:counts[0] + counts[1]].reshape(-1, ENEMY_COLUMNS)
+    collectibles = values[counts[0] + counts[1]:].reshape(-1, 4)
+    return LevelData(width, height, (spawn_x, spawn_y), (fx, fy, fw, fh) if has_flag else None,
+                     platforms, enemies, collectibles)
+
+def cache_path(path, digest, cache_dir=None):
+    """
+    @brief Compiled file for a source with a given content hash
+    @param path str Source path
+    @param digest bytes Source SHA-256
+    @param cache_dir str Cache directory (None for CACHE_DIR)
+    @return str Path of the compiled file
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir or CACHE_DIR, f"{name}-{digest.hex()[:16]}.bin")
+
+def load_level_data(path, cache_dir=None):
+    """
+    @brief Load a level source through its compiled cache, compiling it when missing or stale
+    @param path str Source path
+    @param cache_dir str Cache directory (None for CACHE_DIR)
+    @return LevelData Level data
+    @throws ValueError If the source is malformed
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).digest()
+    compiled = cache_path(path, digest, cache_dir)
+    try:
+        with open(compiled, "rb") as f:
+            data = read_compiled(f.read(), digest)
+        if data is not None:
+            return data
+    except OSError:
+        pass
+    data = parse_source(json.loads(raw))
+    try:
+        os.makedirs(os.path.dirname(compiled), exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a truncated cache entry
+        temporary = f"{compiled}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(compile_level(data, digest))
+        os.replace(temporary, compiled)
+    except OSError:
+        pass  # Read-only install, the source is parsed every time
+    return data
+
+def main(argv=None):
+    """
+    @brief Compile level sources and report load times
+    @param argv list Source paths (default: every shipped level)
+    @return int Exit code
+    """
+    paths = argv if argv else sorted(os.path.join(LEVEL_DIR, name) for name in os.listdir(LEVEL_DIR)
+                                     if name.endswith(".json"))
+    for path in paths:
+        load_level_data(path)
+        start = time.perf_counter()
+        data = load_level_data(path)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        print(f"{path}: {len(data.platforms)} platforms, {len(data.enemies)} enemies, "
+              f"{len(data.collectibles)} collectibles, cached load {elapsed:.3f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,95 @@
+"""
+@file level_generator.py
+@brief Seeded procedural layouts of any width, for stress worlds and the endless mode
+@author Your Name
+@date 2024
+
+Platforms are laid out left to right in chains starting at the ground. Every
+platform can be reached with one jump from the ground or from the platform
+before it, using the player's jump arc (about 140 px high, 180 px far at 5 px per
+frame). All randomness comes from one random.Random, so the same seed always
+produces the same layout.
+"""
+
+import random
+import numpy as np
+from level_format import ENEMY_TYPES, LevelData
+
+GROUND_TOP = 500
+# Jump limits kept well inside the player's arc (jump_power -15, gravity 0.8, speed 5)
+MAX_RISE = 100
+MAX_GAP = 120
+# Highest platform top, keeps platforms on screen
+MIN_TOP = 150
+# Lowest platform top: the player (60 px tall) must still walk under it on the ground
+MAX_TOP = GROUND_TOP - MAX_RISE
+
+def generate_layout(rng, width=3000, enemy_density=0.5, collectible_density=0.5, boss=False,
+                    height=600):
+    """
+    @brief Generate a reachable level layout
+    @param rng random.Random or int Random generator, or a seed for a new one
+    @param width int Level width in pixels (3000 to 1000000 are typical)
+    @param enemy_density float Chance of an enemy on each platform
+    @param collectible_density float Chance of a carrot above each platform
+    @param boss bool Put a Boss on the last platform
+    @param height int Level height in pixels
+    @return LevelData Layout, see level_format.py
+    @throws ValueError If the width is too small for a layout
+    """
+    if not isinstance(rng, random.Random):
+        rng = random.Random(rng)
+    if width < 1000:
+        raise ValueError(f"width must be at least 1000, got {width}")
+    platforms = [(0, GROUND_TOP, width, height - GROUND_TOP)]
+    enemies = []
+    collectibles = []
+    x = 300
+    top = GROUND_TOP
+    # Leave the last 300 px for the flag
+    while True:
+        platform_width = rng.randrange(100, 260, 20)
+        if x + platform_width > width - 300:
+            break
+        if top >= GROUND_TOP or rng.random() < 0.15:
+            # Start a new chain, one jump above the ground
+            top = MAX_TOP
+        else:
+            top = min(max(top + rng.randrange(-MAX_RISE, MAX_RISE + 1, 10), MIN_TOP), MAX_TOP)
+        index = len(platforms)
+        platforms.append((x, top, platform_width, 20))
+        center = x + platform_width // 2
+        if rng.random() < enemy_density:
+            kind = ENEMY_TYPES.index("gunner" if rng.random() < 0.5 else "grunt")
+            # Patrol the platform, the enemy rect is 40 px wide
+            enemies.append((kind, center, top - 60, index, x, x + platform_width - 40))
+        if rng.random() < collectible_density:
+            collectibles.append((center, top - 80, 20, 20))
+        x += platform_width + rng.randrange(40, MAX_GAP + 1, 10)
+    if boss and len(platforms) > 1:
+        # Replace whatever stands on the last platform with a Boss, which needs room to walk
+        last = len(platforms) - 1
+        px, top, platform_width, _ = platforms[last]
+        platforms[last] = (px, top, max(platform_width, 240), 20)
+        enemies = [enemy for enemy in enemies if enemy[3] != last]
+        enemies.append((ENEMY_TYPES.index("boss"), px + platform_width // 2, top - 60, last, 0, 0))
+    flag = (width - 200, GROUND_TOP - 60, 20, 60)
+
+    def rows(values, columns):
+        return np.array(values, dtype=np.int32).reshape(-1, columns)
+
+    return LevelData(width, height, (100, GROUND_TOP - 60), flag,
+                     rows(platforms, 4), rows(enemies, 6), rows(collectibles, 4))
+
+def endless_settings(level_number):
+    """
+    @brief Generator settings for a level of the endless mode, harder every level
+    @param level_number int Level number, starting at 1
+    @return dict Keyword arguments for generate_layout
+    """
+    return {
+        "width": 3000 + 1500 * (level_number - 1),
+        "enemy_density": min(0.3 + 0.05 * level_number, 0.9),
+        "collectible_density": max(0.6 - 0.03 * level_number, 0.2),
+        "boss": level_number % 5 == 0,
+    }
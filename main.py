@@ -5,47 +5,296 @@
 @date 2024
 """
 
-import pygame
+import os
 import sys
-from game import Game
+import time
+import random
+import argparse
+import tracing
 
-def main():
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+QUICKSAVE_PATH = "quicksave.rsnp"
+
+def parse_args(argv=None):
+    """
+    @brief Parse command line arguments
+    @param argv list Argument list (defaults to sys.argv)
+    @return argparse.Namespace Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Pixel Rabbit Adventure")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without a window and without a frame cap")
+    parser.add_argument("--level", type=int, default=None,
+                        help="start directly in the given level")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="number of frames to simulate (headless default: 3600)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed")
+    parser.add_argument("--render", action="store_true",
+                        help="headless only: also render every frame to an offscreen surface")
+    parser.add_argument("--speed", default="1", choices=["1", "2", "8", "max"],
+                        help="fast-forward multiplier (Tab cycles it in game)")
+    parser.add_argument("--step-rate", type=int, default=60, choices=[60, 30],
+                        help="simulation steps per second; 30 halves the update cost on slow machines")
+    parser.add_argument("--enemy-engine", action="store_true",
+                        help="simulate enemies with the vectorized NumPy engine")
+    parser.add_argument("--projectile-store", action="store_true",
+                        help="keep projectiles in the array-backed ProjectileStore")
+    parser.add_argument("--endless", action="store_true",
+                        help="endless mode: procedurally generated levels that keep getting longer")
+    parser.add_argument("--enemy-activity", action="store_true",
+                        help="update enemies far from the player less often or not at all")
+    parser.add_argument("--streaming", action="store_true",
+                        help="only keep the enemies and collectibles of level segments near the camera loaded")
+    parser.add_argument("--record", default=None, metavar="PATH",
+                        help="record input and per-frame state checksums to a file at exit")
+    parser.add_argument("--replay", default=None, metavar="PATH",
+                        help="replay a recording headlessly at full speed and verify its checksums")
+    parser.add_argument("--profile-csv", default=None, metavar="PATH",
+                        help="profile every frame and write per-phase timings to a CSV file at exit")
+    parser.add_argument("--trace", default=None, choices=["debug", "info", "warning", "error"],
+                        help="minimum trace level kept in the ring buffer (F9 dumps it)")
+    parser.add_argument("--trace-echo", action="store_true",
+                        help="also print trace messages to stdout")
+    return parser.parse_args(argv)
+
+def init_headless():
+    """
+    @brief Initialise pygame without a window
+    @return pygame.Surface Offscreen surface to render into
+    """
+    # The dummy driver must be selected before pygame is initialised
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    return pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+def run_headless(args):
+    """
+    @brief Step the game as fast as possible without a window
+    @param args argparse.Namespace Parsed arguments
+    @return int Number of simulated frames
+    """
+    screen = init_headless()
+    import pygame
+    from game import Game
+
+    game = Game(screen, seed=args.seed, enemy_engine=args.enemy_engine,
+                projectile_store=args.projectile_store, step_rate=args.step_rate,
+                enemy_activity=args.enemy_activity, endless=args.endless,
+                streaming=args.streaming)
+    game.start_level(args.level if args.level is not None else 1)
+    if args.profile_csv:
+        game.profiler.set_enabled(True, record_rows=True)
+
+    frames = args.frames if args.frames is not None else 3600
+    simulated = 0
+    start = time.perf_counter()
+    while game.running and simulated < frames:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.running = False
+            game.handle_event(event)
+        game.update()
+        if args.render:
+            game.render()
+        game.profiler.end_frame()
+        simulated += 1
+    elapsed = time.perf_counter() - start
+    if args.profile_csv:
+        game.profiler.export_csv(args.profile_csv)
+
+    pygame.quit()
+    fps = simulated / elapsed if elapsed > 0 else float("inf")
+    print(f"Simulated {simulated} frames in {elapsed:.3f}s ({fps:.1f} frames/s)")
+    for owner, stats in game.projectile_pool_stats().items():
+        print(f"{owner} projectile pool: {stats['allocations']} allocated, {stats['reused']} reused, "
+              f"peak {stats['high_water']} in use")
+    if args.render:
+        from sprite_cache import sprites
+        stats = sprites.stats()
+        print(f"Sprite cache: {stats['sprites']} sprites, {stats['hits']} hits, {stats['misses']} misses")
+    return simulated
+
+def run_replay(args):
+    """
+    @brief Replay a recording headlessly and report whether it matched
+    @param args argparse.Namespace Parsed arguments
+    @return bool True if every frame's checksum matched
+    """
+    screen = init_headless()
+    import pygame
+    from replay import load_recording, replay
+
+    result = replay(load_recording(args.replay), screen)
+    pygame.quit()
+    fps = result["frames"] / result["elapsed"] if result["elapsed"] > 0 else float("inf")
+    print(f"Replayed {result['frames']} frames in {result['elapsed']:.3f}s ({fps:.1f} frames/s), "
+          f"final checksum {result['checksum']:08x}")
+    if result["first_mismatch"] is not None:
+        print(f"Replay diverged at frame {result['first_mismatch']}")
+        return False
+    print("Replay matched the recording")
+    return True
+
+def main(argv=None):
     """
     @brief Main game function
+    @param argv list Argument list (defaults to sys.argv)
+    """
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+    if args.trace is not None:
+        tracing.set_level(getattr(tracing, args.trace.upper()))
+    tracing.set_echo(args.trace_echo)
+    try:
+        if args.replay:
+            if not run_replay(args):
+                sys.exit(1)
+        elif args.headless:
+            run_headless(args)
+        else:
+            run_windowed(args)
+    except Exception:
+        # Keep the last frames of trace output for post-mortem analysis
+        count = tracing.dump_to_file()
+        print(f"Crashed, {count} trace records written to trace_dump.txt", file=sys.stderr)
+        raise
+
+def run_windowed(args):
     """
+    @brief Run the game in a window with a fixed-timestep loop
+    @param args argparse.Namespace Parsed arguments
+    """
+    import pygame
+    from game import Game
+    from timestep import FixedTimestep
+    from replay import InputRecorder
+    from game_state import GameState
+    from idle import IdleScreen, IDLE_TIMEOUT_MS, LOADING_REFRESH_MS
+    import snapshot
+
     # Initialize Pygame
     pygame.init()
-    
+
     # Set up game window
-    SCREEN_WIDTH = 800
-    SCREEN_HEIGHT = 600
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Pixel Rabbit Adventure")
-    
-    # Create game instance
-    game = Game(screen)
-    
+
+    # Create game instance (a recorded session always needs a known seed)
+    seed = args.seed
+    if seed is None and args.record:
+        seed = random.randrange(2 ** 31)
+    game = Game(screen, seed=seed, enemy_engine=args.enemy_engine,
+                projectile_store=args.projectile_store, step_rate=args.step_rate,
+                enemy_activity=args.enemy_activity, endless=args.endless,
+                streaming=args.streaming)
+    game.interpolate = True
+    if args.level is not None:
+        game.start_level(args.level)
+    recorder = None
+    if args.record:
+        recorder = InputRecorder(seed, args.level, args.step_rate, args.enemy_activity, args.endless,
+                                 args.streaming, args.enemy_engine, args.projectile_store)
+
+    def step():
+        game.update()
+        if recorder:
+            recorder.record_checksum(game.state_checksum())
+    if args.profile_csv:
+        game.profiler.set_enabled(True, record_rows=True)
+
+    # Simulation runs in fixed steps, rendering happens once per displayed frame
+    timestep = FixedTimestep(args.step_rate, speed=None if args.speed == "max" else int(args.speed))
+
+    def dispatch(event):
+        """
+        @brief Handle one window event (hotkeys here, everything else in the game)
+        """
+        if event.type == pygame.QUIT:
+            game.running = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+            timestep.cycle_speed()
+            pygame.display.set_caption(f"Pixel Rabbit Adventure [{timestep.speed_label()}]")
+            return
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            game.profiler.toggle_overlay()
+            return
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            count = game.profiler.export_csv("profile.csv")
+            print(f"{count} profiled frames written to profile.csv")
+            return
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+            snapshot.save(game, QUICKSAVE_PATH)
+            print(f"Game saved to {QUICKSAVE_PATH}")
+            return
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F8:
+            if recorder:
+                # A recording replays inputs from its start, it cannot jump to a saved state
+                print("Quickload is disabled while recording")
+            elif os.path.exists(QUICKSAVE_PATH):
+                snapshot.load(game, QUICKSAVE_PATH)
+                print(f"Game loaded from {QUICKSAVE_PATH}")
+            return
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9:
+            count = tracing.dump_to_file()
+            print(f"{count} trace records written to trace_dump.txt")
+            return
+        if recorder:
+            recorder.record_event(game.frame, event)
+        game.handle_event(event)
+
+    # Menus block on input and only present what changed, gameplay runs the 60 FPS loop
+    idle = IdleScreen(screen)
+    was_loading = False
+
     # Main game loop
     while game.running:
+        if game.state != GameState.PLAYING:
+            # The next level's loading bar is redrawn until it is built, and once more afterwards
+            loading = game.preload_progress() is not None
+            if idle.needs_redraw or loading or was_loading:
+                game.render()
+                idle.present()
+            was_loading = loading
+            for event in idle.wait(LOADING_REFRESH_MS if loading else IDLE_TIMEOUT_MS):
+                idle.handle_event(event)
+                dispatch(event)
+            if game.state == GameState.PLAYING:
+                # Resume without simulating the time spent in the menu
+                game.clock.tick()
+                timestep.reset()
+            continue
+        idle.invalidate()
+
+        # Control frame rate (of rendering only)
+        real_dt = game.clock.tick(60) / 1000.0
+
         # Handle events
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game.running = False
-            game.handle_event(event)
-        
-        # Update game state
-        game.update()
-        
-        # Render game
-        game.render()
-        
+            dispatch(event)
+
+        # Update game state in fixed steps
+        timestep.run(step, real_dt)
+
+        # Render game between the last two steps
+        game.render(timestep.alpha)
+
         # Update display
         pygame.display.flip()
-        
-        # Control frame rate
-        game.clock.tick(60)
-        
+        game.profiler.end_frame()
+
+        if args.frames is not None and timestep.total_steps >= args.frames:
+            game.running = False
+
+    if args.profile_csv:
+        game.profiler.export_csv(args.profile_csv)
+    if recorder:
+        recorder.save(args.record)
     pygame.quit()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -7,6 +7,7 @@
 
 import pygame
 from projectile import Projectile
+from sprite_cache import sprites
 
 class Player(pygame.sprite.Sprite):
     """
@@ -26,6 +27,9 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
+        # Vertical extent before the last update, for swept platform collision
+        self.prev_top = self.rect.top
+        self.prev_bottom = self.rect.bottom
         self.vel_x = 0  # Initial horizontal speed
         self.vel_y = 0  # Initial vertical speed
         self.speed = 5
@@ -51,10 +55,11 @@ class Player(pygame.sprite.Sprite):
         self.moving_left = False
         self.moving_right = False
         
-    def handle_event(self, event):
+    def handle_event(self, event, spawn=Projectile):
         """
         @brief Handle player input event
         @param event pygame.event.Event Game event
+        @param spawn callable Creates carrots from (x, y, facing_right)
         @return Projectile or None
         """
         if event.type == pygame.KEYDOWN:
@@ -65,7 +70,7 @@ class Player(pygame.sprite.Sprite):
             elif event.key == pygame.K_SPACE:
                 self.jump()
             elif event.key == pygame.K_j:
-                return self.shoot()
+                return self.shoot(spawn)
         elif event.type == pygame.KEYUP:
             if event.key == pygame.K_LEFT or event.key == pygame.K_a:
                 self.moving_left = False
@@ -73,30 +78,35 @@ class Player(pygame.sprite.Sprite):
                 self.moving_right = False
         return None
         
-    def update(self):
+    def update(self, dt=1):
         """
         @brief Update player state
+        @param dt int Simulated time in 1/60 s frames
         """
+        self.prev_top = self.rect.top
+        self.prev_bottom = self.rect.bottom
         # Process horizontal movement
         if self.moving_left:
-            self.rect.x -= self.speed
+            self.rect.x -= self.speed * dt
             self.facing_right = False
         if self.moving_right:
-            self.rect.x += self.speed
+            self.rect.x += self.speed * dt
             self.facing_right = True
             
-        # Apply gravity (only when player is not on the ground)
+        # Apply gravity (only when player is not on the ground), in 1/60 s substeps so the
+        # jump arc at a lower step rate is the same as at 60 steps per second
         if not self.on_ground:
-            self.vel_y += self.gravity
-            self.rect.y += self.vel_y
+            for _ in range(dt):
+                self.vel_y += self.gravity
+                self.rect.y += self.vel_y
         
         # Update shooting cooldown
         if self.shoot_cooldown > 0:
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown = max(self.shoot_cooldown - dt, 0)
             
         # Update invincible time
         if self.invincible:
-            self.invincible_timer -= 1
+            self.invincible_timer -= dt
             if self.invincible_timer <= 0:
                 self.invincible = False
         
@@ -111,15 +121,16 @@ class Player(pygame.sprite.Sprite):
             self.vel_y = self.jump_power
             self.on_ground = False
             
-    def shoot(self):
+    def shoot(self, spawn=Projectile):
         """
         @brief Shoot carrot
+        @param spawn callable Creates carrots from (x, y, facing_right)
         @return Projectile or None If successful, return bullet object; otherwise, return None
         """
         if self.ammo > 0 and self.shoot_cooldown == 0:
             self.ammo -= 1
             self.shoot_cooldown = self.shoot_delay
-            return Projectile(
+            return spawn(
                 self.rect.centerx,
                 self.rect.centery,
                 self.facing_right
@@ -146,19 +157,28 @@ class Player(pygame.sprite.Sprite):
         @param screen pygame.Surface Game window surface
         @param camera Camera Camera object
         """
-        screen_pos = camera.apply(self)
-        x, y = screen_pos.x, screen_pos.y
         # Draw only if not invincible or flashing
         if not self.invincible or self.invincible_timer % 4 < 2:
-            # Draw rabbit body (white ellipse)
-            pygame.draw.ellipse(screen, (255, 255, 255), (x, y+10, 40, 50))
-            # Draw rabbit left ear
-            pygame.draw.ellipse(screen, (255, 255, 255), (x+5, y-15, 10, 30))
-            # Draw rabbit right ear
-            pygame.draw.ellipse(screen, (255, 255, 255), (x+25, y-15, 10, 30))
-            # Draw nose (pink small circle)
-            pygame.draw.ellipse(screen, (255, 192, 203), (x+17, y+45, 6, 6))
-            # Draw left eye (black small circle)
-            pygame.draw.ellipse(screen, (0, 0, 0), (x+12, y+30, 4, 4))
-            # Draw right eye (black small circle)
-            pygame.draw.ellipse(screen, (0, 0, 0), (x+24, y+30, 4, 4)) 
\ No newline at end of file
+            sprites.blit(screen, camera.apply(self).topleft, (Player, self.facing_right, "normal"),
+                         self.SPRITE_BOUNDS, self.draw_sprite)
+
+    # Area covered by draw_sprite relative to the rect's top left (the ears reach 15 px above)
+    SPRITE_BOUNDS = (-2, -17, 44, 80)
+
+    @staticmethod
+    def draw_sprite(screen, x, y):
+        """
+        @brief Draw the rabbit with its rect's top left at (x, y)
+        """
+        # Draw rabbit body (white ellipse)
+        pygame.draw.ellipse(screen, (255, 255, 255), (x, y+10, 40, 50))
+        # Draw rabbit left ear
+        pygame.draw.ellipse(screen, (255, 255, 255), (x+5, y-15, 10, 30))
+        # Draw rabbit right ear
+        pygame.draw.ellipse(screen, (255, 255, 255), (x+25, y-15, 10, 30))
+        # Draw nose (pink small circle)
+        pygame.draw.ellipse(screen, (255, 192, 203), (x+17, y+45, 6, 6))
+        # Draw left eye (black small circle)
+        pygame.draw.ellipse(screen, (0, 0, 0), (x+12, y+30, 4, 4))
+        # Draw right eye (black small circle)
+        pygame.draw.ellipse(screen, (0, 0, 0), (x+24, y+30, 4, 4))
@@ -0,0 +1,63 @@
+"""
+@file preload.py
+@brief Building the next level on a worker thread while a menu is shown
+@author Your Name
+@date 2024
+
+Building a level (loading or generating its layout, compiling the collision grid,
+baking the first render chunks) can take long enough to stall a frame. The
+LEVEL_COMPLETE screen waits for a click anyway, so the next level is built in
+the background meanwhile and only handed over when the player moves on. A level
+only uses its own seeded random generator, so a preloaded level is identical to
+one built on the spot.
+"""
+
+import threading
+import tracing
+
+class LevelPreloader:
+    """
+    @brief Builds one level on a daemon thread
+    """
+    def __init__(self, level_number, build):
+        """
+        @brief Start building a level
+        @param level_number int Level being built
+        @param build callable build(report) returns the Level, calling report(fraction) as it progresses
+        """
+        self.level_number = level_number
+        self.progress = 0.0
+        self._level = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(build,),
+                                        name=f"preload-level-{level_number}", daemon=True)
+        self._thread.start()
+
+    def _run(self, build):
+        try:
+            self._level = build(self._report)
+        except Exception as error:  # Re-raised on the main thread by result()
+            self._error = error
+            tracing.error("level", "Preloading level %d failed: %r", self.level_number, error)
+        self.progress = 1.0
+
+    def _report(self, fraction):
+        self.progress = min(max(fraction, 0.0), 1.0)
+
+    @property
+    def done(self):
+        """
+        @brief Whether the worker has finished
+        """
+        return not self._thread.is_alive()
+
+    def result(self):
+        """
+        @brief The built level, waiting for the worker if it is still running
+        @return Level Level object
+        @throws Exception Whatever the build raised
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._level
@@ -0,0 +1,201 @@
+"""
+@file profiler.py
+@brief Per-phase frame profiler with on-screen overlay and CSV export
+@author Your Name
+@date 2024
+"""
+
+import csv
+import time
+from collections import deque
+import pygame
+from text_cache import get_font
+
+# Colors used for the phases in the overlay graph, assigned in first-seen order
+PHASE_COLORS = [
+    (230, 80, 80), (80, 200, 80), (80, 140, 240), (240, 200, 60),
+    (200, 80, 220), (60, 210, 210), (250, 140, 40), (160, 160, 160),
+    (150, 230, 120), (240, 120, 180), (120, 110, 250), (200, 200, 200),
+]
+
+class _PhaseTimer:
+    """
+    @brief Reusable context manager timing one named phase
+    """
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self.profiler.current
+        current[self.name] = current.get(self.name, 0.0) + (time.perf_counter() - self.start)
+        return False
+
+class _NullTimer:
+    """
+    @brief Context manager doing nothing, returned while profiling is off
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class FrameProfiler:
+    """
+    @brief Collects the time spent in each phase of every frame
+    """
+    def __init__(self, history=240):
+        """
+        @brief Initialize profiler
+        @param history int Number of frames kept for the overlay graph
+        """
+        self.enabled = False
+        self.overlay_visible = False
+        self.history = deque(maxlen=history)  # (frame index, total seconds, {phase: seconds})
+        self.rows = []  # Every recorded frame, for CSV export
+        self.record_rows = False
+        self.phases = []  # Phase names in first-seen order
+        self.current = {}
+        self.frame_index = 0
+        self.frame_start = time.perf_counter()
+        self._timers = {}
+        self._font = None
+
+    def set_enabled(self, enabled, record_rows=None):
+        """
+        @brief Switch profiling on or off
+        @param enabled bool Whether phases are timed
+        @param record_rows bool Whether every frame is kept for CSV export
+        """
+        self.enabled = enabled
+        if record_rows is not None:
+            self.record_rows = record_rows
+        self.current = {}
+        self.frame_start = time.perf_counter()
+
+    def toggle_overlay(self):
+        """
+        @brief Show or hide the overlay, profiling follows the overlay state
+        """
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible and not self.enabled:
+            self.set_enabled(True)
+        elif not self.overlay_visible and not self.record_rows:
+            self.set_enabled(False)
+
+    def phase(self, name):
+        """
+        @brief Time a phase: "with profiler.phase('player'): ..."
+        @param name str Phase name
+        @return context manager
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _PhaseTimer(self, name)
+            self.phases.append(name)
+        return timer
+
+    def end_frame(self):
+        """
+        @brief Close the current frame and start the next one
+        """
+        now = time.perf_counter()
+        if self.enabled:
+            record = (self.frame_index, now - self.frame_start, self.current)
+            self.history.append(record)
+            if self.record_rows:
+                self.rows.append(record)
+            self.current = {}
+        self.frame_index += 1
+        self.frame_start = now
+
+    def averages(self):
+        """
+        @brief Average and maximum milliseconds per phase over the history
+        @return list (phase, avg_ms, max_ms) tuples in phase order
+        """
+        result = []
+        count = len(self.history)
+        if count == 0:
+            return result
+        for name in self.phases:
+            values = [frame[2].get(name, 0.0) for frame in self.history]
+            result.append((name, sum(values) * 1000.0 / count, max(values) * 1000.0))
+        return result
+
+    def export_csv(self, path):
+        """
+        @brief Write recorded frames as CSV, one column per phase in milliseconds
+        @param path str Output file path
+        @return int Number of rows written
+        """
+        frames = self.rows if self.rows else list(self.history)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "total_ms"] + self.phases)
+            for index, total, phases in frames:
+                writer.writerow([index, f"{total * 1000.0:.4f}"] +
+                                [f"{phases.get(name, 0.0) * 1000.0:.4f}" for name in self.phases])
+        return len(frames)
+
+    def render_overlay(self, screen, graph_ms=None):
+        """
+        @brief Draw the per-phase table and a rolling stacked graph
+        @param screen pygame.Surface Game window surface
+        @param graph_ms float Milliseconds represented by the full graph height (None scales to the peak)
+        """
+        if self._font is None:
+            self._font = get_font(18)
+        width = self.history.maxlen
+        graph_height = 80
+        line_height = 14
+        rows = self.averages()
+        panel = pygame.Surface((width + 10, graph_height + 20 + line_height * (len(rows) + 1)), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+
+        if graph_ms is None:
+            peak = max((sum(frame[2].values()) for frame in self.history), default=0.0)
+            graph_ms = max(peak * 1200.0, 1.0)
+
+        # Rolling stacked graph, one column per frame, newest on the right
+        x = 5 + width - len(self.history)
+        scale = graph_height / graph_ms
+        for _, total, phases in self.history:
+            y = 5 + graph_height
+            for i, name in enumerate(self.phases):
+                h = phases.get(name, 0.0) * 1000.0 * scale
+                if h >= 0.5:
+                    pygame.draw.line(panel, PHASE_COLORS[i % len(PHASE_COLORS)], (x, y), (x, y - h))
+                    y -= h
+            x += 1
+        # 16.7 ms budget line, when it fits in the graph
+        budget_y = 5 + graph_height - 1000.0 / 60.0 * scale
+        if budget_y >= 5:
+            pygame.draw.line(panel, (255, 255, 255), (5, budget_y), (5 + width, budget_y))
+        scale_text = self._font.render(f"{graph_ms:.2f} ms", True, (255, 255, 255))
+        panel.blit(scale_text, (5, 5))
+
+        # Table of averages, columns at fixed positions
+        y = graph_height + 12
+        for column, label in ((5, "phase"), (110, "avg ms"), (170, "max ms")):
+            panel.blit(self._font.render(label, True, (255, 255, 255)), (column, y))
+        for i, (name, avg, peak) in enumerate(rows):
+            y += line_height
+            color = PHASE_COLORS[i % len(PHASE_COLORS)]
+            for column, label in ((5, name), (110, f"{avg:.3f}"), (170, f"{peak:.3f}")):
+                panel.blit(self._font.render(label, True, color), (column, y))
+        screen.blit(panel, (screen.get_width() - panel.get_width() - 5, 5))
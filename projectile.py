@@ -6,6 +6,35 @@
 """
 
 import pygame
+import tracing
+
+# One surface per (size, color), shared by every projectile drawn with it
+_shared_surfaces = {}
+
+def shared_surface(size, color):
+    """
+    @brief Get the shared, filled surface for a projectile size and color
+    @param size tuple (width, height)
+    @param color tuple RGB color
+    @return pygame.Surface Shared surface, must not be drawn on
+    """
+    key = (tuple(size), tuple(color))
+    surface = _shared_surfaces.get(key)
+    if surface is None:
+        surface = _shared_surfaces[key] = pygame.Surface(size)
+        surface.fill(color)
+    return surface
+
+def swept_rect(rect, dx):
+    """
+    @brief Area covered by a horizontal move, for hit tests that must not skip thin targets
+    @param rect pygame.Rect Rect after the move
+    @param dx int Horizontal distance moved
+    @return pygame.Rect The rect itself when the move is shorter than its width, else the whole swept area
+    """
+    if abs(dx) <= rect.width:
+        return rect  # Consecutive positions overlap, nothing can be skipped
+    return rect.union(rect.move(-dx, 0))
 
 class Projectile(pygame.sprite.Sprite):
     """
@@ -20,30 +49,43 @@ class Projectile(pygame.sprite.Sprite):
         """
         super().__init__()
         # Create projectile image (temporarily using rectangle)
-        self.image = pygame.Surface((20, 10))
-        self.image.fill((255, 165, 0))  # Orange color for carrot
+        self.image = shared_surface((20, 10), (255, 165, 0))  # Orange color for carrot
         self.rect = self.image.get_rect()
+        self.reset(x, y, facing_right)
+
+    def reset(self, x, y, facing_right):
+        """
+        @brief Reinitialize a pooled projectile, same arguments as the constructor
+        @param x int Initial x coordinate
+        @param y int Initial y coordinate
+        @param facing_right bool Whether shooting right
+        """
         self.rect.x = x
         self.rect.y = y
-        
+
         # Projectile properties
         self.speed = 10
         self.damage = 10
         self.facing_right = facing_right
-        
-    def update(self):
+        self.prev_pos = None
+        self.last_dx = 0
+
+    def update(self, dt=1):
         """
         @brief Update projectile position
+        @param dt int Simulated time in 1/60 s frames
         """
-        if self.facing_right:
-            self.rect.x += self.speed
-        else:
-            self.rect.x -= self.speed
-            
-        # Destroy if projectile leaves screen
-        if self.rect.right < 0 or self.rect.left > 3000:
-            self.kill()
-            
+        self.last_dx = self.speed * dt if self.facing_right else -self.speed * dt
+        self.rect.x += self.last_dx
+        # 离开关卡的子弹由game.py按关卡宽度统一回收
+
+    def hit_rect(self):
+        """
+        @brief Rect used for hit tests, covering the whole last move
+        @return pygame.Rect Swept rect
+        """
+        return swept_rect(self.rect, self.last_dx)
+
     def render(self, screen, camera):
         """
         @brief Render projectile
@@ -64,35 +106,152 @@ class EnemyProjectile(pygame.sprite.Sprite):
         @param facing_right bool Whether shooting right
         """
         super().__init__()
-        self.image = pygame.Surface((15, 15))
-        self.image.fill((0, 255, 0))  # Green color for enemy projectile
+        self.color = (0, 255, 0)  # Green color for enemy projectile
+        self.image = shared_surface((15, 15), self.color)
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = y
-        
+
         self.speed = 6  # Moderate speed for visibility
         self.damage = 10
         self.facing_right = facing_right
         self.just_spawned = True
-        
-    def update(self):
+        self.prev_pos = None
+        self.last_dx = 0
+
+    def reset(self, x, y, facing_right, size, color, damage):
+        """
+        @brief Reinitialize as a bullet centered on (x, y), same arguments as spawn_enemy_projectile
+        @param x int Bullet center x coordinate
+        @param y int Bullet center y coordinate
+        @param facing_right bool Whether shooting right
+        @param size tuple (width, height) of the bullet
+        @param color tuple RGB color of the bullet
+        @param damage int Damage value
+        """
+        self.color = color
+        self.image = shared_surface(size, color)
+        self.rect.size = size
+        self.rect.center = (x, y)
+        self.damage = damage
+        self.facing_right = facing_right
+        self.just_spawned = True
+        self.prev_pos = None
+        self.last_dx = 0
+
+    def update(self, dt=1):
         """
         @brief Update enemy projectile position
+        @param dt int Simulated time in 1/60 s frames
         """
-        if self.facing_right:
-            self.rect.x += self.speed
-        else:
-            self.rect.x -= self.speed
+        self.last_dx = self.speed * dt if self.facing_right else -self.speed * dt
+        self.rect.x += self.last_dx
         # 不在这里kill，由game.py统一管理
         if self.just_spawned:
             self.just_spawned = False
-        print(f"[DEBUG] EnemyProjectile update: {self}, rect={self.rect}")
-            
+        tracing.debug("projectile", "EnemyProjectile update: %s, rect=%s", self, self.rect)
+
+    def hit_rect(self):
+        """
+        @brief Rect used for hit tests, covering the whole last move
+        @return pygame.Rect Swept rect
+        """
+        return swept_rect(self.rect, self.last_dx)
+
     def render(self, screen, camera):
         """
         @brief Render enemy projectile
         @param screen pygame.Surface Game window surface
         @param camera Camera Camera object
         """
-        print(f"[DEBUG] EnemyProjectile render: {self}, rect={self.rect}")
-        screen.blit(self.image, camera.apply(self)) 
\ No newline at end of file
+        tracing.debug("projectile", "EnemyProjectile render: %s, rect=%s", self, self.rect)
+        screen.blit(self.image, camera.apply(self))
+
+def spawn_enemy_projectile(x, y, facing_right, size, color, damage):
+    """
+    @brief Default spawner for enemy bullets: a new EnemyProjectile sprite
+    @param x int Bullet center x coordinate
+    @param y int Bullet center y coordinate
+    @param facing_right bool Whether shooting right
+    @param size tuple (width, height) of the bullet
+    @param color tuple RGB color of the bullet
+    @param damage int Damage value
+    @return EnemyProjectile Bullet object
+    """
+    proj = EnemyProjectile(x, y, facing_right)
+    proj.reset(x, y, facing_right, size, color, damage)
+    return proj
+
+class ProjectilePool:
+    """
+    @brief Recycles projectile instances instead of allocating new ones
+    """
+    def __init__(self, factory, max_free=1024):
+        """
+        @brief Initialize pool
+        @param factory callable Creates a new projectile; instances must have reset() taking the same arguments
+        @param max_free int Maximum number of idle instances kept
+        """
+        self.factory = factory
+        self.max_free = max_free
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0  # Highest in_use seen, use it to size max_free
+        self.allocations = 0
+        self.reused = 0  # Allocations avoided
+
+    def acquire(self, *args):
+        """
+        @brief Get a projectile, reusing an idle one when possible
+        @param args Arguments of the factory
+        @return Projectile New or recycled projectile
+        """
+        if self.free:
+            proj = self.free.pop()
+            proj.reset(*args)
+            self.reused += 1
+        else:
+            proj = self.factory(*args)
+            self.allocations += 1
+        proj.pooled = False
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return proj
+
+    def release(self, proj):
+        """
+        @brief Return a projectile that was culled or hit (after removing it from its groups)
+        @param proj Projectile Projectile obtained from acquire()
+        """
+        if getattr(proj, 'pooled', True):
+            return  # Not from this pool, or already released
+        proj.pooled = True
+        self.in_use -= 1
+        if len(self.free) < self.max_free:
+            self.free.append(proj)
+
+    def prefill(self, count, *args):
+        """
+        @brief Allocate idle instances up front so a firefight does not allocate
+        @param count int Number of idle instances wanted
+        @param args Arguments for the factory
+        """
+        while len(self.free) < min(count, self.max_free):
+            proj = self.factory(*args)
+            proj.pooled = True
+            self.allocations += 1
+            self.free.append(proj)
+
+    def stats(self):
+        """
+        @brief Pool statistics
+        @return dict in_use, high_water, free, allocations and reused counts
+        """
+        return {
+            "in_use": self.in_use,
+            "high_water": self.high_water,
+            "free": len(self.free),
+            "allocations": self.allocations,
+            "reused": self.reused,
+        }
@@ -0,0 +1,288 @@
+"""
+@file projectile_store.py
+@brief Fixed-capacity, array-backed projectile system replacing per-bullet sprites
+@author Your Name
+@date 2024
+
+Every projectile is a slot in a set of NumPy arrays. Movement, culling against the
+level width and hit tests against the player and the enemies each run as one
+batched operation. Projectiles are drawn from one shared surface per kind.
+"""
+
+import numpy as np
+import tracing
+from projectile import shared_surface
+
+PLAYER = 0
+ENEMY = 1
+
+class ProjectileStore:
+    """
+    @brief Struct-of-arrays storage for player and enemy projectiles
+    """
+    def __init__(self, capacity=4096):
+        """
+        @brief Initialize store
+        @param capacity int Maximum number of live projectiles
+        """
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.prev_x = np.zeros(capacity, dtype=np.int64)
+        self.prev_y = np.zeros(capacity, dtype=np.int64)
+        self.vx = np.zeros(capacity, dtype=np.int64)
+        self.width = np.zeros(capacity, dtype=np.int64)
+        self.height = np.zeros(capacity, dtype=np.int64)
+        self.damage = np.zeros(capacity, dtype=np.int64)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.kind = np.zeros(capacity, dtype=np.int16)  # Index into self.surfaces
+        self.seq = np.zeros(capacity, dtype=np.int64)  # Spawn order, keeps iteration deterministic
+        self.alive = np.zeros(capacity, dtype=np.bool_)
+        self.just_spawned = np.zeros(capacity, dtype=np.bool_)
+        self._free = list(range(capacity - 1, -1, -1))
+        self._next_seq = 0
+        self.surfaces = []
+        self.colors = []  # RGB color of every kind
+        self._kinds = {}  # (size, color) -> kind index
+        self.dropped = 0  # Spawns refused because the store was full
+        self.dt = 1  # Frames simulated by the last update, hit tests sweep over that move
+
+    def __len__(self):
+        return self.capacity - len(self._free)
+
+    def count(self, owner):
+        """
+        @brief Number of live projectiles of one owner
+        @param owner int PLAYER or ENEMY
+        @return int Count
+        """
+        return int(np.count_nonzero(self.alive & (self.owner == owner)))
+
+    def clear(self):
+        """
+        @brief Remove every projectile
+        """
+        self.alive[:] = False
+        self._free = list(range(self.capacity - 1, -1, -1))
+
+    def _kind(self, size, color):
+        key = (tuple(size), tuple(color))
+        kind = self._kinds.get(key)
+        if kind is None:
+            kind = self._kinds[key] = len(self.surfaces)
+            self.surfaces.append(shared_surface(size, color))
+            self.colors.append(tuple(color))
+        return kind
+
+    def spawn(self, x, y, vx, size, color, damage, owner):
+        """
+        @brief Add a projectile
+        @param x int Left coordinate
+        @param y int Top coordinate
+        @param vx int Horizontal speed per frame (signed)
+        @param size tuple (width, height)
+        @param color tuple RGB color
+        @param damage int Damage value
+        @param owner int PLAYER or ENEMY
+        @return int Slot index, or -1 if the store is full
+        """
+        if not self._free:
+            self.dropped += 1
+            tracing.warning("projectile", "Projectile store full (%d), spawn dropped", self.capacity)
+            return -1
+        i = self._free.pop()
+        self.x[i] = self.prev_x[i] = x
+        self.y[i] = self.prev_y[i] = y
+        self.vx[i] = vx
+        self.width[i], self.height[i] = size
+        self.damage[i] = damage
+        self.owner[i] = owner
+        self.kind[i] = self._kind(size, color)
+        self.seq[i] = self._next_seq
+        self._next_seq += 1
+        self.alive[i] = True
+        self.just_spawned[i] = owner == ENEMY
+        return i
+
+    def spawn_player(self, x, y, facing_right):
+        """
+        @brief Spawner compatible with Player.shoot: an orange carrot
+        @return None The projectile lives in the store
+        """
+        self.spawn(x, y, 10 if facing_right else -10, (20, 10), (255, 165, 0), 10, PLAYER)
+        return None
+
+    def spawn_enemy(self, x, y, facing_right, size, color, damage):
+        """
+        @brief Spawner compatible with projectile.spawn_enemy_projectile (x, y is the center)
+        @return None The projectile lives in the store
+        """
+        self.spawn(x - size[0] // 2, y - size[1] // 2, 6 if facing_right else -6, size, color, damage, ENEMY)
+        return None
+
+    def kill(self, slots):
+        """
+        @brief Remove projectiles
+        @param slots array-like Slot indices
+        """
+        slots = np.asarray(slots, dtype=np.int64)
+        if slots.size == 0:
+            return
+        self.alive[slots] = False
+        self._free.extend(slots.tolist())
+
+    def _ordered(self, mask):
+        """
+        @brief Slots selected by a mask, in spawn order
+        """
+        slots = np.flatnonzero(mask)
+        return slots[np.argsort(self.seq[slots], kind="stable")]
+
+    def store_previous_positions(self):
+        """
+        @brief Remember positions before a step, for render interpolation
+        """
+        np.copyto(self.prev_x, self.x)
+        np.copyto(self.prev_y, self.y)
+
+    def update(self, dt=1):
+        """
+        @brief Move every live projectile
+        @param dt int Simulated time in 1/60 s frames
+        """
+        self.dt = dt
+        alive = self.alive
+        self.x[alive] += self.vx[alive] * dt
+        self.just_spawned[alive] = False
+
+    def cull(self, level_width):
+        """
+        @brief Remove projectiles that left the level horizontally
+        @param level_width int Level width
+        """
+        out = self.alive & ((self.x + self.width < 0) | (self.x > level_width))
+        self.kill(np.flatnonzero(out))
+
+    def block(self, level):
+        """
+        @brief Remove projectiles whose last move ran into a platform side (see Level.wall_hit)
+        @param level Level Level whose platforms block projectiles
+        """
+        slots = np.flatnonzero(self.alive)
+        if slots.size == 0:
+            return
+        hit = level.wall_hits(self.x[slots], self.y[slots], self.width[slots], self.height[slots],
+                              self.vx[slots] * self.dt)
+        self.kill(slots[hit])
+
+    def _span(self, slots):
+        """
+        @brief Horizontal extent of the given slots, swept over the last move when it was longer than them
+        @return tuple (left, right) arrays
+        """
+        x = self.x[slots]
+        width = self.width[slots]
+        dx = self.vx[slots] * self.dt
+        swept = np.abs(dx) > width
+        back = x - dx
+        left = np.where(swept, np.minimum(x, back), x)
+        right = np.where(swept, np.maximum(x, back), x) + width
+        return left, right
+
+    def _overlaps(self, slots, rect):
+        """
+        @brief pygame.Rect.colliderect between the given slots (swept, see _span) and one rect
+        """
+        if rect.width <= 0 or rect.height <= 0:
+            return np.zeros(len(slots), dtype=np.bool_)
+        left, right = self._span(slots)
+        y = self.y[slots]
+        return ((left < rect.right) & (right > rect.left) &
+                (y < rect.bottom) & (y + self.height[slots] > rect.top))
+
+    def hit_player(self, player):
+        """
+        @brief Enemy projectiles hitting the player deal damage and disappear
+        @param player Player Player object
+        """
+        slots = self._ordered(self.alive & (self.owner == ENEMY) & ~self.just_spawned)
+        if slots.size == 0:
+            return
+        hits = slots[self._overlaps(slots, player.rect)]
+        for i in hits.tolist():
+            player.take_damage(int(self.damage[i]))
+        self.kill(hits)
+
+    def hit_enemies(self, level):
+        """
+        @brief Player projectiles hitting enemies deal damage, disappear and remove dead enemies
+        @param level Level Level whose enemies are tested
+        """
+        slots = self._ordered(self.alive & (self.owner == PLAYER))
+        enemies = level.enemies
+        if slots.size == 0 or not enemies:
+            return
+        count = len(enemies)
+        ex = np.fromiter((e.rect.x for e in enemies), dtype=np.int64, count=count)
+        ey = np.fromiter((e.rect.y for e in enemies), dtype=np.int64, count=count)
+        ew = np.fromiter((e.rect.width for e in enemies), dtype=np.int64, count=count)
+        eh = np.fromiter((e.rect.height for e in enemies), dtype=np.int64, count=count)
+        left, right = self._span(slots)
+        px = left[:, None]
+        py = self.y[slots, None]
+        # (projectiles x enemies) overlap matrix
+        hit = ((ex < right[:, None]) & (ex + ew > px) &
+               (ey < py + self.height[slots, None]) & (ey + eh > py) &
+               (ew > 0) & (eh > 0))
+        rows = np.flatnonzero(hit.any(axis=1))
+        if rows.size == 0:
+            return
+        # Resolve in spawn order so an enemy killed by one projectile cannot absorb the next
+        dead = set()
+        killed = []
+        for row in rows.tolist():
+            for column in np.flatnonzero(hit[row]).tolist():
+                if column in dead:
+                    continue
+                enemy = enemies[column]
+                slot = int(slots[row])
+                killed.append(slot)
+                if enemy.take_damage(int(self.damage[slot])):
+                    dead.add(column)
+                break
+        self.kill(killed)
+        for column in sorted(dead, reverse=True):
+            level.remove_enemy(enemies[column])
+
+    def positions(self, owner):
+        """
+        @brief (x, y) of live projectiles of one owner, in spawn order
+        @param owner int PLAYER or ENEMY
+        @return list (x, y) tuples
+        """
+        slots = self._ordered(self.alive & (self.owner == owner))
+        return list(zip(self.x[slots].tolist(), self.y[slots].tolist()))
+
+    def render(self, screen, camera):
+        """
+        @brief Draw every live projectile with one batched blit call
+        @param screen pygame.Surface Game window surface
+        @param camera Camera Camera object
+        """
+        slots = np.concatenate((self._ordered(self.alive & (self.owner == PLAYER)),
+                                self._ordered(self.alive & (self.owner == ENEMY))))
+        if slots.size == 0:
+            return
+        alpha = camera.alpha
+        x = self.prev_x[slots] + (self.x[slots] - self.prev_x[slots]) * alpha - camera.draw_offset_x
+        y = self.prev_y[slots] + (self.y[slots] - self.prev_y[slots]) * alpha - camera.draw_offset_y
+        x = x.astype(np.int64)
+        y = y.astype(np.int64)
+        # Skip projectiles entirely outside the screen
+        width, height = screen.get_size()
+        on_screen = ((x + self.width[slots] > 0) & (x < width) &
+                     (y + self.height[slots] > 0) & (y < height))
+        surfaces = self.surfaces
+        screen.blits([(surfaces[k], (sx, sy)) for k, sx, sy in
+                      zip(self.kind[slots][on_screen].tolist(), x[on_screen].tolist(), y[on_screen].tolist())],
+                     doreturn=False)
@@ -0,0 +1,155 @@
+"""
+@file replay.py
+@brief Deterministic input recording and headless replay with per-frame state checksums
+@author Your Name
+@date 2024
+"""
+
+import json
+import time
+import pygame
+
+RECORDING_VERSION = 2  # 2: enemies are updated once per step
+
+# Event attributes needed to reproduce the events Game.handle_event reacts to
+EVENT_ATTRIBUTES = ("key", "pos", "button")
+
+class InputRecorder:
+    """
+    @brief Records every event given to Game.handle_event with its frame index
+    """
+    def __init__(self, seed, level=None, step_rate=60, enemy_activity=False, endless=False,
+                 streaming=False, enemy_engine=False, projectile_store=False):
+        """
+        @brief Initialize recorder
+        @param seed int Game seed used for the recorded session
+        @param level int Level the session started in (None for the start menu)
+        @param step_rate int Game step rate used for the recorded session
+        @param enemy_activity bool Whether distance-based enemy activity was on
+        @param endless bool Whether the session played the endless mode
+        @param streaming bool Whether level segments were streamed
+        @param enemy_engine bool Whether enemies were simulated by the EnemyEngine
+        @param projectile_store bool Whether projectiles lived in the ProjectileStore
+        """
+        self.seed = seed
+        self.level = level
+        self.step_rate = step_rate
+        self.enemy_activity = enemy_activity
+        self.endless = endless
+        self.streaming = streaming
+        self.enemy_engine = enemy_engine
+        self.projectile_store = projectile_store
+        self.events = []  # [frame, event type, {attribute: value}]
+        self.checksums = []  # checksums[i] is the state after update number i + 1
+
+    def record_event(self, frame, event):
+        """
+        @brief Record an event about to be handled
+        @param frame int Game.frame when the event is handled
+        @param event pygame.event.Event Event
+        """
+        attributes = {}
+        for name in EVENT_ATTRIBUTES:
+            if hasattr(event, name):
+                value = getattr(event, name)
+                attributes[name] = list(value) if isinstance(value, tuple) else value
+        self.events.append([frame, event.type, attributes])
+
+    def record_checksum(self, checksum):
+        """
+        @brief Record the state checksum after one update
+        @param checksum int Game.state_checksum() value
+        """
+        self.checksums.append(checksum)
+
+    def to_dict(self):
+        """
+        @brief Serialisable form of the recording
+        @return dict Recording
+        """
+        return {
+            "version": RECORDING_VERSION,
+            "seed": self.seed,
+            "level": self.level,
+            "step_rate": self.step_rate,
+            "enemy_activity": self.enemy_activity,
+            "endless": self.endless,
+            "streaming": self.streaming,
+            "enemy_engine": self.enemy_engine,
+            "projectile_store": self.projectile_store,
+            "frames": len(self.checksums),
+            "events": self.events,
+            "checksums": self.checksums,
+        }
+
+    def save(self, path):
+        """
+        @brief Write the recording as JSON
+        @param path str Output file path
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+def load_recording(path):
+    """
+    @brief Read a recording written by InputRecorder.save
+    @param path str Recording file path
+    @return dict Recording
+    """
+    with open(path, encoding="utf-8") as f:
+        recording = json.load(f)
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"Unsupported recording version: {recording.get('version')}")
+    return recording
+
+def event_from_record(record):
+    """
+    @brief Rebuild a pygame event from a recorded entry
+    @param record list [frame, event type, attributes]
+    @return pygame.event.Event Event
+    """
+    _, event_type, attributes = record
+    attributes = {name: tuple(value) if isinstance(value, list) else value
+                  for name, value in attributes.items()}
+    return pygame.event.Event(event_type, attributes)
+
+def replay(recording, screen, verify=True):
+    """
+    @brief Replay a recording as fast as possible, without rendering
+    @param recording dict Recording from load_recording
+    @param screen pygame.Surface Surface given to the Game (never drawn to)
+    @param verify bool Compare every frame's checksum with the recorded one
+    @return dict Result with frames, elapsed seconds, first mismatching frame and the final checksum
+    """
+    from game import Game
+
+    # Recordings made before step rates existed ran at 60 steps per second
+    game = Game(screen, seed=recording["seed"], step_rate=recording.get("step_rate", 60),
+                enemy_activity=recording.get("enemy_activity", False), endless=recording.get("endless", False),
+                streaming=recording.get("streaming", False), enemy_engine=recording.get("enemy_engine", False),
+                projectile_store=recording.get("projectile_store", False))
+    if recording.get("level") is not None:
+        game.start_level(recording["level"])
+    events = recording["events"]
+    expected = recording["checksums"]
+    frames = recording["frames"]
+    first_mismatch = None
+    checksum = None
+    index = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        while index < len(events) and events[index][0] <= game.frame:
+            game.handle_event(event_from_record(events[index]))
+            index += 1
+        game.update()
+        if verify or game.frame == frames:
+            checksum = game.state_checksum()
+            if verify and first_mismatch is None and checksum != expected[game.frame - 1]:
+                first_mismatch = game.frame
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames,
+        "elapsed": elapsed,
+        "first_mismatch": first_mismatch,
+        "checksum": checksum,
+    }
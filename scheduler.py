@@ -0,0 +1,126 @@
+"""
+@file scheduler.py
+@brief Ordered frame pipeline: systems registered once into fixed phases
+@author Your Name
+@date 2024
+
+A frame runs the phases in PHASES order and, inside a phase, its systems in
+registration order. Every system has a unique name, is registered exactly once,
+can be switched off, and is timed under its name by the FrameProfiler.
+"""
+
+# Phase order of one frame
+PHASES = ("input", "physics", "ai", "projectiles", "collision", "cleanup", "render")
+
+class System:
+    """
+    @brief One named step of the frame pipeline
+    """
+    __slots__ = ("name", "phase", "func", "enabled")
+
+    def __init__(self, name, phase, func, enabled=True):
+        """
+        @brief Initialize system
+        @param name str Unique name, also used as the profiler phase name
+        @param phase str Phase it runs in
+        @param func callable Called with the arguments given to Scheduler.run_phase
+        @param enabled bool Whether it runs
+        """
+        self.name = name
+        self.phase = phase
+        self.func = func
+        self.enabled = enabled
+
+    def __repr__(self):
+        return f"System({self.name!r}, {self.phase!r}, enabled={self.enabled})"
+
+class Scheduler:
+    """
+    @brief Runs registered systems phase by phase
+    """
+    def __init__(self, profiler=None, phases=PHASES):
+        """
+        @brief Initialize scheduler
+        @param profiler FrameProfiler Profiler timing every system (None for no timing)
+        @param phases tuple Phase names in execution order
+        """
+        self.profiler = profiler
+        self.phases = tuple(phases)
+        self._by_phase = {phase: [] for phase in self.phases}
+        self._by_name = {}
+
+    def register(self, name, phase, func, enabled=True):
+        """
+        @brief Add a system at the end of a phase
+        @param name str Unique system name
+        @param phase str One of the scheduler's phases
+        @param func callable System function
+        @param enabled bool Whether it runs
+        @return System Registered system
+        @throws ValueError If the name or the function is already registered, or the phase is unknown
+        """
+        if phase not in self._by_phase:
+            raise ValueError(f"Unknown phase {phase!r}, expected one of {self.phases}")
+        if name in self._by_name:
+            raise ValueError(f"System {name!r} is already registered")
+        for system in self._by_name.values():
+            if system.func == func:
+                raise ValueError(f"{func!r} is already registered as system {system.name!r}")
+        system = System(name, phase, func, enabled)
+        self._by_phase[phase].append(system)
+        self._by_name[name] = system
+        return system
+
+    def get(self, name):
+        """
+        @brief Look up a system
+        @param name str System name
+        @return System System
+        @throws KeyError If no system has that name
+        """
+        return self._by_name[name]
+
+    def set_enabled(self, name, enabled):
+        """
+        @brief Switch a system on or off
+        @param name str System name
+        @param enabled bool Whether it runs
+        """
+        self._by_name[name].enabled = enabled
+
+    def systems(self, phase=None):
+        """
+        @brief Registered systems in execution order
+        @param phase str Only this phase (None for all)
+        @return list System objects
+        """
+        if phase is not None:
+            return list(self._by_phase[phase])
+        return [system for name in self.phases for system in self._by_phase[name]]
+
+    def run_phase(self, phase, *args):
+        """
+        @brief Run the enabled systems of one phase
+        @param phase str Phase name
+        @param args Arguments passed to every system
+        """
+        profiler = self.profiler
+        for system in self._by_phase[phase]:
+            if not system.enabled:
+                continue
+            if profiler is None or not profiler.enabled:
+                system.func(*args)
+            else:
+                with profiler.phase(system.name):
+                    system.func(*args)
+
+    def run(self, phases, *args):
+        """
+        @brief Run several phases in the scheduler's order
+        @param phases iterable Phase names to run
+        @param args Arguments passed to every system
+        """
+        wanted = set(phases)
+        for phase in self.phases:
+            if phase in wanted:
+                self.run_phase(phase, *args)
@@ -0,0 +1,308 @@
+"""
+@file snapshot.py
+@brief Compact, versioned binary snapshots of the full game state
+@author Your Name
+@date 2024
+
+A snapshot holds the game and player state, the camera, the level's dynamic state
+and every enemy, collectible and projectile as fixed-layout little-endian records,
+so capturing and restoring are a few struct and NumPy bulk copies. Level geometry
+is not stored: restoring rebuilds the level from its number and seed with
+Game.create_level (or keeps the current level when it is the same one).
+
+Layout: header, player record, then the enemy, collectible and projectile record
+arrays, the resident segment indices of a streamed level and, per unloaded
+segment, its saved records (see streaming.py).
+"""
+
+import os
+import struct
+import numpy as np
+import pygame
+from enemy import Grunt, Gunner, Boss
+from game_state import GameState
+from level_format import ENEMY_TYPES
+from player import Player
+from camera import Camera
+from projectile_store import PLAYER, ENEMY
+
+MAGIC = b"RSNP"
+SNAPSHOT_VERSION = 2  # 2: the header stores the step rate
+# Leading magic and version, checked before the rest of the header is trusted
+_PREFIX = struct.Struct("<4sH")
+# magic, version, has seed, seed, endless, streamed, step rate, frame, state, current level, score, game over,
+# level step count, has flag, flag x/y/w/h, camera offset x/y and previous offset x/y,
+# enemy, collectible, projectile, resident segment and saved segment counts
+_HEADER = struct.Struct("<4sH?q??HqBii?q?4i4d5I")
+# rect x/y, previous top/bottom, velocity x/y, on ground, facing right, health, lives, ammo,
+# shoot cooldown, invincible, invincible timer, moving left/right
+_PLAYER = struct.Struct("<4i2d??4i?i??")
+# Saved segment of a streamed level: index, enemy and collectible record sizes in bytes
+_SEGMENT = struct.Struct("<iII")
+
+ENEMY_RECORD = np.dtype([("kind", "u1"), ("direction", "i1"), ("facing", "u1"), ("x", "<i4"), ("y", "<i4"),
+                         ("health", "<i4"), ("cooldown", "<i4"), ("shoot_delay", "<i4"), ("damage", "<i4"),
+                         ("platform", "<i4"), ("stream_row", "<i4"), ("activity_slot", "<i4"),
+                         ("speed", "<f8"), ("patrol_left", "<f8"), ("patrol_right", "<f8")])
+COLLECTIBLE_RECORD = np.dtype([("x", "<i4"), ("y", "<i4"), ("width", "<i4"), ("height", "<i4"),
+                               ("stream_row", "<i4")])
+PROJECTILE_RECORD = np.dtype([("owner", "u1"), ("just_spawned", "u1"), ("color", "u1", (3,)),
+                              ("x", "<i4"), ("y", "<i4"), ("width", "<i4"), ("height", "<i4"),
+                              ("vx", "<i4"), ("last_dx", "<i4"), ("damage", "<i4")])
+
+_ENEMY_KINDS = {Grunt: ENEMY_TYPES.index("grunt"), Gunner: ENEMY_TYPES.index("gunner"),
+                Boss: ENEMY_TYPES.index("boss")}
+# Player carrots always have the same color (see projectile.Projectile)
+_CARROT_COLOR = (255, 165, 0)
+
+def _number(value):
+    """
+    @brief A stored float as the int it was captured from, when it is integral
+    """
+    return int(value) if value.is_integer() else value
+
+def _enemy_records(level):
+    platform_index = {id(platform): i for i, platform in enumerate(level.platforms)}
+    rows = []
+    for enemy in level.enemies:
+        kind = _ENEMY_KINDS.get(type(enemy))
+        if kind is None:
+            raise ValueError(f"cannot snapshot enemy type {type(enemy).__name__}")
+        platform = -1
+        if enemy.platform_rect is not None:
+            platform = platform_index.get(id(enemy.platform_rect), -1)
+            if platform < 0 and enemy.platform_rect in level.platforms:
+                platform = level.platforms.index(enemy.platform_rect)
+        rows.append((kind, enemy.direction, enemy.facing_right, enemy.rect.x, enemy.rect.y, enemy.health,
+                     enemy.shoot_cooldown, enemy.shoot_delay, enemy.damage, platform, enemy.stream_row,
+                     enemy.activity_slot, enemy.speed, getattr(enemy, "patrol_left", 0),
+                     getattr(enemy, "patrol_right", 0)))
+    return np.array(rows, dtype=ENEMY_RECORD)
+
+def _projectile_records(game):
+    store = game.projectile_store
+    rows = []
+    for owner, group in ((PLAYER, game.projectiles), (ENEMY, game.enemy_projectiles)):
+        for proj in group:
+            vx = proj.speed if proj.facing_right else -proj.speed
+            color = _CARROT_COLOR if owner == PLAYER else proj.color
+            rows.append((owner, getattr(proj, "just_spawned", False), color, proj.rect.x, proj.rect.y,
+                         proj.rect.width, proj.rect.height, vx, proj.last_dx, proj.damage))
+        if store is not None:
+            slots = store._ordered(store.alive & (store.owner == owner))
+            for i in slots.tolist():
+                vx = int(store.vx[i])
+                rows.append((owner, store.just_spawned[i], store.colors[store.kind[i]], store.x[i], store.y[i],
+                             store.width[i], store.height[i], vx, vx * store.dt, store.damage[i]))
+    return np.array(rows, dtype=PROJECTILE_RECORD)
+
+def capture(game):
+    """
+    @brief Serialize the game state
+    @param game Game Game instance
+    @return bytes Snapshot
+    @throws ValueError If the level holds an enemy type snapshots do not know
+    """
+    level = game.level
+    if level.enemy_engine:
+        level.enemy_engine.sync_views()
+    player = game.player
+    camera = game.camera
+    enemies = _enemy_records(level)
+    collectibles = np.array([(c.rect.x, c.rect.y, c.rect.width, c.rect.height, c.stream_row)
+                             for c in level.collectibles], dtype=COLLECTIBLE_RECORD)
+    projectiles = _projectile_records(game)
+    resident, saved = level.streamer.state() if level.streamer is not None else ([], {})
+    flag = level.flag_rect or (0, 0, 0, 0)
+    parts = [
+        _HEADER.pack(MAGIC, SNAPSHOT_VERSION, game.seed is not None, game.seed or 0, game.endless,
+                     level.streamer is not None, game.step_rate, game.frame, game.state.value, game.current_level, game.score,
+                     game.game_over, level.step_count, level.flag_rect is not None, *flag,
+                     camera.offset_x, camera.offset_y, camera.prev_offset_x, camera.prev_offset_y,
+                     len(enemies), len(collectibles), len(projectiles), len(resident), len(saved)),
+        _PLAYER.pack(player.rect.x, player.rect.y, player.prev_top, player.prev_bottom, player.vel_x,
+                     player.vel_y, player.on_ground, player.facing_right, player.health, player.lives,
+                     player.ammo, player.shoot_cooldown, player.invincible, player.invincible_timer,
+                     player.moving_left, player.moving_right),
+        enemies.tobytes(),
+        collectibles.tobytes(),
+        projectiles.tobytes(),
+        np.array(resident, dtype="<i4").tobytes(),
+    ]
+    for segment in sorted(saved):
+        enemy_records, collectible_records = saved[segment]
+        parts += (_SEGMENT.pack(segment, len(enemy_records), len(collectible_records)),
+                  enemy_records, collectible_records)
+    return b"".join(parts)
+
+class _Reader:
+    """
+    @brief Sequential reader over a snapshot, raising ValueError when it runs short
+    """
+    def __init__(self, blob):
+        self.blob = blob
+        self.offset = 0
+
+    def take(self, size):
+        end = self.offset + size
+        if end > len(self.blob):
+            raise ValueError("truncated snapshot")
+        chunk = self.blob[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def unpack(self, layout):
+        return layout.unpack(self.take(layout.size))
+
+    def array(self, dtype, count):
+        return np.frombuffer(self.take(dtype.itemsize * count), dtype=dtype)
+
+def restore(game, blob):
+    """
+    @brief Replace the game state with a snapshot
+    @param game Game Game instance, must use the same step rate and streaming setting as the captured one
+    @param blob bytes Snapshot from capture()
+    @throws ValueError If the blob is not a snapshot of this version, or does not fit the game
+    """
+    if len(blob) < _PREFIX.size:
+        raise ValueError("not a game snapshot")
+    magic, version = _PREFIX.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("not a game snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {version}, expected {SNAPSHOT_VERSION}")
+    reader = _Reader(blob)
+    (magic, version, has_seed, seed, endless, streamed, step_rate, frame, state, current_level, score, game_over,
+     step_count, has_flag, fx, fy, fw, fh, offset_x, offset_y, prev_offset_x, prev_offset_y,
+     n_enemies, n_collectibles, n_projectiles, n_resident, n_saved) = reader.unpack(_HEADER)
+    if step_rate != game.step_rate:
+        raise ValueError(f"snapshot was taken at {step_rate} steps per second, the game runs at {game.step_rate}")
+    if streamed != game.streaming:
+        raise ValueError("snapshot and game disagree on level streaming")
+    player_fields = reader.unpack(_PLAYER)
+    enemies = reader.array(ENEMY_RECORD, n_enemies).tolist()
+    collectibles = reader.array(COLLECTIBLE_RECORD, n_collectibles).tolist()
+    projectiles = reader.array(PROJECTILE_RECORD, n_projectiles).tolist()
+    resident = reader.array(np.dtype("<i4"), n_resident).tolist()
+    saved = {}
+    for _ in range(n_saved):
+        segment, enemy_size, collectible_size = reader.unpack(_SEGMENT)
+        saved[segment] = (bytes(reader.take(enemy_size)), bytes(reader.take(collectible_size)))
+    if reader.offset != len(blob):
+        raise ValueError("trailing data after snapshot")
+
+    # Game
+    game.seed = seed if has_seed else None
+    game.endless = endless
+    game.max_levels = float("inf") if endless else 3
+    game.frame = frame
+    game.state = GameState(state)
+    game.current_level = current_level
+    game.score = score
+    game.game_over = game_over
+    game.preloader = None
+
+    # Level: geometry comes from the level source, only reuse the current level if it is the same one
+    level = game.level
+    if level.level_number != current_level or level.seed != game.level_seed(current_level):
+        level = game.level = game.create_level(current_level)
+    level.step_count = step_count
+    flag = (fx, fy, fw, fh) if has_flag else None
+    if flag != (tuple(level.flag_rect) if level.flag_rect else None):
+        level.set_flag(pygame.Rect(flag) if flag else None)
+    level.enemies = []
+    for (kind, direction, facing, x, y, health, cooldown, shoot_delay, damage, platform, stream_row,
+         activity_slot, speed, patrol_left, patrol_right) in enemies:
+        enemy = level.spawn_enemy(kind, x, y, platform, _number(patrol_left), _number(patrol_right))
+        enemy.direction = direction
+        enemy.facing_right = bool(facing)
+        enemy.health = health
+        enemy.shoot_cooldown = cooldown
+        enemy.shoot_delay = shoot_delay
+        enemy.damage = damage
+        enemy.speed = _number(speed)
+        enemy.stream_row = stream_row
+        enemy.activity_slot = activity_slot
+        level.enemies.append(enemy)
+    if level.enemy_engine:
+        level.enemy_engine.rebuild(level.enemies)
+    restored = []
+    for x, y, width, height, stream_row in collectibles:
+        collectible = level.spawn_collectible(x, y, width, height)
+        collectible.stream_row = stream_row
+        restored.append(collectible)
+    level.set_collectibles(restored)
+    if level.streamer is not None:
+        level.streamer.restore_state(resident, saved)
+
+    # Player and camera
+    (x, y, prev_top, prev_bottom, vel_x, vel_y, on_ground, facing_right, health, lives, ammo, shoot_cooldown,
+     invincible, invincible_timer, moving_left, moving_right) = player_fields
+    player = game.player = Player(x, y)
+    player.prev_top = prev_top
+    player.prev_bottom = prev_bottom
+    player.vel_x = _number(vel_x)
+    player.vel_y = _number(vel_y)
+    player.on_ground = on_ground
+    player.facing_right = facing_right
+    player.health = health
+    player.lives = lives
+    player.ammo = ammo
+    player.shoot_cooldown = shoot_cooldown
+    player.invincible = invincible
+    player.invincible_timer = invincible_timer
+    player.moving_left = moving_left
+    player.moving_right = moving_right
+    camera = game.camera = Camera(player, game.screen.get_size())
+    camera.offset_x, camera.offset_y = offset_x, offset_y
+    camera.prev_offset_x, camera.prev_offset_y = prev_offset_x, prev_offset_y
+    camera.set_interpolation(1.0)
+
+    # Projectiles, in their original order
+    game.clear_projectiles()
+    store = game.projectile_store
+    if store is not None:
+        store.dt = game.dt
+    for owner, just_spawned, color, x, y, width, height, vx, last_dx, damage in projectiles:
+        facing = vx > 0
+        if store is not None:
+            slot = store.spawn(x, y, vx, (width, height), tuple(color), damage, owner)
+            if slot >= 0:
+                store.just_spawned[slot] = bool(just_spawned)
+            continue
+        if owner == PLAYER:
+            proj = game.player_projectile_pool.acquire(x, y, facing)
+            game.projectiles.add(proj)
+        else:
+            proj = game.enemy_projectile_pool.acquire(x + width // 2, y + height // 2, facing,
+                                                      (width, height), tuple(color), damage)
+            proj.rect.topleft = (x, y)
+            proj.just_spawned = bool(just_spawned)
+            game.enemy_projectiles.add(proj)
+        proj.speed = abs(vx)
+        proj.damage = damage
+        proj.last_dx = last_dx
+
+    if game.state == GameState.LEVEL_COMPLETE and game.preload_levels and game.current_level < game.max_levels:
+        game.preload_level(game.current_level + 1)
+
+def save(game, path):
+    """
+    @brief Write a snapshot file, atomically replacing an existing one
+    @param game Game Game instance
+    @param path str File path
+    """
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(capture(game))
+    os.replace(temporary, path)
+
+def load(game, path):
+    """
+    @brief Restore a snapshot file
+    @param game Game Game instance
+    @param path str File path
+    @throws ValueError If the file is not a usable snapshot
+    """
+    with open(path, "rb") as f:
+        restore(game, f.read())
@@ -0,0 +1,168 @@
+"""
+@file spatial_hash.py
+@brief Uniform-grid spatial hash used as the broadphase for rect collision tests
+@author Your Name
+@date 2024
+
+Items are bucketed by the grid cells their rect covers, so a query only tests the
+items sharing a cell with the query rect. Results always come back in insertion
+order, which keeps hit resolution identical to a plain loop over the same list.
+"""
+
+class SpatialHash:
+    """
+    @brief Grid of cells mapping to the items whose rect overlaps them
+    """
+    def __init__(self, cell_size=128):
+        """
+        @brief Initialize spatial hash
+        @param cell_size int Cell edge length in pixels, about the size of the largest item works well
+        """
+        self.cell_size = cell_size
+        # (column, row) -> {order: (item, rect)}, every bucket is kept in ascending order
+        self.cells = {}
+        self._entries = {}  # item -> (order, rect, cells)
+        self._next_order = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def clear(self):
+        """
+        @brief Remove every item
+        """
+        self.cells.clear()
+        self._entries.clear()
+        self._next_order = 0
+
+    def _cells(self, rect):
+        """
+        @brief Grid cells covered by a rect
+        """
+        size = self.cell_size
+        left = rect.left // size
+        top = rect.top // size
+        right = (rect.right - 1) // size if rect.width > 0 else left
+        bottom = (rect.bottom - 1) // size if rect.height > 0 else top
+        if left == right and top == bottom:
+            return [(left, top)]
+        return [(column, row) for column in range(left, right + 1) for row in range(top, bottom + 1)]
+
+    def _add(self, order, item, rect, cells):
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                self.cells[cell] = {order: (item, rect)}
+            else:
+                bucket[order] = (item, rect)
+                if next(reversed(bucket)) != order:
+                    # Re-added with an old order by move(), restore ascending order
+                    self.cells[cell] = dict(sorted(bucket.items()))
+        self._entries[item] = (order, rect, cells)
+
+    def _discard(self, order, cells):
+        for cell in cells:
+            bucket = self.cells[cell]
+            del bucket[order]
+            if not bucket:
+                del self.cells[cell]
+
+    def insert(self, item, rect=None):
+        """
+        @brief Add an item after every item already in the hash
+        @param item object Item, must be hashable
+        @param rect pygame.Rect Item bounds (defaults to item.rect), kept by reference
+        """
+        self.remove(item)
+        if rect is None:
+            rect = item.rect
+        order = self._next_order
+        self._next_order += 1
+        self._add(order, item, rect, self._cells(rect))
+
+    def remove(self, item):
+        """
+        @brief Remove an item, does nothing if it is not in the hash
+        @param item object Item
+        """
+        entry = self._entries.pop(item, None)
+        if entry is not None:
+            self._discard(entry[0], entry[2])
+
+    def move(self, item):
+        """
+        @brief Re-bucket an item after its rect changed, keeping its place in the order
+        @param item object Item
+        """
+        order, rect, old_cells = self._entries[item]
+        cells = self._cells(rect)
+        if cells != old_cells:
+            self._discard(order, old_cells)
+            self._add(order, item, rect, cells)
+
+    def build(self, items):
+        """
+        @brief Replace the contents with the given items, in order
+        @param items iterable Items with a rect attribute
+        """
+        self.clear()
+        size = self.cell_size
+        cells = self.cells
+        entries = self._entries
+        order = 0
+        for item in items:
+            rect = item.rect
+            left = rect.left // size
+            top = rect.top // size
+            right = (rect.right - 1) // size if rect.width > 0 else left
+            bottom = (rect.bottom - 1) // size if rect.height > 0 else top
+            if left == right and top == bottom:
+                covered = [(left, top)]
+            else:
+                covered = [(column, row) for column in range(left, right + 1) for row in range(top, bottom + 1)]
+            value = (item, rect)
+            for cell in covered:
+                bucket = cells.get(cell)
+                if bucket is None:
+                    cells[cell] = {order: value}
+                else:
+                    bucket[order] = value
+            entries[item] = (order, rect, covered)
+            order += 1
+        self._next_order = order
+
+    def query_rect(self, rect):
+        """
+        @brief Items whose rect collides with a rect
+        @param rect pygame.Rect Query rect
+        @return list Colliding items, in insertion order
+        """
+        cells = self.cells
+        covered = self._cells(rect)
+        if len(covered) == 1:
+            bucket = cells.get(covered[0])
+            if not bucket:
+                return []
+            return [item for item, item_rect in bucket.values() if rect.colliderect(item_rect)]
+        candidates = {}
+        for cell in covered:
+            bucket = cells.get(cell)
+            if bucket:
+                candidates.update(bucket)
+        return [item for _, (item, item_rect) in sorted(candidates.items())
+                if rect.colliderect(item_rect)]
+
+    def query_pairs(self, items, rect_of=None):
+        """
+        @brief Every colliding (item, hashed item) pair for a sequence of other items
+        @param items iterable Items with a rect attribute
+        @param rect_of callable Returns the rect to test for an item (defaults to item.rect)
+        @return list (item, hashed item) pairs, ordered by item then insertion order
+        """
+        query = self.query_rect
+        if rect_of is None:
+            return [(item, other) for item in items for other in query(item.rect)]
+        return [(item, other) for item in items for other in query(rect_of(item))]
@@ -0,0 +1,87 @@
+"""
+@file sprite_cache.py
+@brief Cache of pre-rendered surfaces for procedurally drawn entities
+@author Your Name
+@date 2024
+
+Entities draw themselves from ellipses, rects and lines. Each distinct drawing is
+rendered once into a per-pixel alpha surface, keyed by entity type, facing and
+state, and afterwards every entity costs a single blit. The drawings are solid
+colors without antialiasing, so the blitted result is pixel-identical to drawing
+directly, except that entities crossing the screen edge no longer show pygame's
+clipping artifacts on thick lines.
+"""
+
+import pygame
+
+class SpriteCache:
+    """
+    @brief Pre-rendered surfaces and their offsets, with hit/miss counters
+    """
+    def __init__(self):
+        """
+        @brief Initialize an empty cache
+        """
+        self._sprites = {}  # key -> (surface, (offset x, offset y))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def get(self, key, bounds, draw):
+        """
+        @brief Get a cached drawing, rendering it on the first request
+        @param key tuple Hashable key, e.g. (entity type, facing right, state)
+        @param bounds tuple (left, top, width, height) covered by the drawing, relative to the entity position
+        @param draw callable draw(surface, x, y) draws the entity as if it were at (x, y)
+        @return tuple (surface, (offset x, offset y)), blit at entity position + offset
+        """
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        left, top, width, height = bounds
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        draw(surface, -left, -top)
+        if pygame.display.get_surface() is not None:
+            # Match the display's pixel format for fast blits (needs a video mode)
+            surface = surface.convert_alpha()
+        sprite = self._sprites[key] = (surface, (left, top))
+        return sprite
+
+    def blit(self, screen, position, key, bounds, draw):
+        """
+        @brief Draw a cached drawing at an entity position
+        @param screen pygame.Surface Target surface
+        @param position tuple Entity position on the target
+        @param key tuple Cache key, see get
+        @param bounds tuple Drawing bounds, see get
+        @param draw callable Drawing function, see get
+        """
+        surface, (dx, dy) = self.get(key, bounds, draw)
+        screen.blit(surface, (position[0] + dx, position[1] + dy))
+
+    def clear(self):
+        """
+        @brief Drop every surface (e.g. after the display mode changed)
+        """
+        self._sprites.clear()
+
+    def reset_counters(self):
+        """
+        @brief Zero the hit and miss counters, keeping the surfaces
+        """
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        @brief Cache statistics
+        @return dict {"sprites": cached surfaces, "hits": lookups served, "misses": drawings rendered}
+        """
+        return {"sprites": len(self._sprites), "hits": self.hits, "misses": self.misses}
+
+# Cache shared by every entity
+sprites = SpriteCache()
@@ -0,0 +1,241 @@
+"""
+@file streaming.py
+@brief Enemies and collectibles loaded segment by segment around the camera
+@author Your Name
+@date 2024
+
+A streamed level is cut into segments of segment_width pixels along x. Only the
+segments in a window around the camera hold live Enemy and Collectible objects.
+A segment that leaves the window is unloaded: the state of its surviving enemies
+and the collectibles still lying there are packed into fixed-size records, and
+rebuilt from them when the camera comes back. The number of live entities is
+bounded by the window, however wide the level is. An entity belongs to the
+segment of its spawn point for its whole life.
+"""
+
+import numpy as np
+import tracing
+
+# Saved enemy: spawn row in the level data, position, health, fire cooldown, direction and facing
+ENEMY_RECORD = np.dtype([("row", "<i4"), ("x", "<i4"), ("y", "<i4"), ("health", "<i4"),
+                         ("cooldown", "<i4"), ("direction", "i1"), ("facing", "i1")])
+# Saved collectible: its row in the level data (collectibles never move)
+COLLECTIBLE_RECORD = np.dtype("<i4")
+
+class SegmentStreamer:
+    """
+    @brief Loads and unloads a level's enemies and collectibles by segment
+    """
+    def __init__(self, segment_width=1024, ahead=1, behind=1):
+        """
+        @brief Initialize streamer
+        @param segment_width int Segment width in pixels
+        @param ahead int Segments loaded past the right edge of the screen
+        @param behind int Segments kept loaded past the left edge of the screen
+        @throws ValueError If the segment width is not positive or a window size is negative
+        """
+        if segment_width <= 0 or ahead < 0 or behind < 0:
+            raise ValueError(f"invalid streaming window: segment_width={segment_width}, "
+                             f"ahead={ahead}, behind={behind}")
+        self.segment_width = segment_width
+        self.ahead = ahead
+        self.behind = behind
+        self.level = None
+        self.data = None
+        self.segment_count = 0
+        self.resident = set()  # Loaded segment indices
+        self._saved = {}  # segment index -> (enemy records, collectible records) bytes
+        self.loads = 0
+        self.unloads = 0
+
+    def attach(self, level, data):
+        """
+        @brief Take over a level's enemies and collectibles, nothing is loaded until update()
+        @param level Level Level whose enemies and collectibles lists are managed
+        @param data LevelData Level data the entities are spawned from
+        """
+        self.level = level
+        self.data = data
+        self.segment_count = max(-(-data.width // self.segment_width), 1)
+        self._enemy_segment = self._segments(data.enemies[:, 1])
+        self._collectible_segment = self._segments(data.collectibles[:, 0])
+        self._enemy_rows = self._bucket(self._enemy_segment)
+        self._collectible_rows = self._bucket(self._collectible_segment)
+        self._enemy_segment = self._enemy_segment.tolist()
+        self._collectible_segment = self._collectible_segment.tolist()
+        self.resident = set()
+        self._saved = {}
+        level.enemies = []
+        level.collectibles = []
+
+    def _segments(self, xs):
+        return np.clip(xs // self.segment_width, 0, self.segment_count - 1)
+
+    def _bucket(self, segments):
+        """
+        @brief Rows of every segment, in row order
+        @param segments numpy.ndarray Segment index of every row
+        @return list One list of row indices per segment
+        """
+        order = np.argsort(segments, kind="stable")
+        bounds = np.searchsorted(segments[order], np.arange(self.segment_count + 1)).tolist()
+        order = order.tolist()
+        return [order[bounds[i]:bounds[i + 1]] for i in range(self.segment_count)]
+
+    def window(self, left, right):
+        """
+        @brief Segments that must be loaded for a world x range on screen
+        @param left int Left edge of the range
+        @param right int Right edge of the range
+        @return tuple (first, last) segment indices, inclusive
+        """
+        width = self.segment_width
+        first = max(left // width - self.behind, 0)
+        last = min(right // width + self.ahead, self.segment_count - 1)
+        return first, last
+
+    def update(self, left, right):
+        """
+        @brief Load the segments around a world x range and unload the ones far from it
+        @param left int Left edge of the range (e.g. camera.viewport.left)
+        @param right int Right edge of the range
+        @return bool True if any segment was loaded or unloaded
+        """
+        first, last = self.window(left, right)
+        # One segment of slack before unloading, so pacing over a boundary does not reload it every step
+        unload = {segment for segment in self.resident if segment < first - 1 or segment > last + 1}
+        load = [segment for segment in range(first, last + 1) if segment not in self.resident]
+        if not unload and not load:
+            return False
+        level = self.level
+        if level.enemy_engine:
+            level.enemy_engine.sync_views()
+        enemies, collectibles = self._unload(unload) if unload else (level.enemies, level.collectibles)
+        for segment in load:
+            loaded_enemies, loaded_collectibles = self._load(segment)
+            enemies += loaded_enemies
+            collectibles += loaded_collectibles
+        # Keep spawn order, so the result does not depend on the order segments were loaded in
+        enemies.sort(key=lambda enemy: enemy.stream_row)
+        collectibles.sort(key=lambda collectible: collectible.stream_row)
+        level.enemies = enemies
+        if level.enemy_engine:
+            level.enemy_engine.rebuild(enemies)
+        level.set_collectibles(collectibles)
+        tracing.debug("level", "Streamed segments %d-%d: loaded %s, unloaded %s, %d enemies resident",
+                      first, last, load, sorted(unload), len(enemies))
+        return True
+
+    def _unload(self, segments):
+        """
+        @brief Save and drop the entities of some segments
+        @param segments set Segment indices to unload
+        @return tuple (enemies, collectibles) lists that stay loaded
+        """
+        level = self.level
+        saved_enemies = {segment: [] for segment in segments}
+        saved_collectibles = {segment: [] for segment in segments}
+        enemies = []
+        for enemy in level.enemies:
+            # Enemies placed by scripts (stream_row -1) are never unloaded
+            row = enemy.stream_row
+            group = saved_enemies.get(self._enemy_segment[row]) if row >= 0 else None
+            if group is None:
+                enemies.append(enemy)
+            else:
+                group.append((row, enemy.rect.x, enemy.rect.y, enemy.health, enemy.shoot_cooldown,
+                              enemy.direction, enemy.facing_right))
+        collectibles = []
+        for collectible in level.collectibles:
+            row = collectible.stream_row
+            group = saved_collectibles.get(self._collectible_segment[row]) if row >= 0 else None
+            if group is None:
+                collectibles.append(collectible)
+            else:
+                group.append(row)
+        for segment in segments:
+            self._saved[segment] = (np.array(saved_enemies[segment], dtype=ENEMY_RECORD).tobytes(),
+                                    np.array(saved_collectibles[segment], dtype=COLLECTIBLE_RECORD).tobytes())
+        self.resident -= segments
+        self.unloads += len(segments)
+        return enemies, collectibles
+
+    def _load(self, segment):
+        """
+        @brief Create the entities of one segment, from saved state if it was loaded before
+        @param segment int Segment index
+        @return tuple (enemies, collectibles) lists of new objects
+        """
+        level = self.level
+        data = self.data
+        saved = self._saved.pop(segment, None)
+        if saved is None:
+            enemies = [self._spawn_enemy(row) for row in self._enemy_rows[segment]]
+            collectible_rows = self._collectible_rows[segment]
+        else:
+            enemies = []
+            for row, x, y, health, cooldown, direction, facing in np.frombuffer(saved[0], dtype=ENEMY_RECORD).tolist():
+                enemy = self._spawn_enemy(row)
+                enemy.rect.topleft = (x, y)
+                enemy.health = health
+                enemy.shoot_cooldown = cooldown
+                enemy.direction = direction
+                enemy.facing_right = bool(facing)
+                enemies.append(enemy)
+            collectible_rows = np.frombuffer(saved[1], dtype=COLLECTIBLE_RECORD).tolist()
+        collectibles = []
+        for row in collectible_rows:
+            collectible = level.spawn_collectible(*data.collectibles[row].tolist())
+            collectible.stream_row = row
+            collectibles.append(collectible)
+        self.resident.add(segment)
+        self.loads += 1
+        return enemies, collectibles
+
+    def _spawn_enemy(self, row):
+        enemy = self.level.spawn_enemy(*self.data.enemies[row].tolist())
+        enemy.stream_row = row
+        # Slots follow the spawn row, so the reduced-rate schedule survives reloads
+        enemy.activity_slot = row
+        return enemy
+
+    def drop_enemies(self):
+        """
+        @brief Stop streaming enemies (after a script replaced the level's enemy list)
+        """
+        self._enemy_rows = [[] for _ in range(self.segment_count)]
+        self._saved = {segment: (b"", collectibles) for segment, (_, collectibles) in self._saved.items()}
+
+    def state(self):
+        """
+        @brief Which segments are loaded and the saved state of the unloaded ones, for snapshots
+        @return tuple (sorted resident segment indices, {segment: (enemy records, collectible records)})
+        """
+        return sorted(self.resident), dict(self._saved)
+
+    def restore_state(self, resident, saved):
+        """
+        @brief Adopt the state returned by state(), the level's entity lists must match it
+        @param resident iterable Loaded segment indices
+        @param saved dict {segment: (enemy records, collectible records)} bytes of unloaded segments
+        """
+        self.resident = set(resident)
+        self._saved = dict(saved)
+
+    def stats(self):
+        """
+        @brief Streaming statistics
+        @return dict {"segments", "resident": loaded segments, "saved": unloaded segments with saved state,
+                      "saved_bytes", "enemies" and "collectibles" loaded, "loads", "unloads"}
+        """
+        level = self.level
+        return {
+            "segments": self.segment_count,
+            "resident": len(self.resident),
+            "saved": len(self._saved),
+            "saved_bytes": sum(len(enemies) + len(collectibles) for enemies, collectibles in self._saved.values()),
+            "enemies": len(level.enemies) if level else 0,
+            "collectibles": len(level.collectibles) if level else 0,
+            "loads": self.loads,
+            "unloads": self.unloads,
+        }
@@ -0,0 +1,13 @@
+"""
+@file conftest.py
+@brief Shared pytest setup: headless SDL and the game modules on the import path
+@author Your Name
+@date 2024
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
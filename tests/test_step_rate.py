@@ -0,0 +1,42 @@
+"""
+@file test_step_rate.py
+@brief A lower step rate must only make the simulation cheaper, not change how it plays
+@author Your Name
+@date 2024
+"""
+
+import pytest
+from level import Level
+from player import Player
+
+def simulate_jump(step_rate):
+    """
+    @brief Standing jump on flat ground, simulated at a step rate
+    @param step_rate int Game steps per second, must divide 60
+    @return tuple (apex height in pixels, frame the player is back on the ground)
+    """
+    dt = 60 // step_rate
+    level = Level(0)  # No level source: flat ground only
+    player = Player(100, 440)
+    player.on_ground = True
+    ground = player.rect.bottom
+    highest = ground
+    frame = 0
+    player.jump()
+    while not player.on_ground:
+        assert frame < 600, "the player never landed"
+        player.update(dt)
+        level.check_collision(player)
+        frame += dt
+        highest = min(highest, player.rect.bottom)
+    assert player.rect.bottom == ground
+    return ground - highest, frame
+
+@pytest.mark.parametrize("step_rate", [30, 20])
+def test_jump_matches_60_steps_per_second(step_rate):
+    apex, landing = simulate_jump(step_rate)
+    reference_apex, reference_landing = simulate_jump(60)
+    assert apex == reference_apex
+    # A slower step can only land on a step boundary: the one containing the 60 Hz landing frame
+    dt = 60 // step_rate
+    assert landing == -(-reference_landing // dt) * dt
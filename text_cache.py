@@ -0,0 +1,119 @@
+"""
+@file text_cache.py
+@brief Font registry and cache of rasterized text surfaces for the HUD and menus
+@author Your Name
+@date 2024
+
+Creating a pygame Font loads and parses the font file, and rendering a string
+rasterizes every glyph, both far too slow to repeat every frame. Fonts are
+created once per (name, size), and rendered strings are kept in a
+least-recently-used cache keyed by (text, size, color).
+"""
+
+from collections import OrderedDict
+import pygame
+
+# (name, size) -> pygame.font.Font
+_fonts = {}
+
+def get_font(size, name=None):
+    """
+    @brief Shared font of a size, created on first use
+    @param size int Font size
+    @param name str Font file (None for pygame's default font)
+    @return pygame.font.Font Font, must not have its style changed
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(name, size)
+    return font
+
+class TextCache:
+    """
+    @brief LRU cache of rendered text surfaces
+    """
+    def __init__(self, max_entries=256):
+        """
+        @brief Initialize cache
+        @param max_entries int Surfaces kept before the least recently used one is dropped
+        """
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()  # (text, size, color, name) -> surface
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def render(self, text, size, color, name=None):
+        """
+        @brief Antialiased text surface, rasterized on first use
+        @param text str Text
+        @param size int Font size
+        @param color tuple RGB color
+        @param name str Font file (None for pygame's default font)
+        @return pygame.Surface Shared surface, must not be drawn on
+        """
+        key = (text, size, tuple(color), name)
+        surfaces = self._surfaces
+        surface = surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = surfaces[key] = get_font(size, name).render(text, True, color)
+        if len(surfaces) > self.max_entries:
+            surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        """
+        @brief Drop every surface
+        """
+        self._surfaces.clear()
+
+    def stats(self):
+        """
+        @brief Cache statistics
+        @return dict {"surfaces": cached surfaces, "hits", "misses", "evictions"}
+        """
+        return {"surfaces": len(self._surfaces), "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
+
+class Label:
+    """
+    @brief Text built from a format string, re-rendered only when its value changes
+    """
+    def __init__(self, template, size, color, cache=None):
+        """
+        @brief Initialize label
+        @param template str Format string with one {} field, e.g. "Ammo: {}"
+        @param size int Font size
+        @param color tuple RGB color
+        @param cache TextCache Cache to render through (None for the shared text_cache)
+        """
+        self.template = template
+        self.size = size
+        self.color = color
+        self.cache = cache
+        self._value = None
+        self._surface = None
+
+    def surface(self, value):
+        """
+        @brief Surface showing a value
+        @param value object Value formatted into the template
+        @return pygame.Surface Text surface
+        """
+        if self._surface is None or value != self._value:
+            cache = self.cache if self.cache is not None else text_cache
+            self._surface = cache.render(self.template.format(value), self.size, self.color)
+            self._value = value
+        return self._surface
+
+# Cache shared by the HUD, the menus and the profiler overlay
+text_cache = TextCache()
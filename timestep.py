@@ -0,0 +1,86 @@
+"""
+@file timestep.py
+@brief Fixed-timestep accumulator decoupling simulation from rendering
+@author Your Name
+@date 2024
+"""
+
+import time
+
+class FixedTimestep:
+    """
+    @brief Runs the simulation in fixed steps regardless of the render rate
+    """
+    # Fast-forward multipliers, None means unbounded
+    SPEEDS = (1, 2, 8, None)
+
+    def __init__(self, step_rate=60, speed=1, max_steps=5):
+        """
+        @brief Initialize timestep
+        @param step_rate int Simulation steps per second of game time
+        @param speed int or None Fast-forward multiplier, None for unbounded
+        @param max_steps int Maximum steps per frame at 1x (avoids the spiral of death)
+        """
+        self.step_rate = step_rate
+        self.dt = 1.0 / step_rate
+        self.speed = speed
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.alpha = 1.0  # Interpolation factor between the last two steps
+        self.total_steps = 0
+
+    def cycle_speed(self):
+        """
+        @brief Switch to the next fast-forward multiplier
+        @return int or None The new multiplier
+        """
+        index = self.SPEEDS.index(self.speed) if self.speed in self.SPEEDS else -1
+        self.speed = self.SPEEDS[(index + 1) % len(self.SPEEDS)]
+        self.accumulator = 0.0
+        return self.speed
+
+    def reset(self):
+        """
+        @brief Forget elapsed time, e.g. when resuming after an idle menu
+        """
+        self.accumulator = 0.0
+        self.alpha = 1.0
+
+    def speed_label(self):
+        """
+        @brief Human readable multiplier
+        @return str Label such as "2x" or "max"
+        """
+        return "max" if self.speed is None else f"{self.speed}x"
+
+    def run(self, step, real_dt):
+        """
+        @brief Run as many simulation steps as the elapsed time requires
+        @param step callable Function advancing the simulation by one step
+        @param real_dt float Wall-clock seconds since the last rendered frame
+        @return int Number of steps run
+        """
+        steps = 0
+        if self.speed is None:
+            # Unbounded: simulate until one display frame worth of wall time is used
+            deadline = time.perf_counter() + self.dt
+            while True:
+                step()
+                steps += 1
+                if time.perf_counter() >= deadline:
+                    break
+            self.accumulator = 0.0
+            self.alpha = 1.0
+        else:
+            self.accumulator += real_dt * self.speed
+            limit = self.max_steps * self.speed
+            while self.accumulator >= self.dt and steps < limit:
+                step()
+                steps += 1
+                self.accumulator -= self.dt
+            if steps >= limit:
+                # Too far behind, drop the backlog instead of slowing down further
+                self.accumulator = min(self.accumulator, self.dt)
+            self.alpha = min(self.accumulator / self.dt, 1.0)
+        self.total_steps += steps
+        return steps
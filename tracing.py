@@ -0,0 +1,171 @@
+"""
+@file tracing.py
+@brief Leveled trace facility with per-category toggles and an in-memory ring buffer
+@author Your Name
+@date 2024
+"""
+
+import os
+import sys
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# Production switch: "python -O" or RABBIT_TRACE=0 turns every call into a no-op
+ENABLED = __debug__ and os.environ.get("RABBIT_TRACE", "1") != "0"
+
+# Minimum level recorded when a category has no level of its own
+_level = int(os.environ.get("RABBIT_TRACE_LEVEL", INFO))
+_category_levels = {}
+# Also print recorded messages to stdout
+_echo = os.environ.get("RABBIT_TRACE_ECHO", "0") == "1"
+_buffer = deque(maxlen=4096)
+
+def set_level(level, category=None):
+    """
+    @brief Set the minimum recorded level globally or for one category
+    @param level int Minimum level (DEBUG, INFO, WARNING, ERROR)
+    @param category str Category name, None for the global level
+    """
+    global _level
+    if category is None:
+        _level = level
+    else:
+        _category_levels[category] = level
+
+def enable(category, level=DEBUG):
+    """
+    @brief Record a category from the given level upwards
+    @param category str Category name
+    @param level int Minimum level
+    """
+    _category_levels[category] = level
+
+def disable(category):
+    """
+    @brief Stop recording a category
+    @param category str Category name
+    """
+    _category_levels[category] = ERROR + 1
+
+def set_echo(echo):
+    """
+    @brief Toggle printing recorded messages to stdout
+    @param echo bool Whether to print
+    """
+    global _echo
+    _echo = echo
+
+def set_capacity(capacity):
+    """
+    @brief Resize the ring buffer, keeping the most recent records
+    @param capacity int Maximum number of records kept
+    """
+    global _buffer
+    _buffer = deque(_buffer, maxlen=capacity)
+
+def is_enabled(category, level=DEBUG):
+    """
+    @brief Whether a message would be recorded (use to guard expensive arguments)
+    @param category str Category name
+    @param level int Message level
+    @return bool True if recorded
+    """
+    return ENABLED and level >= _category_levels.get(category, _level)
+
+def log(category, level, message, *args):
+    """
+    @brief Record a message; formatting only happens if the message is kept
+    @param category str Category name
+    @param level int Message level
+    @param message str Message, %-style format string if args are given
+    @param args Format arguments
+    """
+    if level < _category_levels.get(category, _level):
+        return
+    if args:
+        message = message % args
+    record = (time.perf_counter(), level, category, message)
+    _buffer.append(record)
+    if _echo:
+        print(format_record(record))
+
+def debug(category, message, *args):
+    """
+    @brief Record a DEBUG message
+    """
+    log(category, DEBUG, message, *args)
+
+def info(category, message, *args):
+    """
+    @brief Record an INFO message
+    """
+    log(category, INFO, message, *args)
+
+def warning(category, message, *args):
+    """
+    @brief Record a WARNING message
+    """
+    log(category, WARNING, message, *args)
+
+def error(category, message, *args):
+    """
+    @brief Record an ERROR message
+    """
+    log(category, ERROR, message, *args)
+
+def _noop(*args, **kwargs):
+    pass
+
+if not ENABLED:
+    log = debug = info = warning = error = _noop
+
+def format_record(record):
+    """
+    @brief Format one ring buffer record as a line
+    @param record tuple (timestamp, level, category, message)
+    @return str Formatted line
+    """
+    timestamp, level, category, message = record
+    return f"{timestamp:12.4f} [{LEVEL_NAMES.get(level, level)}] {category}: {message}"
+
+def records():
+    """
+    @brief Snapshot of the ring buffer
+    @return list Records, oldest first
+    """
+    return list(_buffer)
+
+def clear():
+    """
+    @brief Empty the ring buffer
+    """
+    _buffer.clear()
+
+def dump(stream=None):
+    """
+    @brief Write the ring buffer to a stream
+    @param stream file Output stream (defaults to stderr)
+    @return int Number of records written
+    """
+    stream = stream or sys.stderr
+    entries = list(_buffer)
+    for record in entries:
+        stream.write(format_record(record) + "\n")
+    stream.flush()
+    return len(entries)
+
+def dump_to_file(path="trace_dump.txt"):
+    """
+    @brief Write the ring buffer to a file
+    @param path str Output file path
+    @return int Number of records written
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        return dump(f)
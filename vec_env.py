@@ -0,0 +1,301 @@
+"""
+@file vec_env.py
+@brief Step/reset environment wrappers around Game, batched across worker processes
+@author Your Name
+@date 2024
+
+Observations, rewards and done flags are written by the workers straight into
+shared memory; the pipes to the workers only carry short commands.
+"""
+
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+# Action bits, combine with | (e.g. RIGHT | JUMP)
+LEFT = 1
+RIGHT = 2
+JUMP = 4
+SHOOT = 8
+
+NEAREST_ENEMIES = 4
+NEAREST_PROJECTILES = 4
+# Player (7) + (dx, dy, health) per enemy + (dx, dy) per enemy projectile
+STATE_SIZE = 7 + 3 * NEAREST_ENEMIES + 2 * NEAREST_PROJECTILES
+
+class GameEnv:
+    """
+    @brief Single headless Game driven by discrete actions
+    """
+    def __init__(self, obs_type="state", pixel_size=(160, 120), level=1, frame_skip=1):
+        """
+        @brief Initialize environment
+        @param obs_type str "state" for compact vectors or "pixels" for RGB frames
+        @param pixel_size tuple (width, height) of pixel observations
+        @param level int Level every episode starts in
+        @param frame_skip int Game updates per step, the action is held for all of them
+        """
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        import pygame
+        if not pygame.get_init():
+            pygame.init()
+        self.obs_type = obs_type
+        self.pixel_size = pixel_size
+        self.level = level
+        self.frame_skip = frame_skip
+        self.screen = pygame.Surface((800, 600))
+        self.game = None
+        self.last_x = 0
+
+    @property
+    def observation_shape(self):
+        """
+        @brief Shape of one observation
+        @return tuple Shape
+        """
+        if self.obs_type == "pixels":
+            return (self.pixel_size[1], self.pixel_size[0], 3)
+        return (STATE_SIZE,)
+
+    @property
+    def observation_dtype(self):
+        """
+        @brief Numpy dtype of observations
+        @return numpy.dtype dtype
+        """
+        return np.uint8 if self.obs_type == "pixels" else np.float32
+
+    def reset(self, seed=None, out=None):
+        """
+        @brief Start a new episode
+        @param seed int Game seed
+        @param out numpy.ndarray Optional array the observation is written into
+        @return numpy.ndarray Observation
+        """
+        from game import Game
+        self.game = Game(self.screen, seed=seed)
+        # Episodes end with the level, a preloaded next level would never be used
+        self.game.preload_levels = False
+        self.game.start_level(self.level)
+        self.last_x = self.game.player.rect.x
+        return self.observe(out)
+
+    def step(self, action, out=None):
+        """
+        @brief Apply an action and advance the game
+        @param action int Bitmask of LEFT, RIGHT, JUMP and SHOOT
+        @param out numpy.ndarray Optional array the observation is written into
+        @return tuple (observation, reward, done, info)
+        """
+        from game_state import GameState
+        game = self.game
+        player = game.player
+        player.moving_left = bool(action & LEFT)
+        player.moving_right = bool(action & RIGHT)
+        if action & JUMP:
+            player.jump()
+        if action & SHOOT:
+            proj = player.shoot(game.spawn_player_projectile)
+            if proj:
+                game.projectiles.add(proj)
+        lives = player.lives
+        enemies = len(game.level.enemies)
+        for _ in range(self.frame_skip):
+            game.update()
+            if game.state != GameState.PLAYING:
+                break
+        # Reward forward progress and kills, punish lost lives
+        reward = (player.rect.x - self.last_x) / 100.0
+        reward += enemies - len(game.level.enemies)
+        reward -= 10.0 * (lives - player.lives)
+        self.last_x = player.rect.x
+        done = game.state != GameState.PLAYING
+        info = {"state": game.state.name, "frame": game.frame}
+        return self.observe(out), reward, done, info
+
+    def observe(self, out=None):
+        """
+        @brief Build the current observation
+        @param out numpy.ndarray Optional array the observation is written into
+        @return numpy.ndarray Observation
+        """
+        if out is None:
+            out = np.empty(self.observation_shape, dtype=self.observation_dtype)
+        if self.obs_type == "pixels":
+            import pygame
+            self.game.render()
+            frame = self.screen
+            if frame.get_size() != self.pixel_size:
+                frame = pygame.transform.scale(frame, self.pixel_size)
+            # surfarray is (width, height, 3), observations are (height, width, 3)
+            out[...] = pygame.surfarray.pixels3d(frame).swapaxes(0, 1)
+            return out
+        self._state_vector(out)
+        return out
+
+    def _state_vector(self, out):
+        game = self.game
+        player = game.player
+        px, py = player.rect.centerx, player.rect.centery
+        out[:] = 0.0
+        out[:7] = (px / game.level.width, py / game.level.height, player.vel_y / 15.0,
+                   player.health / 100.0, player.lives / 3.0, player.ammo / player.max_ammo,
+                   1.0 if player.on_ground else 0.0)
+        enemies = sorted(game.level.enemies, key=lambda e: abs(e.rect.centerx - px))[:NEAREST_ENEMIES]
+        for i, enemy in enumerate(enemies):
+            base = 7 + 3 * i
+            out[base:base + 3] = ((enemy.rect.centerx - px) / 800.0, (enemy.rect.centery - py) / 600.0,
+                                  enemy.health / 100.0)
+        projectiles = sorted(game.enemy_projectiles, key=lambda p: abs(p.rect.centerx - px))[:NEAREST_PROJECTILES]
+        for i, proj in enumerate(projectiles):
+            base = 7 + 3 * NEAREST_ENEMIES + 2 * i
+            out[base:base + 2] = ((proj.rect.centerx - px) / 800.0, (proj.rect.centery - py) / 600.0)
+
+def _worker(conn, indices, env_kwargs, shm_names, obs_shape, obs_dtype, num_envs):
+    """
+    @brief Worker process loop owning the environments at the given indices
+    """
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    buffers = [shared_memory.SharedMemory(name=name) for name in shm_names]
+    obs = np.ndarray((num_envs,) + obs_shape, dtype=obs_dtype, buffer=buffers[0].buf)
+    actions = np.ndarray((num_envs,), dtype=np.int32, buffer=buffers[1].buf)
+    rewards = np.ndarray((num_envs,), dtype=np.float32, buffer=buffers[2].buf)
+    dones = np.ndarray((num_envs,), dtype=np.bool_, buffer=buffers[3].buf)
+    envs = {i: GameEnv(**env_kwargs) for i in indices}
+    episode_seeds = {}
+    try:
+        while True:
+            command, payload = conn.recv()
+            if command == "reset":
+                for i in indices:
+                    episode_seeds[i] = None if payload is None else payload + i
+                    envs[i].reset(episode_seeds[i], out=obs[i])
+                    rewards[i] = 0.0
+                    dones[i] = False
+                conn.send(None)
+            elif command == "step":
+                infos = {}
+                for i in indices:
+                    _, reward, done, info = envs[i].step(int(actions[i]), out=obs[i])
+                    rewards[i] = reward
+                    dones[i] = done
+                    if done:
+                        # Auto-reset, the observation returned is the first one of the next episode
+                        if episode_seeds[i] is not None:
+                            episode_seeds[i] += num_envs
+                        envs[i].reset(episode_seeds[i], out=obs[i])
+                    infos[i] = info
+                conn.send(infos)
+            elif command == "close":
+                break
+    finally:
+        del obs, actions, rewards, dones
+        for buffer in buffers:
+            buffer.close()
+        conn.close()
+
+class VecGameEnv:
+    """
+    @brief N independent games run by a pool of worker processes
+    """
+    def __init__(self, num_envs, num_workers=None, **env_kwargs):
+        """
+        @brief Initialize vectorized environment
+        @param num_envs int Number of game instances
+        @param num_workers int Worker processes (defaults to the CPU count, at most num_envs)
+        @param env_kwargs Arguments forwarded to every GameEnv
+        """
+        self.num_envs = num_envs
+        num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        probe = GameEnv.__new__(GameEnv)
+        probe.obs_type = env_kwargs.get("obs_type", "state")
+        probe.pixel_size = env_kwargs.get("pixel_size", (160, 120))
+        self.observation_shape = probe.observation_shape
+        self.observation_dtype = np.dtype(probe.observation_dtype)
+
+        obs_bytes = int(np.prod((num_envs,) + self.observation_shape)) * self.observation_dtype.itemsize
+        self._buffers = [
+            shared_memory.SharedMemory(create=True, size=max(obs_bytes, 1)),
+            shared_memory.SharedMemory(create=True, size=num_envs * 4),
+            shared_memory.SharedMemory(create=True, size=num_envs * 4),
+            shared_memory.SharedMemory(create=True, size=num_envs),
+        ]
+        self.observations = np.ndarray((num_envs,) + self.observation_shape,
+                                       dtype=self.observation_dtype, buffer=self._buffers[0].buf)
+        self._actions = np.ndarray((num_envs,), dtype=np.int32, buffer=self._buffers[1].buf)
+        self.rewards = np.ndarray((num_envs,), dtype=np.float32, buffer=self._buffers[2].buf)
+        self.dones = np.ndarray((num_envs,), dtype=np.bool_, buffer=self._buffers[3].buf)
+
+        # Spawn rather than fork so workers never inherit an initialised SDL
+        context = multiprocessing.get_context("spawn")
+        self._connections = []
+        self._processes = []
+        names = [buffer.name for buffer in self._buffers]
+        for indices in np.array_split(np.arange(num_envs), num_workers):
+            parent, child = context.Pipe()
+            process = context.Process(
+                target=_worker,
+                args=(child, [int(i) for i in indices], env_kwargs, names,
+                      self.observation_shape, self.observation_dtype, num_envs),
+                daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self.closed = False
+
+    def reset(self, seed=None):
+        """
+        @brief Reset every game
+        @param seed int Base seed, game i uses seed + i
+        @return numpy.ndarray Observations, shape (num_envs, *observation_shape)
+        """
+        for conn in self._connections:
+            conn.send(("reset", seed))
+        for conn in self._connections:
+            conn.recv()
+        return self.observations
+
+    def step(self, actions):
+        """
+        @brief Advance every game by one step
+        @param actions array-like One action bitmask per game
+        @return tuple (observations, rewards, dones, infos); the arrays are views into shared memory
+        """
+        self._actions[:] = actions
+        for conn in self._connections:
+            conn.send(("step", None))
+        infos = [None] * self.num_envs
+        for conn in self._connections:
+            for i, info in conn.recv().items():
+                infos[i] = info
+        return self.observations, self.rewards, self.dones, infos
+
+    def close(self):
+        """
+        @brief Stop the workers and release shared memory
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for conn in self._connections:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        del self.observations, self._actions, self.rewards, self.dones
+        for buffer in self._buffers:
+            buffer.close()
+            buffer.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False